@@ -0,0 +1,240 @@
+"""
+Admission control for the expensive endpoints.
+
+OCR uploads, forecasts, statement imports, exports and bcrypt logins each
+get their own EndpointClass. A class has a fixed number of slots, a bounded
+wait queue, a cap on how many requests one user may have in it, and a
+maximum wait. Everything else (dashboard reads, listings) never queues.
+
+    slot free, nobody queued    -> runs now
+    user already at their cap   -> 429, Retry-After
+    queue full / waited too long -> 503, Retry-After
+
+Freed slots go to queued users in round-robin order, not arrival order,
+so one user's burst can't starve everyone else. Waiting happens on the
+event loop, so queued requests don't tie up threadpool threads that cheap
+reads need. Limits are per process; with N uvicorn workers multiply by N.
+
+Queue depth, in-flight counts, waits and rejections are on GET /metrics.
+"""
+import asyncio
+import math
+import os
+import re
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+
+from starlette.responses import JSONResponse
+
+from .metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_DEPTH, ADMISSION_REJECTED, ADMISSION_WAIT
+from .security import decode_token
+from .ml.forecast_engine import MAX_FORECAST_WORKERS
+from .ml.receipt_engine import OCR_WORKERS
+
+MAX_RETRY_AFTER = 60  # seconds
+
+
+class Rejected(Exception):
+    def __init__(self, status_code: int, reason: str, retry_after: int):
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class EndpointClass:
+    def __init__(self, name: str, concurrency: int, queue_size: int, per_user: int, max_wait: float):
+        self.name = name
+        self.concurrency = max(concurrency, 1)
+        self.queue_size = queue_size
+        self.per_user = per_user
+        self.max_wait = max_wait
+
+        self.active = 0
+        self.queued = 0
+        self.by_user = {}  # user -> active + queued
+        self.waiting = OrderedDict()  # user -> deque of futures; order = whose turn is next
+        # moving average of how long a request holds its slot
+        self.avg_service = 1.0
+        self._publish()
+
+    # -------------------------------
+    # slots
+    # -------------------------------
+
+    async def acquire(self, user: str):
+        if self.by_user.get(user, 0) >= self.per_user:
+            self._reject(429, "per_user_limit")
+
+        if self.active < self.concurrency and not self.queued:
+            self.active += 1
+            self.by_user[user] = self.by_user.get(user, 0) + 1
+            ADMISSION_WAIT.observe(0.0, self.name)
+            self._publish()
+            return
+
+        if self.queued >= self.queue_size:
+            self._reject(503, "queue_full")
+
+        future = asyncio.get_running_loop().create_future()
+        self.waiting.setdefault(user, deque()).append(future)
+        self.queued += 1
+        self.by_user[user] = self.by_user.get(user, 0) + 1
+        self._publish()
+
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(future, self.max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            self._abandon(user, future)
+            if isinstance(exc, asyncio.TimeoutError):
+                self._reject(503, "wait_timeout")
+            raise
+        ADMISSION_WAIT.observe(time.perf_counter() - start, self.name)
+
+    def release(self, user: str, seconds: Optional[float] = None):
+        self.active -= 1
+        self._forget(user)
+        if seconds is not None:
+            self.avg_service = 0.8 * self.avg_service + 0.2 * seconds
+        self._wake()
+        self._publish()
+
+    def _wake(self):
+        while self.active < self.concurrency and self.waiting:
+            user, futures = next(iter(self.waiting.items()))
+            future = futures.popleft()
+            if futures:
+                self.waiting.move_to_end(user)
+            else:
+                del self.waiting[user]
+            self.queued -= 1
+
+            if future.done():
+                # timed out or disconnected before its turn came
+                self._forget(user)
+                continue
+            self.active += 1
+            future.set_result(None)
+
+    def _abandon(self, user: str, future):
+        futures = self.waiting.get(user)
+        if futures is not None and future in futures:
+            futures.remove(future)
+            if not futures:
+                del self.waiting[user]
+            self.queued -= 1
+            self._forget(user)
+        elif future.done() and not future.cancelled():
+            # handed a slot just as we gave up: pass it on
+            self.release(user)
+        self._publish()
+
+    def _forget(self, user: str):
+        remaining = self.by_user.get(user, 0) - 1
+        if remaining > 0:
+            self.by_user[user] = remaining
+        else:
+            self.by_user.pop(user, None)
+
+    # -------------------------------
+    # reporting
+    # -------------------------------
+
+    def retry_after(self) -> int:
+        # time for the queue ahead to drain through the slots
+        estimate = self.avg_service * (self.queued + 1) / self.concurrency
+        return min(max(math.ceil(estimate), 1), MAX_RETRY_AFTER)
+
+    def _reject(self, status_code: int, reason: str):
+        ADMISSION_REJECTED.inc(1, self.name, reason)
+        raise Rejected(status_code, reason, self.retry_after())
+
+    def _publish(self):
+        ADMISSION_IN_FLIGHT.set(self.active, self.name)
+        ADMISSION_QUEUE_DEPTH.set(self.queued, self.name)
+
+
+def _limit(env: str, default: int) -> int:
+    return int(os.getenv(env, default))
+
+
+CPUS = os.cpu_count() or 1
+
+# slots, queue size, per-user cap, max wait (s); slots and per-user caps can
+# be set per deployment: SMARTSPEND_<CLASS>_CONCURRENCY / _PER_USER
+ENDPOINT_CLASSES = {
+    "ocr": EndpointClass("ocr", _limit("SMARTSPEND_OCR_CONCURRENCY", OCR_WORKERS),
+                         4 * OCR_WORKERS, _limit("SMARTSPEND_OCR_PER_USER", 2), 30.0),
+    "forecast": EndpointClass("forecast", _limit("SMARTSPEND_FORECAST_CONCURRENCY", MAX_FORECAST_WORKERS),
+                              4 * MAX_FORECAST_WORKERS, _limit("SMARTSPEND_FORECAST_PER_USER", 2), 10.0),
+    "import": EndpointClass("import", _limit("SMARTSPEND_IMPORT_CONCURRENCY", 2), 8,
+                            _limit("SMARTSPEND_IMPORT_PER_USER", 1), 30.0),
+    "export": EndpointClass("export", _limit("SMARTSPEND_EXPORT_CONCURRENCY", 2), 4,
+                            _limit("SMARTSPEND_EXPORT_PER_USER", 1), 10.0),
+    "auth": EndpointClass("auth", _limit("SMARTSPEND_AUTH_CONCURRENCY", CPUS), 8 * CPUS,
+                          _limit("SMARTSPEND_AUTH_PER_USER", 4), 5.0),
+}
+
+# (method, path pattern, class); first match wins, no match = not limited
+ENDPOINT_ROUTES = [
+    ("POST", re.compile(r"/receipts/(upload|upload/batch|\d+/reprocess)/?"), "ocr"),
+    ("GET", re.compile(r"/forecast(/.*)?"), "forecast"),
+    ("POST", re.compile(r"/transactions/upload/?"), "import"),
+    ("GET", re.compile(r"/transactions/export/?"), "export"),
+    ("POST", re.compile(r"/auth/(login|register)/?"), "auth"),
+]
+
+
+def classify(method: str, path: str) -> Optional[EndpointClass]:
+    for route_method, pattern, name in ENDPOINT_ROUTES:
+        if method == route_method and pattern.fullmatch(path):
+            return ENDPOINT_CLASSES[name]
+    return None
+
+
+def _client_key(scope) -> str:
+    """The bearer token's user, else the client address (logins)."""
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode().partition(" ")
+            email = decode_token(token) if scheme.lower() == "bearer" else None
+            if email:
+                return f"user:{email}"
+    client = scope.get("client")
+    return f"ip:{client[0]}" if client else "ip:unknown"
+
+
+class AdmissionMiddleware:
+    """Pure ASGI; requests outside ENDPOINT_ROUTES skip straight through."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        endpoint_class = classify(scope["method"], scope["path"])
+        if endpoint_class is None:
+            return await self.app(scope, receive, send)
+
+        user = _client_key(scope)
+        try:
+            await endpoint_class.acquire(user)
+        except Rejected as rejected:
+            detail = ("Too many requests of this kind in progress for you"
+                      if rejected.status_code == 429 else "Server busy, try again shortly")
+            response = JSONResponse(
+                {"detail": detail, "endpoint_class": endpoint_class.name, "reason": rejected.reason},
+                status_code=rejected.status_code,
+                headers={"Retry-After": str(rejected.retry_after)},
+            )
+            return await response(scope, receive, send)
+
+        start = time.perf_counter()
+        try:
+            # held until the body is sent, so streamed exports count too
+            await self.app(scope, receive, send)
+        finally:
+            endpoint_class.release(user, time.perf_counter() - start)
@@ -1,13 +1,28 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 
-from .database import Base, engine
-from .routers import auth, accounts, transactions, forecast, receipts, tax
+from .admission import AdmissionMiddleware
+from .database import Base, SessionLocal, engine
+from .metrics import MetricsMiddleware, render_metrics
+from .profiling import ProfilingMiddleware
+from .routers import auth, accounts, transactions, forecast, receipts, tax, search, dashboard, admin
+from .services.schema_upgrade import upgrade_schema
+from .services.search_index import install_search_index
+from .services.income_totals import backfill_income_totals
+from .services.receipt_jobs import workers as receipt_job_workers
 
 app = FastAPI(title="SmartSpend API")
 
 Base.metadata.create_all(bind=engine)
+upgrade_schema(engine)
+install_search_index(engine)
+
+# innermost first: shed requests still show up in the latency metrics
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ProfilingMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -23,7 +38,35 @@ app.include_router(transactions.router)
 app.include_router(forecast.router)
 app.include_router(receipts.router)
 app.include_router(tax.router) 
+app.include_router(search.router)
+app.include_router(dashboard.router)
+app.include_router(admin.router)
+
+
+@app.on_event("startup")
+def start_receipt_workers():
+    receipt_job_workers.start()
+
+
+@app.on_event("startup")
+def build_income_totals():
+    db = SessionLocal()
+    try:
+        backfill_income_totals(db)
+    finally:
+        db.close()
+
+
+@app.on_event("shutdown")
+def stop_receipt_workers():
+    receipt_job_workers.stop()
+
 
 @app.get("/")
 def root():
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
\ No newline at end of file
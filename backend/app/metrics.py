@@ -0,0 +1,215 @@
+"""
+In-process latency histograms, exported in Prometheus text format on
+GET /metrics. Each API process keeps its own numbers; scrape every worker.
+
+    with span("predict_category"):
+        ...
+
+    @timed("run_sarimax_forecast")
+    def run_sarimax_forecast(...):
+        ...
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+
+# seconds; wide enough for a 2 ms auth check and a 30 s OCR batch
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {k: list(v) for k, v in self._series.items()}
+
+        for label_values, series in sorted(snapshot.items()):
+            base = ",".join(
+                f'{k}="{_escape(v)}"' for k, v in zip(self.labels, label_values)
+            )
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{{{base + ',' if base else ''}{le}}} {cumulative}")
+            labels = f"{{{base}}}" if base else ""
+            lines.append(f"{self.name}_sum{labels} {series[-1]}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return "\n".join(lines)
+
+
+class Gauge:
+    """A value that goes up and down, e.g. queue depth."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, *label_values):
+        with self._lock:
+            self._values[label_values] = value
+
+    def inc(self, amount: float = 1, *label_values):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            snapshot = dict(self._values)
+        for label_values, value in sorted(snapshot.items()):
+            labels = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, label_values))
+            lines.append(f"{self.name}{{{labels}}} {value}" if labels else f"{self.name} {value}")
+        return "\n".join(lines)
+
+
+class Counter(Gauge):
+    """Only ever goes up; use inc()."""
+
+    kind = "counter"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUEST_LATENCY = Histogram(
+    "smartspend_request_duration_seconds",
+    "HTTP request latency by route template, method and status.",
+    labels=("method", "route", "status"),
+)
+
+STAGE_LATENCY = Histogram(
+    "smartspend_stage_duration_seconds",
+    "Time spent in instrumented internal stages.",
+    labels=("stage",),
+)
+
+ADMISSION_IN_FLIGHT = Gauge(
+    "smartspend_admission_in_flight",
+    "Requests holding a slot, by endpoint class (see app/admission.py).",
+    labels=("endpoint_class",),
+)
+
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "smartspend_admission_queue_depth",
+    "Requests waiting for a slot, by endpoint class.",
+    labels=("endpoint_class",),
+)
+
+ADMISSION_REJECTED = Counter(
+    "smartspend_admission_rejected_total",
+    "Requests shed by admission control, by endpoint class and reason.",
+    labels=("endpoint_class", "reason"),
+)
+
+ADMISSION_WAIT = Histogram(
+    "smartspend_admission_wait_seconds",
+    "Time admitted requests spent queued for a slot.",
+    labels=("endpoint_class",),
+)
+
+REGISTRY = [REQUEST_LATENCY, STAGE_LATENCY, ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_DEPTH,
+            ADMISSION_REJECTED, ADMISSION_WAIT]
+
+
+def observe_stage(stage: str, seconds: float):
+    """Record a stage timed elsewhere (e.g. inside a worker process)."""
+    STAGE_LATENCY.observe(seconds, stage)
+
+
+@contextmanager
+def span(stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.observe(time.perf_counter() - start, stage)
+
+
+def timed(stage: str):
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                STAGE_LATENCY.observe(time.perf_counter() - start, stage)
+        return wrapper
+    return decorator
+
+
+def render_metrics() -> str:
+    return "\n".join(h.render() for h in REGISTRY) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    Request latency per route, measured up to the last body chunk sent.
+    Pure ASGI: a BaseHTTPMiddleware timer stops once the response object
+    is returned, before a streamed body has been sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status = 500
+        observed = False
+
+        def observe():
+            nonlocal observed
+            observed = True
+            # the route template, not the raw path, keeps label cardinality bounded
+            route = scope.get("route")
+            REQUEST_LATENCY.observe(
+                time.perf_counter() - start,
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                str(status),
+            )
+
+        async def send_timed(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                observe()
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            # failed or disconnected before the body was finished
+            if not observed:
+                observe()
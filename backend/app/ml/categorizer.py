@@ -6,6 +6,7 @@ from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.linear_model import LogisticRegression
 from sklearn.pipeline import Pipeline
 from .rule_engine import rule_based_category
+from ..metrics import timed
 
 MODEL_PATH = "app/ml/category_model.pkl"
 
@@ -126,6 +127,7 @@ def ml_predict(description: str) -> Optional[str]:
         return None
     return prediction
 
+@timed("predict_category")
 def predict_category(description: str, amount: float) -> str:
     try:
         # 1️⃣ Income detection (strong rule)
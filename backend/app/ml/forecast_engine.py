@@ -1,12 +1,28 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
 from statsmodels.tsa.statespace.sarimax import SARIMAX
 
+from ..metrics import observe_stage, timed
+
+# Fits are CPU bound, so batch forecasts fan out to worker processes.
+# "spawn" keeps the workers clear of the server's threads and open sockets.
+MAX_FORECAST_WORKERS = int(os.getenv("SMARTSPEND_FORECAST_WORKERS", os.cpu_count() or 1))
+
+_pool = None
+
 
 def prepare_monthly_series(transactions):
     """
     Convert daily balances into a MONTHLY closing balance series.
     Uses Month-End frequency ("ME") to be compatible with newer pandas versions.
+
+    The API computes month-end closes in SQL (see routers/forecast.py); this
+    in-memory version is kept for offline use and as the benchmark baseline.
     """
     df = pd.DataFrame(transactions)
 
@@ -24,16 +40,13 @@ def prepare_monthly_series(transactions):
     return monthly[["date", "balance"]]
 
 
-def run_sarimax_forecast(series_df, periods=6):
+@timed("run_sarimax_forecast")
+def run_sarimax_forecast(balances, periods=6):
     """
-    Run SARIMAX on monthly closing balances and return a forecast DF:
-    columns: date, forecast, lower, upper
+    Run SARIMAX on monthly closing balances (oldest first) and return
+    (forecast, lower, upper) arrays of length `periods`.
     """
-    series_df = series_df.copy()
-    series_df["date"] = pd.to_datetime(series_df["date"])
-    series_df = series_df.sort_values("date")
-
-    series = series_df.set_index("date")["balance"].astype(float)
+    series = np.asarray(balances, dtype=float)
 
     # If less than 3 points, SARIMAX will be unstable
     if len(series) < 3:
@@ -50,21 +63,153 @@ def run_sarimax_forecast(series_df, periods=6):
     results = model.fit(disp=False)
 
     forecast_res = results.get_forecast(steps=periods)
-    forecast_mean = forecast_res.predicted_mean
-    conf_int = forecast_res.conf_int()
-
-    # Month-end future dates
-    forecast_dates = pd.date_range(
-        start=series.index[-1] + pd.offsets.MonthEnd(1),
-        periods=periods,
-        freq="ME",
+    conf_int = np.asarray(forecast_res.conf_int(), dtype=float)
+
+    return (
+        np.asarray(forecast_res.predicted_mean, dtype=float),
+        conf_int[:, 0],
+        conf_int[:, 1],
+    )
+
+
+def fallback_forecast(balances, periods=6):
+    """
+    Straight-line forecast for accounts with fewer than 3 months of history.
+    Same (forecast, lower, upper) return as run_sarimax_forecast.
+    """
+    balances = np.asarray(balances, dtype=float)
+
+    slope = float(balances[-1] - balances[0]) / (len(balances) - 1) if len(balances) > 1 else 0.0
+    steps = np.arange(1, periods + 1)
+    forecast = balances[-1] + slope * steps
+
+    # Widen the band with the horizon; 10% of the last balance per month
+    spread = max(abs(float(balances[-1])) * 0.1, 1.0) * np.sqrt(steps)
+
+    return forecast, forecast - spread, forecast + spread
+
+
+def _all_finite(forecast):
+    return all(np.isfinite(values).all() for values in forecast)
+
+
+def forecast_monthly_series(balances, periods=6):
+    """
+    Pick the engine for one monthly series: SARIMAX when there is enough
+    history, otherwise the straight-line fallback. On a degenerate series
+    (short or near-constant) SARIMAX can fail or return NaN / inf, which
+    JSON can't carry; Holt smoothing, then the straight line, take over.
+    """
+    if len(balances) < 3:
+        return fallback_forecast(balances, periods=periods)
+
+    try:
+        forecast = run_sarimax_forecast(balances, periods=periods)
+    except (ValueError, IndexError, np.linalg.LinAlgError):
+        forecast = None
+    if forecast is not None and _all_finite(forecast):
+        return forecast
+
+    forecast = run_holt_forecast(balances, periods=periods)
+    if _all_finite(forecast):
+        return forecast
+    return fallback_forecast(balances, periods=periods)
+
+
+def _forecast_in_worker(balances, periods):
+    # metrics recorded in a worker process never reach /metrics; time the
+    # fit here and let the parent record it
+    start = time.perf_counter()
+    result = forecast_monthly_series(balances, periods)
+    return result, time.perf_counter() - start
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=MAX_FORECAST_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def run_forecasts_parallel(series_by_key, periods=6):
+    """
+    Forecast many monthly balance arrays at once, spreading the fits across
+    worker processes. Returns {key: (forecast, lower, upper)} in input order.
+    """
+    if len(series_by_key) <= 1 or MAX_FORECAST_WORKERS <= 1:
+        return {
+            key: forecast_monthly_series(balances, periods)
+            for key, balances in series_by_key.items()
+        }
+
+    pool = _get_pool()
+    futures = {
+        key: pool.submit(_forecast_in_worker, balances, periods)
+        for key, balances in series_by_key.items()
+    }
+
+    results = {}
+    for key, future in futures.items():
+        results[key], seconds = future.result()
+        if len(series_by_key[key]) >= 3:
+            observe_stage("run_sarimax_forecast", seconds)
+    return results
+
+
+def run_panel_smoothing_forecast(matrix, periods=3, alpha=0.5, beta=0.1):
+    """
+    Holt's linear exponential smoothing over every column of a
+    (months x series) matrix at once. Each column is an independent series
+    (e.g. monthly spend per category); the recursion runs once over time and
+    is vectorized across columns, so cost grows with months, not series.
+
+    Returns (forecast, lower, upper), each shaped (periods x series).
+    """
+    y = np.asarray(matrix, dtype=float)
+    if y.ndim != 2 or y.shape[0] == 0:
+        raise ValueError("matrix must be 2-D with at least one month")
+
+    level = y[0].copy()
+    trend = (y[1] - y[0]) if y.shape[0] > 1 else np.zeros(y.shape[1])
+    sq_err = np.zeros(y.shape[1])
+
+    for t in range(1, y.shape[0]):
+        predicted = level + trend
+        err = y[t] - predicted
+        sq_err += err * err
+
+        new_level = alpha * y[t] + (1 - alpha) * predicted
+        trend = beta * (new_level - level) + (1 - beta) * trend
+        level = new_level
+
+    steps = np.arange(1, periods + 1)[:, None]
+    forecast = level + steps * trend
+
+    # One-step residual spread, widened with the horizon
+    sigma = np.sqrt(sq_err / max(y.shape[0] - 1, 1))
+    spread = 1.96 * sigma * np.sqrt(steps)
+
+    return forecast, forecast - spread, forecast + spread
+
+
+def run_holt_forecast(balances, periods=6):
+    """
+    Holt's linear smoothing on a single series; same return as
+    run_sarimax_forecast. Much cheaper than SARIMAX on short histories.
+    """
+    forecast, lower, upper = run_panel_smoothing_forecast(
+        np.asarray(balances, dtype=float)[:, None], periods=periods
     )
+    return forecast[:, 0], lower[:, 0], upper[:, 0]
 
-    forecast_df = pd.DataFrame({
-        "date": forecast_dates,
-        "forecast": forecast_mean.values.astype(float),
-        "lower": conf_int.iloc[:, 0].values.astype(float),
-        "upper": conf_int.iloc[:, 1].values.astype(float),
-    })
 
-    return forecast_df
\ No newline at end of file
+# Engines with the (balances, periods) -> (forecast, lower, upper) contract,
+# by name. benchmarks/backtest_forecast.py evaluates every entry.
+FORECAST_ENGINES = {
+    "sarimax": run_sarimax_forecast,
+    "holt": run_holt_forecast,
+    "linear": fallback_forecast,
+}
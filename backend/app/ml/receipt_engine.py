@@ -1,8 +1,29 @@
+import asyncio
+import hashlib
+import io
+import multiprocessing
+import os
 import re
-from typing import Dict, List, Optional
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, NamedTuple, Optional
+import numpy as np
 from PIL import Image, ImageOps
 import pytesseract
 
+from ..metrics import observe_stage, span
+
+# Tesseract is CPU bound and holds the GIL-free C side for seconds, so OCR
+# passes run in worker processes instead of on the event loop.
+OCR_WORKERS = int(os.getenv("SMARTSPEND_OCR_WORKERS", os.cpu_count() or 1))
+
+_pool = None
+
+# OCR passes queued or running on the pool, to tell whether a worker is idle
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
 
 DATE_PATTERNS = [
     r"\b(\d{2}[\/\-]\d{2}[\/\-]\d{2,4})\b",     # 03/12/2025, 03-12-25
@@ -18,154 +39,424 @@ TOTAL_PATTERNS = [
 PRICE_LINE = re.compile(r"(.*?)(£?\s*\d+\.\d{2})\s*$")
 MONEY = re.compile(r"£?\s*(\d+\.\d{2})")
 
+# A "TOTAL 12.34" line; \b keeps SUBTOTAL from counting
+CONFIDENT_TOTAL = re.compile(TOTAL_PATTERNS[0], re.IGNORECASE)
+
+
+
+# Tesseract does best around 300 DPI; an 80mm till roll at 300 DPI is
+# ~950px wide, so anything much wider than this is just extra work.
+OCR_TARGET_WIDTH = 1200
+
+OCR_THRESHOLD = 140
+THRESHOLD_LUT = [255 if x > OCR_THRESHOLD else 0 for x in range(256)]
+
+
+def _otsu_threshold(gray: np.ndarray) -> int:
+    hist = np.bincount(gray.ravel(), minlength=256).astype(float)
+    levels = np.arange(256)
+
+    weight_bg = np.cumsum(hist)
+    weight_fg = weight_bg[-1] - weight_bg
+    mass_bg = np.cumsum(hist * levels)
+    mean_bg = mass_bg / np.maximum(weight_bg, 1)
+    mean_fg = (mass_bg[-1] - mass_bg) / np.maximum(weight_fg, 1)
+
+    between = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+    return int(np.argmax(between))
+
+
+def _receipt_bbox(img: Image.Image):
+    """
+    Bounding box of the bright paper in a photo, or None when the paper
+    already fills the frame (or can't be told apart from the background).
+    Worked out on a small thumbnail, then scaled back up.
+    """
+    scale = max(img.width // 256, 1)
+    gray = np.asarray(img.reduce(scale) if scale > 1 else img, dtype=np.uint8)
+
+    paper = gray > _otsu_threshold(gray)
+    col_frac = paper.mean(axis=0)
+    row_frac = paper.mean(axis=1)
+    if col_frac.max() == 0:
+        return None
+
+    cols = np.flatnonzero(col_frac > 0.5 * col_frac.max())
+    rows = np.flatnonzero(row_frac > 0.5 * row_frac.max())
+    left, right, top, bottom = cols[0], cols[-1] + 1, rows[0], rows[-1] + 1
+
+    area = (right - left) * (bottom - top) / paper.size
+    if area < 0.1 or area > 0.95:
+        return None
+
+    # a little slack so text at the paper edge survives
+    pad = int(0.02 * max(gray.shape))
+    left, top = max(left - pad, 0), max(top - pad, 0)
+    right, bottom = min(right + pad, gray.shape[1]), min(bottom + pad, gray.shape[0])
+
+    return (
+        int(left * scale), int(top * scale),
+        min(int(right * scale), img.width), min(int(bottom * scale), img.height),
+    )
+
+
+def normalize_for_ocr(img: Image.Image) -> Image.Image:
+    """
+    Shared first stage for both OCR passes: upright, greyscale, cropped to
+    the receipt, no wider than OCR_TARGET_WIDTH, contrast stretched.
+    """
+    # Let the JPEG decoder downscale by 1/2, 1/4 or 1/8 while decoding, as
+    # far as it can while staying at least OCR_TARGET_WIDTH wide (no-op for
+    # PNG or images that are already loaded)
+    if img.width > 2 * OCR_TARGET_WIDTH:
+        img.draft("L", (OCR_TARGET_WIDTH, int(img.height * OCR_TARGET_WIDTH / img.width)))
+
+    img = ImageOps.exif_transpose(img).convert("L")
+
+    bbox = _receipt_bbox(img)
+    if bbox:
+        img = img.crop(bbox)
+
+    if img.width > OCR_TARGET_WIDTH:
+        height = max(int(img.height * OCR_TARGET_WIDTH / img.width), 1)
+        img = img.resize((OCR_TARGET_WIDTH, height), Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+    return ImageOps.autocontrast(img)
 
 
 def _preprocess_basic(img: Image.Image) -> Image.Image:
-    img = img.convert("L")
-    img = ImageOps.autocontrast(img)
-    return img
+    return normalize_for_ocr(img)
 
 
 def _preprocess_threshold(img: Image.Image) -> Image.Image:
-    img = img.convert("L")
-    img = ImageOps.autocontrast(img)
-    threshold = 140
-    img = img.point(lambda x: 255 if x > threshold else 0)
-    return img
+    return normalize_for_ocr(img).point(THRESHOLD_LUT)
 
 
-def ocr_image_to_text(image: Image.Image) -> str:
-    img_basic = _preprocess_basic(image)
-    text_basic = pytesseract.image_to_string(img_basic)
+def image_fingerprint(image_bytes: bytes):
+    """
+    (content_hash, phash) for an encoded image.
+
+    content_hash is a SHA-256 of the decoded pixels, so the same picture
+    saved with different metadata or PNG settings still matches.
+    phash is a 256-bit difference hash (hex) that survives re-encoding and
+    resizing; compare with phash_distance.
+    """
+    image = ImageOps.exif_transpose(Image.open(io.BytesIO(image_bytes)))
+
+    rgb = image.convert("RGB")
+    digest = hashlib.sha256(f"{rgb.width}x{rgb.height}".encode())
+    digest.update(rgb.tobytes())
+
+    small = image.convert("L").resize((17, 16), Image.Resampling.LANCZOS)
+    px = np.asarray(small)
+    # one bit per horizontal neighbour pair, row-major, first pixel pair in
+    # the most significant bit
+    bits = np.packbits(px[:, :-1] > px[:, 1:])
+
+    return digest.hexdigest(), bits.tobytes().hex()
+
+
+def phash_distance(a: str, b: str) -> int:
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+def phash_is_informative(phash: str) -> bool:
+    """
+    Near-blank images hash to almost all 0s (or 1s) and would "match" each
+    other; only trust a perceptual hash with a reasonable mix of bits.
+    """
+    ones = bin(int(phash, 16)).count("1")
+    return 32 <= ones <= 224
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=OCR_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def ocr_pass(image_bytes: bytes, variant: str) -> str:
+    """
+    One Tesseract pass over an encoded image. Takes bytes rather than a PIL
+    image so it can be shipped to a worker process cheaply.
+    """
+    image = Image.open(io.BytesIO(image_bytes))
+    if variant == "basic":
+        img = _preprocess_basic(image)
+    elif variant == "threshold":
+        img = _preprocess_threshold(image)
+    else:
+        raise ValueError(f"Unknown OCR variant: {variant}")
+    return pytesseract.image_to_string(img)
+
+
+def _ocr_pass_timed(image_bytes: bytes, variant: str):
+    # runs in the pool; the parent records the time under ocr_<variant>
+    start = time.perf_counter()
+    text = ocr_pass(image_bytes, variant)
+    return text, time.perf_counter() - start
+
+
+def has_confident_total(text: str) -> bool:
+    return CONFIDENT_TOTAL.search(text) is not None
 
-    img_thresh = _preprocess_threshold(image)
-    text_thresh = pytesseract.image_to_string(img_thresh)
 
-    basic_prices = len(re.findall(r"\d+\.\d{2}", text_basic))
-    thresh_prices = len(re.findall(r"\d+\.\d{2}", text_thresh))
+def choose_ocr_text(text_basic: str, text_thresh: Optional[str]) -> str:
+    if text_thresh is None:
+        return text_basic
+
+    basic_prices = len(PRICE.findall(text_basic))
+    thresh_prices = len(PRICE.findall(text_thresh))
 
     return text_thresh if thresh_prices > basic_prices else text_basic
 
 
-def extract_merchant(lines: List[str]) -> Optional[str]:
-    for ln in lines:
-        clean = ln.strip()
-        if len(clean) >= 3 and not MONEY.search(clean):
-            return clean.title()
-    return None
+def ocr_image_to_text(image: Image.Image) -> str:
+    with span("ocr_basic"):
+        img_basic = _preprocess_basic(image)
+        text_basic = pytesseract.image_to_string(img_basic)
+
+    # Basic pass already found the total; the threshold pass won't beat it
+    if has_confident_total(text_basic):
+        return text_basic
+
+    with span("ocr_threshold"):
+        img_thresh = _preprocess_threshold(image)
+        text_thresh = pytesseract.image_to_string(img_thresh)
+
+    return choose_ocr_text(text_basic, text_thresh)
+
+
+def _pass_finished(_future):
+    global _in_flight
+    with _in_flight_lock:
+        _in_flight -= 1
+
+
+def _submit_pass(image_bytes: bytes, variant: str):
+    global _in_flight
+    with _in_flight_lock:
+        _in_flight += 1
+    future = _get_pool().submit(_ocr_pass_timed, image_bytes, variant)
+    future.add_done_callback(_pass_finished)
+    return future
+
+
+def _speculate_threshold(image_bytes: bytes):
+    """
+    Start the threshold pass alongside the basic one only when a worker
+    would otherwise sit idle. Under load it waits until the basic pass has
+    missed, so a confident basic pass costs the pool nothing extra.
+    """
+    with _in_flight_lock:
+        idle = _in_flight < OCR_WORKERS
+    return _submit_pass(image_bytes, "threshold") if idle else None
+
+
+def ocr_image_bytes(image_bytes: bytes) -> str:
+    """
+    Blocking counterpart of ocr_image_bytes_async for worker threads.
+    """
+    basic = _submit_pass(image_bytes, "basic")
+    thresh = _speculate_threshold(image_bytes)
+
+    text_basic, seconds = basic.result()
+    observe_stage("ocr_basic", seconds)
+    if has_confident_total(text_basic):
+        if thresh is not None:
+            thresh.cancel()
+        return text_basic
+
+    if thresh is None:
+        thresh = _submit_pass(image_bytes, "threshold")
+    text_thresh, seconds = thresh.result()
+    observe_stage("ocr_threshold", seconds)
+    return choose_ocr_text(text_basic, text_thresh)
+
+
+async def ocr_image_bytes_async(image_bytes: bytes) -> str:
+    """
+    Same result as ocr_image_to_text, without blocking the event loop. The
+    threshold pass runs only if the basic pass finds no confident TOTAL,
+    or speculatively alongside it when the pool has a spare worker.
+    """
+    basic = _submit_pass(image_bytes, "basic")
+    thresh = _speculate_threshold(image_bytes)
+
+    text_basic, seconds = await asyncio.wrap_future(basic)
+    observe_stage("ocr_basic", seconds)
+    if has_confident_total(text_basic):
+        if thresh is not None:
+            thresh.cancel()
+        return text_basic
+
+    if thresh is None:
+        thresh = _submit_pass(image_bytes, "threshold")
+    text_thresh, seconds = await asyncio.wrap_future(thresh)
+    observe_stage("ocr_threshold", seconds)
+    return choose_ocr_text(text_basic, text_thresh)
+
+
+# ===============================
+# TEXT PARSING
+# ===============================
+
+# Header / footer / payment lines that carry a price but aren't items
+SKIP_KEYWORDS = [
+    "SUBTOTAL",
+    "AMOUNT DUE",
+    "BALANCE DUE",
+    "CHANGE",
+    "CASH",
+    "CARD",
+    "VISA",
+    "MASTERCARD",
+    "CLUBCARD",
+    "POINTS",
+    "VAT",
+    "STORE",
+    "VISIT",
+    "DOWNLOAD",
+]
 
+SKIP_LINE = re.compile("|".join(re.escape(k) for k in SKIP_KEYWORDS))
+DATE_RES = [re.compile(p) for p in DATE_PATTERNS]
+PRICE = re.compile(r"\d+\.\d{2}")
+TOTAL_DECIMAL = re.compile(r"(\d+\.\d{2})")
+TOTAL_SPACED = re.compile(r"(\d+)\s+(\d{2})")  # OCR dropped the point: "28 34"
+QTY = re.compile(r"\b(\d+(?:\.\d+)?)\s*[xX]\s*(\d+\.\d{2})\b")
+
+LINE_TOTAL = "total"
+LINE_PAYMENT = "payment"
+LINE_ITEM = "item"
+LINE_DATE = "date"
+LINE_HEADER = "header"
+LINE_TEXT = "text"
 
-def extract_date(text: str) -> Optional[str]:
-    for pat in DATE_PATTERNS:
-        m = re.search(pat, text)
-        if m:
-            return m.group(1)
-    return None
 
+class ReceiptLine(NamedTuple):
+    kind: str                   # one of the LINE_* values
+    text: str                   # stripped line
+    value: object = None        # total -> float, item -> dict
+    date: Optional[tuple] = None  # (DATE_PATTERNS index, match) if a date is on the line
 
-def extract_total(text: str) -> Optional[float]:
-    lines = text.upper().splitlines()
 
-    for line in lines:
-        if "TOTAL" in line:
-            # Try normal decimal format first
-            match = re.search(r"(\d+\.\d{2})", line)
-            if match:
-                return float(match.group(1))
+def _line_total(upper: str) -> Optional[float]:
+    match = TOTAL_DECIMAL.search(upper)
+    if match:
+        return float(match.group(1))
 
-            # Try space-separated decimal like 28 34
-            match_space = re.search(r"(\d+)\s+(\d{2})", line)
-            if match_space:
-                whole = match_space.group(1)
-                decimal = match_space.group(2)
-                return float(f"{whole}.{decimal}")
+    match = TOTAL_SPACED.search(upper)
+    if match:
+        return float(f"{match.group(1)}.{match.group(2)}")
 
     return None
 
 
-def extract_items(lines: List[str]) -> List[Dict]:
-    items = []
+def _line_item(s: str) -> Optional[Dict]:
+    m = PRICE_LINE.match(s)
+    if not m:
+        return None
 
-    SKIP_KEYWORDS = [
-        "SUBTOTAL",
-        "AMOUNT DUE",
-        "BALANCE DUE",
-        "CHANGE",
-        "CASH",
-        "CARD",
-        "VISA",
-        "MASTERCARD",
-        "CLUBCARD",
-        "POINTS",
-        "VAT",
-        "STORE",
-        "VISIT",
-        "DOWNLOAD",
-    ]
-
-    for ln in lines:
-        s = ln.strip()
-        if not s:
-            continue
+    name_part = m.group(1).strip(" -:\t")
+    if len(name_part) < 2:
+        return None
 
-        up = s.upper()
+    line_total = float(MONEY.search(m.group(2)).group(1))
 
-        # Skip headers/footers/payment lines
-        if any(k in up for k in SKIP_KEYWORDS):
-            continue
+    qty = 1.0
+    unit_price = None
 
-        # Don't treat TOTAL as item
-        if "TOTAL" in up:
-            continue
+    qty_m = QTY.search(s)
+    if qty_m:
+        qty = float(qty_m.group(1))
+        unit_price = float(qty_m.group(2))
 
-        m = PRICE_LINE.match(s)
-        if not m:
+    return {
+        "name": name_part.title(),
+        "qty": qty,
+        "unit_price": unit_price,
+        "line_total": line_total
+    }
+
+
+def tokenize_receipt(raw: str) -> Iterator[ReceiptLine]:
+    """
+    Classify each non-empty OCR line once. "TOTAL" anywhere (including
+    SUBTOTAL) makes a total line; payment/footer keywords come next; then
+    anything ending in a price is an item.
+    """
+    for ln in raw.splitlines():
+        s = ln.strip()
+        if not s:
             continue
 
-        name_part = m.group(1).strip(" -:\t")
-        price_part = m.group(2)
+        date = None
+        for i, pattern in enumerate(DATE_RES):
+            m = pattern.search(s)
+            if m:
+                date = (i, m.group(1))
+                break
 
-        m2 = MONEY.search(price_part)
-        if not m2:
+        up = s.upper()
+        if "TOTAL" in up:
+            yield ReceiptLine(LINE_TOTAL, s, _line_total(up), date)
             continue
-
-        try:
-            line_total = float(m2.group(1))
-        except:
+        if SKIP_LINE.search(up):
+            yield ReceiptLine(LINE_PAYMENT, s, None, date)
             continue
 
-        qty = 1.0
-        unit_price = None
+        item = _line_item(s)
+        if item:
+            yield ReceiptLine(LINE_ITEM, s, item, date)
+        elif date:
+            yield ReceiptLine(LINE_DATE, s, None, date)
+        elif MONEY.search(s):
+            yield ReceiptLine(LINE_TEXT, s)
+        else:
+            yield ReceiptLine(LINE_HEADER, s)
 
-        qty_m = re.search(r"\b(\d+(?:\.\d+)?)\s*[xX]\s*(\d+\.\d{2})\b", s)
-        if qty_m:
-            qty = float(qty_m.group(1))
-            unit_price = float(qty_m.group(2))
 
-        if len(name_part) < 2:
-            continue
+def parse_receipt_text(raw: str) -> Dict:
+    merchant = None
+    total = None
+    items = []
+    # first match of each DATE_PATTERNS entry; earlier patterns win
+    dates = [None] * len(DATE_RES)
 
-        items.append({
-            "name": name_part.title(),
-            "qty": qty,
-            "unit_price": unit_price,
-            "line_total": line_total
-        })
+    for line in tokenize_receipt(raw):
+        # merchant is the first line of 3+ chars with no price, whatever its kind
+        if merchant is None and len(line.text) >= 3 and not MONEY.search(line.text):
+            merchant = line.text.title()
 
-    return items
+        if line.date and dates[line.date[0]] is None:
+            dates[line.date[0]] = line.date[1]
 
+        if line.kind == LINE_TOTAL:
+            if total is None:
+                total = line.value
+        elif line.kind == LINE_ITEM:
+            items.append(line.value)
 
-def extract_receipt(image: Image.Image) -> Dict:
-    raw = ocr_image_to_text(image)
-    lines = [l.strip() for l in raw.splitlines() if l.strip()]
+    receipt_date = next((d for d in dates if d is not None), None)
+
+    return {
+        "merchant": merchant,
+        "receipt_date": receipt_date,
+        "total": total,
+        **check_total(total, items),
+        "items": items,
+        "raw_text": raw
+    }
 
-    merchant = extract_merchant(lines)
-    receipt_date = extract_date(raw)
-    total = extract_total(raw)
-    items = extract_items(lines)
 
+def check_total(total: Optional[float], items: List[Dict]) -> Dict:
     # NEW: Calculate total from items
-    calculated_total = round(sum(item["line_total"] for item in items), 2) if items else 0.0
+    calculated_total = round(sum((item["line_total"] or 0) for item in items), 2) if items else 0.0
 
     difference = None
     verified = None
@@ -175,12 +466,19 @@ def extract_receipt(image: Image.Image) -> Dict:
         verified = abs(difference) < 0.01
 
     return {
-        "merchant": merchant,
-        "receipt_date": receipt_date,
-        "total": total,
         "calculated_total": calculated_total,
         "difference": difference,
         "verified": verified,
-        "items": items,
-        "raw_text": raw
-    }
\ No newline at end of file
+    }
+
+
+def extract_receipt(image: Image.Image) -> Dict:
+    return parse_receipt_text(ocr_image_to_text(image))
+
+
+def extract_receipt_bytes(image_bytes: bytes) -> Dict:
+    return parse_receipt_text(ocr_image_bytes(image_bytes))
+
+
+async def extract_receipt_async(image_bytes: bytes) -> Dict:
+    return parse_receipt_text(await ocr_image_bytes_async(image_bytes))
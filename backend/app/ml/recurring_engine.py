@@ -0,0 +1,102 @@
+import math
+from datetime import date, timedelta
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+from dateutil.relativedelta import relativedelta
+
+from .rule_engine import clean_description
+
+# charges within 10% of each other can be the same bill
+AMOUNT_TOLERANCE = 0.10
+
+# (name, period in days, tolerance in days, min charges to call it)
+CADENCES = [
+    ("weekly", 7.0, 1.5, 4),
+    ("fortnightly", 14.0, 2.0, 3),
+    ("monthly", 30.44, 4.0, 3),
+    ("quarterly", 91.31, 10.0, 3),
+    ("annual", 365.25, 15.0, 2),
+]
+CADENCE_PERIODS = {name: period for name, period, _, _ in CADENCES}
+
+# share of gaps that must sit on the cadence
+MIN_REGULARITY = 0.8
+
+_PERIODS = np.array([c[1] for c in CADENCES])
+_TOLERANCES = np.array([c[2] for c in CADENCES])
+_MIN_CHARGES = np.array([c[3] for c in CADENCES])
+
+
+def merchant_key(description: str) -> str:
+    """
+    'SPOTIFY P1F2C3' and 'SPOTIFY P9X8Y7' -> 'SPOTIFY': digits, punctuation
+    and the single letters left of payment references are dropped.
+    """
+    return " ".join(word for word in clean_description(description).split() if len(word) > 1)
+
+
+def amount_bucket(amount: float) -> int:
+    """
+    Log-scale bucket of |amount|, each AMOUNT_TOLERANCE wide. Equal buckets
+    mean similar amounts; neighbouring buckets need an explicit check.
+    """
+    value = max(abs(amount), 0.01)
+    return math.floor(math.log(value) / math.log1p(AMOUNT_TOLERANCE))
+
+
+def amounts_close(a: float, b: float) -> bool:
+    return abs(abs(a) - abs(b)) <= AMOUNT_TOLERANCE * max(abs(a), abs(b))
+
+
+def detect_cadence(days: Sequence[int]) -> Optional[Tuple[str, float]]:
+    """
+    days: charge dates as ordinals. Returns (cadence, regularity) or None.
+
+    Every gap is tested against every cadence at once. A gap of about twice
+    the period (one missed charge) still counts. When two cadences fit
+    equally well, the one whose gaps are mostly single periods wins.
+    """
+    unique = np.unique(np.asarray(days, dtype=np.int64))
+    if unique.size < 2:
+        return None
+    gaps = np.diff(unique).astype(float)
+
+    # (cadences x gaps): how many periods each gap spans, and whether it fits
+    periods_spanned = np.maximum(np.rint(gaps[None, :] / _PERIODS[:, None]), 1)
+    on_cadence = (
+        (periods_spanned <= 2)
+        & (np.abs(gaps[None, :] - periods_spanned * _PERIODS[:, None]) <= _TOLERANCES[:, None])
+    )
+    regularity = on_cadence.mean(axis=1)
+    exact = (on_cadence & (periods_spanned == 1)).mean(axis=1)
+
+    eligible = (regularity >= MIN_REGULARITY) & (unique.size >= _MIN_CHARGES)
+    if not eligible.any():
+        return None
+
+    candidates = np.flatnonzero(eligible)
+    best = max(candidates, key=lambda i: (regularity[i], exact[i]))
+    return CADENCES[best][0], float(regularity[best])
+
+
+def next_charge_date(last: date, cadence: str, anchor_day: int) -> date:
+    """
+    Monthly-type cadences land on anchor_day (the usual day of the month),
+    clamped to the month's length; weekly ones step from the last charge.
+    """
+    if cadence == "weekly":
+        return last + timedelta(days=7)
+    if cadence == "fortnightly":
+        return last + timedelta(days=14)
+
+    # the last charge may have come a few days early or late (weekends),
+    # so take whichever anchored date is about one period after it
+    months = {"monthly": 1, "quarterly": 3, "annual": 12}[cadence]
+    period = CADENCE_PERIODS[cadence]
+    candidates = [last + relativedelta(months=step, day=anchor_day) for step in (months - 1, months, months + 1)]
+    return min(candidates, key=lambda d: abs((d - last).days - period))
+
+
+def monthly_cost(amount: float, cadence: str) -> float:
+    return round(abs(amount) * CADENCE_PERIODS["monthly"] / CADENCE_PERIODS[cadence], 2)
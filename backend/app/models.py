@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, UniqueConstraint
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, UniqueConstraint, Index, JSON
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 from .database import Base
 
@@ -27,6 +27,9 @@ class Account(Base):
     current_balance = Column(Float, default=0.0)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # bumped whenever the account's transactions change; drives ETags
+    data_version = Column(Integer, nullable=False, default=0, server_default="0")
+
     user = relationship("User", back_populates="accounts")
     transactions = relationship("Transaction", back_populates="account", cascade="all, delete-orphan")
 
@@ -52,6 +55,9 @@ class Transaction(Base):
 
     __table_args__ = (
         UniqueConstraint("account_id", "date", "description", "amount", name="uq_tx_dedupe"),
+        # receipt matching looks transactions up by amount range; the
+        # dedupe constraint already covers (account_id, date)
+        Index("ix_tx_account_amount", "account_id", "amount"),
     )
     
 class Receipt(Base):
@@ -60,17 +66,31 @@ class Receipt(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     account_id = Column(Integer, ForeignKey("accounts.id"), nullable=True)
+    # bank transaction this receipt paid for, see services/receipt_matcher
+    transaction_id = Column(Integer, ForeignKey("transactions.id"), nullable=True, index=True)
 
     merchant = Column(String, nullable=True)
     receipt_date = Column(String, nullable=True)
     total = Column(Float, nullable=True)
 
-    raw_text = Column(String, nullable=True)
+    # OCR text can be large; only loaded when accessed
+    raw_text = deferred(Column(String, nullable=True))
     image_filename = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # Dedupe keys, see receipt_engine.image_fingerprint
+    content_hash = Column(String, nullable=True, index=True)
+    phash = Column(String, nullable=True)
+
     items = relationship("ReceiptItem", back_populates="receipt", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # newest-first listing; id rides along as the rowid
+        Index("ix_receipts_user_created", "user_id", "created_at"),
+        # perceptual duplicate check only compares receipts with the same total
+        Index("ix_receipts_user_total", "user_id", "total"),
+    )
+
 
 class ReceiptItem(Base):
     __tablename__ = "receipt_items"
@@ -84,3 +104,101 @@ class ReceiptItem(Base):
     line_total = Column(Float, nullable=True)
 
     receipt = relationship("Receipt", back_populates="items")
+
+
+class ReceiptJob(Base):
+    __tablename__ = "receipt_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    status = Column(String, nullable=False, default="queued", index=True)  # queued/processing/done/failed
+    image_path = Column(String, nullable=False)
+    image_filename = Column(String, nullable=True)
+
+    receipt_id = Column(Integer, ForeignKey("receipts.id"), nullable=True)
+    error = Column(String, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    # the worker process holding a "processing" job, and until when; a
+    # lease its owner stopped renewing means the job can be re-queued
+    worker_id = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+
+    receipt = relationship("Receipt")
+
+
+class OcrCache(Base):
+    __tablename__ = "ocr_cache"
+
+    content_hash = Column(String, primary_key=True)
+    raw_text = Column(String, nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class IncomeTotal(Base):
+    """
+    Running "Income" total per user and tax year, kept up to date on
+    import so tax projections never sum the transactions table.
+    """
+    __tablename__ = "income_totals"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    tax_year = Column(String, primary_key=True)  # "2025/26"
+
+    total = Column(Float, nullable=False, default=0.0)
+    transactions = Column(Integer, nullable=False, default=0)
+    last_income_date = Column(Date, nullable=True)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class RecurringPayment(Base):
+    """
+    One merchant + amount group of an account's debits, and the cadence
+    found in it (if any). See services/recurring_payments.
+    """
+    __tablename__ = "recurring_payments"
+
+    id = Column(Integer, primary_key=True, index=True)
+    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
+
+    merchant_key = Column(String, nullable=False)  # recurring_engine.merchant_key
+    amount_bucket = Column(Integer, nullable=False)  # recurring_engine.amount_bucket
+    description = Column(String, nullable=False)  # latest raw description
+    category = Column(String, nullable=True)
+
+    typical_amount = Column(Float, nullable=False)
+    last_amount = Column(Float, nullable=False)
+    occurrences = Column(Integer, nullable=False, default=0)
+    first_date = Column(Date, nullable=False)
+    last_date = Column(Date, nullable=False)
+
+    # newest charges only, as date ordinals / amounts; enough to re-detect
+    recent_dates = Column(JSON, nullable=False, default=list)
+    recent_amounts = Column(JSON, nullable=False, default=list)
+
+    cadence = Column(String, nullable=True)  # weekly/fortnightly/monthly/quarterly/annual
+    regularity = Column(Float, nullable=True)
+    next_date = Column(Date, nullable=True)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("account_id", "merchant_key", "amount_bucket", name="uq_recurring_group"),
+    )
+
+
+class RecurringScan(Base):
+    """How far recurring detection has read each account's transactions."""
+    __tablename__ = "recurring_scans"
+
+    account_id = Column(Integer, ForeignKey("accounts.id"), primary_key=True)
+    last_transaction_id = Column(Integer, nullable=False, default=0)
+    scanned_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,239 @@
+"""
+Opt-in profiling of a single request, for admins chasing one slow call.
+
+Send "X-Profile: 1" (or add ?profile=1) with an admin's bearer token and
+that request runs under a stack sampler with its SQL timed. The response
+carries X-Profile-Id; fetch the result from GET /admin/profiles/{id}:
+
+    <id>.folded   collapsed stacks, one "frame;frame;frame count" per line
+                  (flamegraph.pl, speedscope, inferno all read it)
+    <id>.json     duration, sample count, SQL count/time, slowest statements
+
+Requests without the flag only pay for a header scan.
+"""
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime
+from urllib.parse import parse_qs
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event
+
+from .database import engine
+from .security import decode_token, is_admin_email
+
+PROFILE_DIR = os.getenv("SMARTSPEND_PROFILE_DIR", "profiles")
+SAMPLE_INTERVAL = 0.001  # seconds
+TOP_STATEMENTS = 20
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# leaf frames of threads parked with nothing to do (job workers, pools)
+IDLE_LEAVES = {("threading.py", "wait"), ("selectors.py", "select"), ("queue.py", "get")}
+
+_current = contextvars.ContextVar("smartspend_profile", default=None)
+
+
+# ===============================
+# SAMPLER
+# ===============================
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler(threading.Thread):
+    """
+    Samples every thread's stack at a fixed interval. Only busy stacks that
+    pass through app code are kept, which drops idle pool threads and the
+    event loop waiting on sockets. Other requests running at the same time
+    show up too. Work done in the OCR / forecast process pools is not
+    visible from here.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        super().__init__(name="smartspend-profiler", daemon=True)
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._done = threading.Event()
+
+    def run(self):
+        me = threading.get_ident()
+        while not self._done.wait(self.interval):
+            self.samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == me:
+                    continue
+                leaf = (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name)
+                if leaf in IDLE_LEAVES:
+                    continue
+                stack = []
+                in_app = False
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    in_app = in_app or frame.f_code.co_filename.startswith(APP_DIR)
+                    frame = frame.f_back
+                if in_app:
+                    self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+# ===============================
+# SQL TIMING
+# ===============================
+
+class RequestProfile:
+    def __init__(self, method: str, path: str, email: str):
+        self.id = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        self.method = method
+        self.path = path
+        self.email = email
+        self.sampler = StackSampler()
+        self.sql = defaultdict(lambda: [0, 0.0])  # statement -> [count, seconds]
+
+    def record_sql(self, statement: str, seconds: float):
+        entry = self.sql[" ".join(statement.split())]
+        entry[0] += 1
+        entry[1] += seconds
+
+    def summary(self, status: int, seconds: float) -> dict:
+        slowest = sorted(self.sql.items(), key=lambda kv: kv[1][1], reverse=True)
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "user": self.email,
+            "status": status,
+            "duration_ms": round(seconds * 1000, 2),
+            "samples": self.sampler.samples,
+            "sample_interval_ms": SAMPLE_INTERVAL * 1000,
+            "sql_count": sum(c for c, _ in self.sql.values()),
+            "sql_ms": round(sum(s for _, s in self.sql.values()) * 1000, 2),
+            "statements": [
+                {"sql": sql, "count": count, "ms": round(s * 1000, 2)}
+                for sql, (count, s) in slowest[:TOP_STATEMENTS]
+            ],
+        }
+
+    def save(self, status: int, seconds: float):
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        with open(os.path.join(PROFILE_DIR, f"{self.id}.folded"), "w") as f:
+            f.write(self.sampler.folded())
+        with open(os.path.join(PROFILE_DIR, f"{self.id}.json"), "w") as f:
+            json.dump(self.summary(status, seconds), f, indent=2)
+
+
+# SQL listeners are only attached while at least one profile is running;
+# the context variable attributes each statement to the right request.
+_listeners_lock = threading.Lock()
+_active_profiles = 0
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("profile_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current.get()
+    if profile is not None and conn.info.get("profile_start"):
+        profile.record_sql(statement, time.perf_counter() - conn.info["profile_start"].pop())
+
+
+def _attach_sql_listeners():
+    global _active_profiles
+    with _listeners_lock:
+        if _active_profiles == 0:
+            event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        _active_profiles += 1
+
+
+def _detach_sql_listeners():
+    global _active_profiles
+    with _listeners_lock:
+        _active_profiles -= 1
+        if _active_profiles == 0:
+            event.remove(engine, "before_cursor_execute", _before_cursor_execute)
+            event.remove(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# ===============================
+# MIDDLEWARE
+# ===============================
+
+def _profile_requested(scope) -> bool:
+    for name, value in scope["headers"]:
+        if name == b"x-profile" and value not in (b"", b"0"):
+            return True
+    query = scope.get("query_string", b"")
+    return b"profile=" in query and parse_qs(query.decode()).get("profile", ["0"])[0] not in ("", "0")
+
+
+def _admin_email(scope):
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode().partition(" ")
+            if scheme.lower() == "bearer":
+                email = decode_token(token)
+                return email if is_admin_email(email) else None
+    return None
+
+
+class ProfilingMiddleware:
+    """
+    Pure ASGI so unprofiled requests skip straight through. Non-admins
+    asking for a profile get a normal, unprofiled response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _profile_requested(scope):
+            return await self.app(scope, receive, send)
+
+        email = _admin_email(scope)
+        if email is None:
+            return await self.app(scope, receive, send)
+
+        profile = RequestProfile(scope["method"], scope["path"], email)
+        status = 500
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"x-profile-id", profile.id.encode()),
+                ]
+            await send(message)
+
+        token = _current.set(profile)
+        _attach_sql_listeners()
+        profile.sampler.start()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            seconds = time.perf_counter() - start
+            profile.sampler.stop()
+            _detach_sql_listeners()
+            _current.reset(token)
+            # folding the stacks and writing two files is blocking work
+            await run_in_threadpool(profile.save, status, seconds)
@@ -0,0 +1,28 @@
+"""
+Fast JSON for large read-only lists.
+
+By default FastAPI checks every item against the response_model, encodes
+it and then calls json.dumps. For an account with 100k transactions that
+is most of the request. Endpoints that already have plain rows return
+orjson_response(...) instead, and FastAPI sends that response as it is.
+The response_model stays on the route, but only for the OpenAPI schema.
+"""
+from typing import Optional, Sequence
+
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+
+
+def rows_as_dicts(columns: Sequence[str], rows) -> list:
+    """Query result tuples -> [{column: value}], in the given column order."""
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def orjson_response(content, response: Optional[Response] = None) -> ORJSONResponse:
+    """
+    Serialize content with orjson (dates as ISO strings, None as null).
+    Headers already set on the endpoint's injected Response, e.g. the
+    ETag, are carried over.
+    """
+    headers = dict(response.headers) if response is not None else None
+    return ORJSONResponse(content, headers=headers)
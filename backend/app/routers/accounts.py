@@ -6,11 +6,13 @@ from typing import List
 from ..database import get_db
 from .. import models, schemas
 from ..security import decode_token
+from ..metrics import timed
 
 router = APIRouter(prefix="/accounts", tags=["Accounts"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 
+@timed("get_current_user")
 def get_current_user(db: Session, token: str):
     email = decode_token(token)
     if not email:
@@ -0,0 +1,72 @@
+import os
+import re
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from .. import models
+from ..security import decode_token, is_admin_email
+from ..metrics import timed
+from ..profiling import PROFILE_DIR
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
+
+PROFILE_FILE = re.compile(r"^[\w-]+\.(folded|json)$")
+
+
+@timed("get_current_user")
+def get_current_user(db: Session, token: str):
+    email = decode_token(token)
+    if not email:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+
+    user = db.query(models.User).filter(models.User.email == email).first()
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+
+    return user
+
+
+def get_admin_user(db: Session, token: str):
+    user = get_current_user(db, token)
+    if not is_admin_email(user.email):
+        raise HTTPException(status_code=403, detail="Admins only")
+    return user
+
+
+@router.get("/profiles")
+def list_profiles(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+):
+    get_admin_user(db, token)
+
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    return sorted(
+        (name[:-5] for name in os.listdir(PROFILE_DIR) if name.endswith(".json")),
+        reverse=True,
+    )
+
+
+@router.get("/profiles/{filename}")
+def get_profile(
+    filename: str,
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+):
+    """
+    <id>.folded for a flamegraph, <id>.json for timings and SQL.
+    """
+    get_admin_user(db, token)
+
+    path = os.path.join(PROFILE_DIR, filename)
+    if not PROFILE_FILE.match(filename) or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    media_type = "application/json" if filename.endswith(".json") else "text/plain"
+    return FileResponse(path, media_type=media_type)
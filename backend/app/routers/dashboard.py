@@ -0,0 +1,134 @@
+from collections import defaultdict
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from .. import models, schemas
+from ..security import decode_token
+from ..metrics import timed
+from ..services.etags import account_etag, not_modified
+from ..responses import orjson_response
+
+router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
+
+
+@timed("get_current_user")
+def get_current_user(db: Session, token: str):
+    email = decode_token(token)
+    if not email:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+
+    user = db.query(models.User).filter(models.User.email == email).first()
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+
+    return user
+
+
+def account_aggregates(account: models.Account, rows):
+    """
+    summary, by-category and balance-history for one account from a single
+    pass over its (date, amount, category, balance_after) rows, oldest
+    first. Same output as the three /transactions/ endpoints, with category
+    totals rounded to the penny.
+    """
+    total_income = 0.0
+    total_expenses = 0.0
+    spend = defaultdict(float)
+    daily_balances = {}
+
+    for day, amount, category, balance_after in rows:
+        if amount > 0:
+            total_income += amount
+        elif amount < 0:
+            total_expenses += amount
+            spend[category] += amount
+        # overwrite per day so we keep the LAST transaction of that day
+        daily_balances[str(day)] = float(balance_after)
+
+    summary = {
+        "account_id": account.id,
+        "account_name": account.name,
+        "opening_balance": float(account.opening_balance),
+        "current_balance": float(account.current_balance),
+        "total_income": float(round(total_income, 2)),
+        "total_expenses": float(round(abs(total_expenses), 2)),
+        "transaction_count": len(rows),
+        "date_from": str(rows[0][0]) if rows else None,
+        "date_to": str(rows[-1][0]) if rows else None,
+    }
+
+    # GROUP BY order: NULL first, then by name
+    by_category = [
+        {"category": category or "Uncategorised", "total": float(round(abs(total), 2))}
+        for category, total in sorted(spend.items(), key=lambda kv: (kv[0] is not None, kv[0] or ""))
+    ]
+
+    balance_history = [
+        {"date": day, "balance": balance}
+        for day, balance in sorted(daily_balances.items())
+    ]
+
+    return summary, by_category, balance_history
+
+
+@router.get("/")
+def get_dashboard(
+    account_id: int,
+    request: Request,
+    response: Response,
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+):
+    """
+    Everything the dashboard shows in one request:
+
+    {
+      "accounts": [...same as GET /accounts/...],
+      "summary": {...same as /transactions/summary...},
+      "by_category": [...same as /transactions/by-category...],
+      "balance_history": [...same as /transactions/balance-history...]
+    }
+    """
+    user = get_current_user(db, token)
+
+    accounts = (
+        db.query(models.Account)
+        .filter(models.Account.user_id == user.id)
+        .order_by(models.Account.id)
+        .all()
+    )
+    account = next((a for a in accounts if a.id == account_id), None)
+    if account is None:
+        raise HTTPException(status_code=404, detail="Account not found")
+
+    # the account list shows every balance, so any account changing counts
+    versions = ".".join(f"{a.id}:{a.data_version or 0}" for a in accounts)
+    cached = not_modified(request, response, account_etag(account, "dashboard", versions))
+    if cached:
+        return cached
+
+    # one scan of the account's rows, plain tuples rather than ORM objects
+    rows = (
+        db.query(
+            models.Transaction.date,
+            models.Transaction.amount,
+            models.Transaction.category,
+            models.Transaction.balance_after,
+        )
+        .filter(models.Transaction.account_id == account.id)
+        .order_by(models.Transaction.date.asc(), models.Transaction.id.asc())
+        .all()
+    )
+
+    summary, by_category, balance_history = account_aggregates(account, rows)
+
+    return orjson_response({
+        "accounts": [schemas.AccountOut.model_validate(a).model_dump(mode="json") for a in accounts],
+        "summary": summary,
+        "by_category": by_category,
+        "balance_history": balance_history,
+    }, response)
@@ -1,18 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from fastapi.security import OAuth2PasswordBearer
 
 from ..database import get_db
 from .. import models
 from ..security import decode_token
-from ..ml.forecast_engine import prepare_monthly_series, run_sarimax_forecast
+from ..metrics import timed
+from ..services.etags import account_etag, not_modified
+from ..services.monthly_balances import load_monthly_closing_balances, month_index, month_label
+from ..ml.forecast_engine import (
+    forecast_monthly_series,
+    run_forecasts_parallel,
+    run_panel_smoothing_forecast,
+)
 
-import pandas as pd
+import numpy as np
+from sqlalchemy import func
 
 router = APIRouter(prefix="/forecast", tags=["Forecast"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 
+@timed("get_current_user")
 def get_current_user(db: Session, token: str):
     email = decode_token(token)
     if not email:
@@ -36,9 +45,18 @@ def get_account_owned(db: Session, user_id: int, account_id: int) -> models.Acco
     return account
 
 
+def add_months(month: str, n: int) -> str:
+    """ "2025-11", 3 -> "2026-02" """
+    year, mon = map(int, month.split("-"))
+    index = year * 12 + (mon - 1) + n
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
 @router.get("/balance")
 def get_balance_forecast(
     account_id: int,
+    request: Request,
+    response: Response,
     horizon_months: int = 6,
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db),
@@ -63,78 +81,210 @@ def get_balance_forecast(
 
     user = get_current_user(db, token)
     # enforce user owns the account
+    account = get_account_owned(db, user.id, account_id)
+
+    # nothing imported since the client's copy: skip the model fit entirely
+    cached = not_modified(request, response, account_etag(account, "forecast", horizon_months))
+    if cached:
+        return cached
+
+    monthly = load_monthly_closing_balances(db, models.Transaction.account_id == account_id)
+
+    if account_id not in monthly:
+        raise HTTPException(status_code=400, detail="No transactions found for this account")
+
+    months, balances = monthly[account_id]
+
+    # SARIMAX forecast, or a straight-line fallback when < 3 months
+    forecast = forecast_monthly_series(balances, periods=horizon_months)
+
+    return build_forecast_payload(months, balances, forecast, horizon_months)
+
+
+@router.get("/balance/batch")
+def get_balance_forecast_batch(
+    horizon_months: int = 6,
+    include_net_worth: bool = False,
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+):
+    """
+    Forecast every account the user owns in one request.
+
+    {
+      "horizon_months": 6,
+      "accounts": {"1": {...same shape as /forecast/balance...}, ...},
+      "skipped_accounts": [3],            # accounts with no transactions
+      "net_worth": {...} | null           # only when include_net_worth=true
+    }
+    """
+    if horizon_months not in [3, 6, 12]:
+        raise HTTPException(status_code=400, detail="horizon_months must be 3, 6, or 12")
+
+    user = get_current_user(db, token)
+    accounts = db.query(models.Account).filter(models.Account.user_id == user.id).all()
+
+    # One query for every account's month-end balances; ownership is enforced by the join
+    monthly = load_monthly_closing_balances(db, models.Account.user_id == user.id)
+
+    series_to_fit = {account_id: balances for account_id, (_, balances) in monthly.items()}
+    if include_net_worth and monthly:
+        opening = {a.id: float(a.opening_balance or 0) for a in accounts}
+        net_months, net_balances = combine_net_worth(monthly, opening)
+        series_to_fit["net_worth"] = net_balances
+
+    forecasts = run_forecasts_parallel(series_to_fit, periods=horizon_months)
+
+    net_worth = None
+    if "net_worth" in forecasts:
+        net_worth = build_forecast_payload(
+            net_months, net_balances, forecasts.pop("net_worth"), horizon_months
+        )
+
+    return {
+        "horizon_months": int(horizon_months),
+        "accounts": {
+            str(account_id): build_forecast_payload(
+                *monthly[account_id], forecast, horizon_months
+            )
+            for account_id, forecast in forecasts.items()
+        },
+        "skipped_accounts": [a.id for a in accounts if a.id not in monthly],
+        "net_worth": net_worth,
+    }
+
+
+@router.get("/categories")
+def get_category_spend_forecast(
+    account_id: int,
+    horizon_months: int = 3,
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+):
+    """
+    Forecast monthly spend for every category of an account at once.
+
+    {
+      "horizon_months": 3,
+      "months": ["2025-10", "2025-11", ...],
+      "categories": [
+          {
+            "category": "Groceries",
+            "history": [210.5, 198.2, ...],
+            "forecast": [{"date":"2026-01","forecast":205.1,"lower":150.0,"upper":260.2}, ...]
+          },
+          ...
+      ]
+    }
+    """
+    if horizon_months not in [3, 6, 12]:
+        raise HTTPException(status_code=400, detail="horizon_months must be 3, 6, or 12")
+
+    user = get_current_user(db, token)
     _ = get_account_owned(db, user.id, account_id)
 
-    # Pull tx balances for this account
-    transactions = (
-        db.query(models.Transaction.date, models.Transaction.balance_after.label("balance"))
+    # month x category spend, aggregated in the database
+    month = month_index(models.Transaction.date)
+    rows = (
+        db.query(
+            month.label("month"),
+            models.Transaction.category,
+            func.sum(-models.Transaction.amount).label("spent"),
+        )
         .filter(models.Transaction.account_id == account_id)
-        .order_by(models.Transaction.date.asc(), models.Transaction.id.asc())
+        .filter(models.Transaction.amount < 0)  # only expenses
+        .group_by(month, models.Transaction.category)
         .all()
     )
 
-    if not transactions:
-        raise HTTPException(status_code=400, detail="No transactions found for this account")
+    if not rows:
+        raise HTTPException(status_code=400, detail="No expenses found for this account")
 
-    data = [{"date": t.date, "balance": float(t.balance)} for t in transactions]
+    categories = sorted({r.category or "Uncategorised" for r in rows})
+    first = int(min(r.month for r in rows))
+    last = int(max(r.month for r in rows))
+    months = [month_label(m) for m in range(first, last + 1)]
 
-    monthly_series = prepare_monthly_series(data)
+    # Months with no spend in a category stay at zero
+    matrix = np.zeros((len(months), len(categories)))
+    col = {c: i for i, c in enumerate(categories)}
+    for r in rows:
+        matrix[int(r.month) - first, col[r.category or "Uncategorised"]] += float(r.spent)
 
-    # Normalize structure
-    if "date" not in monthly_series.columns:
-        monthly_series = monthly_series.reset_index()
-        if "index" in monthly_series.columns and "date" not in monthly_series.columns:
-            monthly_series = monthly_series.rename(columns={"index": "date"})
+    forecast, lower, upper = run_panel_smoothing_forecast(matrix, periods=horizon_months)
 
-    monthly_series["date"] = pd.to_datetime(monthly_series["date"])
-    monthly_series["balance"] = monthly_series["balance"].astype(float)
-    monthly_series = monthly_series.sort_values("date").reset_index(drop=True)
+    # Spend can't go negative
+    forecast = np.clip(forecast, 0, None)
+    lower = np.clip(lower, 0, None)
+    upper = np.clip(upper, 0, None)
 
-    # If < 3 months, fallback forecast (still gives chart)
-    if len(monthly_series) < 3:
-        forecast_df = fallback_forecast(monthly_series, periods=horizon_months)
-    else:
-        # SARIMAX forecast (auto seasonal/non-seasonal inside engine)
-        forecast_df = run_sarimax_forecast(monthly_series, periods=horizon_months)
+    future = [month_label(last + k + 1) for k in range(horizon_months)]
 
-        if "date" not in forecast_df.columns:
-            forecast_df = forecast_df.reset_index()
-            if "index" in forecast_df.columns and "date" not in forecast_df.columns:
-                forecast_df = forecast_df.rename(columns={"index": "date"})
+    return {
+        "horizon_months": int(horizon_months),
+        "months": months,
+        "categories": [
+            {
+                "category": category,
+                "history": [round(float(v), 2) for v in matrix[:, j]],
+                "forecast": [
+                    {
+                        "date": future[k],
+                        "forecast": round(float(forecast[k, j]), 2),
+                        "lower": round(float(lower[k, j]), 2),
+                        "upper": round(float(upper[k, j]), 2),
+                    }
+                    for k in range(horizon_months)
+                ],
+            }
+            for j, category in enumerate(categories)
+        ],
+    }
 
-        forecast_df["date"] = pd.to_datetime(forecast_df["date"])
-        for col in ["forecast", "lower", "upper"]:
-            if col not in forecast_df.columns:
-                raise HTTPException(status_code=500, detail=f"Forecast engine missing column: {col}")
 
-        forecast_df["forecast"] = forecast_df["forecast"].astype(float)
-        forecast_df["lower"] = forecast_df["lower"].astype(float)
-        forecast_df["upper"] = forecast_df["upper"].astype(float)
-        forecast_df = forecast_df.sort_values("date").reset_index(drop=True)
+def combine_net_worth(monthly, opening_balances):
+    """
+    Sum monthly closing balances across accounts. Months where an account has
+    no activity carry its previous close forward (or its opening balance if
+    it has no history yet). Accounts in opening_balances with no
+    transactions at all count at their opening balance throughout.
+    """
+    all_months = sorted({m for months, _ in monthly.values() for m in months})
+    grid = np.array(all_months)
+    total = np.full(len(all_months), sum(
+        balance for account_id, balance in opening_balances.items() if account_id not in monthly
+    ), dtype=float)
 
-    # Build points: actual history first, then forecast
-    points = []
+    for account_id, (months, balances) in monthly.items():
+        # index of the latest close at or before each grid month
+        idx = np.searchsorted(np.array(months), grid, side="right") - 1
+        carried = balances[np.maximum(idx, 0)]
+        total += np.where(idx >= 0, carried, opening_balances.get(account_id, 0.0))
+
+    return all_months, total
 
-    for row in monthly_series.itertuples(index=False):
-        points.append(
-            {
-                "date": pd.to_datetime(row.date).strftime("%Y-%m"),
-                "actual": float(row.balance),
-            }
-        )
 
-    for row in forecast_df.itertuples(index=False):
+def build_forecast_payload(months, balances, forecast, horizon_months):
+    forecast_mean, lower, upper = forecast
+
+    # Build points: actual history first, then forecast
+    points = [
+        {"date": month, "actual": float(balance)}
+        for month, balance in zip(months, balances)
+    ]
+
+    for k in range(len(forecast_mean)):
         points.append(
             {
-                "date": pd.to_datetime(row.date).strftime("%Y-%m"),
-                "forecast": float(row.forecast),
-                "lower": float(row.lower),
-                "upper": float(row.upper),
+                "date": add_months(months[-1], k + 1),
+                "forecast": float(forecast_mean[k]),
+                "lower": float(lower[k]),
+                "upper": float(upper[k]),
             }
         )
 
-    last_actual = float(monthly_series.iloc[-1]["balance"])
-    predicted_balance = float(forecast_df.iloc[-1]["forecast"])
+    last_actual = float(balances[-1])
+    predicted_balance = float(forecast_mean[-1])
     expected_growth = predicted_balance - last_actual
 
     return {
@@ -149,13 +299,17 @@ def get_balance_forecast(
 @router.get("/")
 def get_forecast_legacy(
     account_id: int,
+    request: Request,
+    response: Response,
     period: int = 6,
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db),
 ):
     return get_balance_forecast(
         account_id=account_id,
+        request=request,
+        response=response,
         horizon_months=period,
         token=token,
         db=db,
-    )
\ No newline at end of file
+    )
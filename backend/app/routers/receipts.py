@@ -1,18 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+import asyncio
+import base64
+import io
+import os
+import zipfile
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session, load_only, selectinload, undefer
 from PIL import Image
 
 from ..database import get_db
-from .. import models
-from ..models import Receipt, ReceiptItem
-from ..security import decode_token
-from ..ml.receipt_engine import extract_receipt
+from .. import models, schemas
+from ..models import Receipt, ReceiptJob
+from ..security import decode_token, is_admin_email
+from ..metrics import timed
+from ..ml.receipt_engine import image_fingerprint, parse_receipt_text, OCR_WORKERS
+from ..services.receipt_store import (
+    save_receipt, save_receipts, replace_receipt_items, receipt_to_extraction,
+)
+from ..services.receipt_cache import find_duplicate_receipt, get_cached_ocr_text, ocr_text_cached_async
+from ..services.receipt_jobs import enqueue_receipt_job, job_stats
+from ..services.receipt_matcher import match_receipt, match_unlinked_receipts
 
 router = APIRouter(prefix="/receipts", tags=["Receipts"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg"}
+MAX_BATCH_RECEIPTS = 200
+MAX_RECEIPT_BYTES = 20 * 1024 * 1024
+MAX_PAGE_SIZE = 200
+
 
+@timed("get_current_user")
 def get_current_user(db: Session, token: str):
     email = decode_token(token)
     if not email:
@@ -23,46 +46,378 @@ def get_current_user(db: Session, token: str):
     return user
 
 
+def _session_runner(db: Session):
+    """
+    in_db(fn, *args) -> fn(db, *args), run in the threadpool so the async
+    upload handlers never block the event loop on SQLite. Calls go one at a
+    time: batch tasks share the request's Session, which isn't thread-safe.
+    """
+    lock = asyncio.Lock()
+
+    async def in_db(fn, *args):
+        async with lock:
+            return await run_in_threadpool(fn, db, *args)
+
+    return in_db
+
+
+def _find_duplicate(db: Session, user_id: int, fingerprint, extracted: Optional[dict] = None):
+    """
+    -> (receipt, its extraction) for an earlier upload of the image, or None.
+    Before OCR (no `extracted`) only an exact match is found.
+    """
+    duplicate = find_duplicate_receipt(db, user_id, *fingerprint, extracted)
+    return (duplicate, receipt_to_extraction(duplicate)) if duplicate else None
+
+
+def _save_and_match(db: Session, user_id: int, extracted: dict, filename, fingerprint) -> dict:
+    receipt = save_receipt(db, user_id, extracted, filename, fingerprint, commit=False)
+    match_receipt(db, receipt)
+    db.commit()
+    return {"id": receipt.id, "duplicate": False, "transaction_id": receipt.transaction_id}
+
+
 @router.post("/upload")
 async def upload_receipt(
     file: UploadFile = File(...),
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db),
 ):
-    user = get_current_user(db, token)
+    in_db = _session_runner(db)
+    user = await in_db(get_current_user, token)
+
+    if file.content_type not in ["image/png", "image/jpeg"]:
+        raise HTTPException(status_code=400, detail="Only JPG/PNG supported")
+
+    data = await file.read()
+    try:
+        # decoding a phone photo takes a while; keep it off the event loop
+        fingerprint = await run_in_threadpool(image_fingerprint, data)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid image")
+
+    # Same photo uploaded before: hand back what we already extracted
+    found = await in_db(_find_duplicate, user.id, fingerprint)
+    if found:
+        duplicate, extraction = found
+        return {"id": duplicate.id, "duplicate": True, **extraction}
+
+    # OCR runs in the worker pool so the event loop stays free
+    raw = await ocr_text_cached_async(in_db, data, fingerprint[0])
+    extracted = parse_receipt_text(raw)
+
+    # a re-encoded or resized copy: only known once the total and date are read
+    found = await in_db(_find_duplicate, user.id, fingerprint, extracted)
+    if found:
+        duplicate, extraction = found
+        return {"id": duplicate.id, "duplicate": True, **extraction}
+
+    saved = await in_db(_save_and_match, user.id, extracted, file.filename, fingerprint)
+    return {**saved, **extracted}
+
+
+def _batch_sources(files: List[UploadFile]):
+    """
+    Yield (name, load, error) for every receipt in the upload. ZIP members
+    are read one at a time when load() is called, never extracted up front.
+    """
+    for f in files:
+        name = f.filename or "upload"
+        is_zip = f.content_type in ["application/zip", "application/x-zip-compressed"] \
+            or name.lower().endswith(".zip")
+
+        if not is_zip:
+            if f.content_type not in ["image/png", "image/jpeg"]:
+                yield name, None, "Only JPG/PNG supported"
+            else:
+                yield name, f.file.read, None
+            continue
+
+        try:
+            archive = zipfile.ZipFile(f.file)
+        except zipfile.BadZipFile:
+            yield name, None, "Invalid ZIP archive"
+            continue
+
+        for info in archive.infolist():
+            member = f"{name}/{info.filename}"
+            if info.is_dir() or os.path.basename(info.filename).startswith("."):
+                continue
+            if os.path.splitext(info.filename)[1].lower() not in IMAGE_EXTENSIONS:
+                yield member, None, "Only JPG/PNG supported"
+            elif info.file_size > MAX_RECEIPT_BYTES:
+                yield member, None, "Image too large"
+            else:
+                yield member, (lambda a=archive, i=info: a.read(i)), None
+
+
+def _read_receipt(load):
+    """-> (image bytes, fingerprint) for one batch entry."""
+    data = load()
+    if len(data) > MAX_RECEIPT_BYTES:
+        raise ValueError("Image too large")
+    try:
+        return data, image_fingerprint(data)
+    except Exception:
+        raise ValueError("Invalid image")
+
+
+@router.post("/upload/batch")
+async def upload_receipts_batch(
+    files: List[UploadFile] = File(...),
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+):
+    """
+    Upload many receipt images and/or ZIP archives of them. Receipts are
+    OCR'd in parallel and reported on separately, so one bad image doesn't
+    fail the batch:
+
+    {
+      "imported": 1,
+      "duplicates": 1,
+      "failed": 1,
+      "results": [
+          {"filename": "a.jpg", "status": "ok", "id": 10, "merchant": "Tesco", "total": 5.2, "items": 3},
+          {"filename": "scans.zip/b.jpg", "status": "duplicate", "id": 4, ...},
+          {"filename": "scans.zip/c.txt", "status": "error", "error": "Only JPG/PNG supported"},
+          ...
+      ]
+    }
+    """
+    in_db = _session_runner(db)
+    user = await in_db(get_current_user, token)
+
+    # Only hold as many decoded images as there are OCR workers
+    slots = asyncio.Semaphore(max(OCR_WORKERS, 1))
+
+    seen_hashes = set()
+
+    async def process(load):
+        """-> (extracted, fingerprint, duplicate receipt or None)"""
+        try:
+            # reading a ZIP member inflates it; do that and the decode off the loop
+            data, fingerprint = await run_in_threadpool(_read_receipt, load)
+
+            found = await in_db(_find_duplicate, user.id, fingerprint)
+            if found:
+                duplicate, extraction = found
+                return extraction, fingerprint, duplicate
+            if fingerprint[0] in seen_hashes:
+                raise ValueError("Same image appears earlier in this batch")
+            seen_hashes.add(fingerprint[0])
+
+            raw = await ocr_text_cached_async(in_db, data, fingerprint[0])
+            extracted = parse_receipt_text(raw)
+            found = await in_db(_find_duplicate, user.id, fingerprint, extracted)
+            if found:
+                duplicate, extraction = found
+                return extraction, fingerprint, duplicate
+            return extracted, fingerprint, None
+        finally:
+            slots.release()
+
+    entries = []  # (name, task or None, error or None)
+    try:
+        for name, load, error in _batch_sources(files):
+            if len(entries) >= MAX_BATCH_RECEIPTS:
+                raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_RECEIPTS} receipts per batch")
+            if error:
+                entries.append((name, None, error))
+                continue
+            await slots.acquire()
+            entries.append((name, asyncio.create_task(process(load)), None))
+
+        await asyncio.gather(*[task for _, task, _ in entries if task], return_exceptions=True)
+    except BaseException:
+        for _, task, _ in entries:
+            if task:
+                task.cancel()
+        raise
+
+    def summary(receipt_id, ex):
+        return {
+            "id": receipt_id,
+            "merchant": ex.get("merchant"),
+            "receipt_date": ex.get("receipt_date"),
+            "total": ex.get("total"),
+            "items": len(ex.get("items", [])),
+        }
+
+    results = []
+    to_save = []
+    for name, task, error in entries:
+        if task is None or task.exception() is not None:
+            error = error or str(task.exception()) or "OCR failed"
+            results.append({"filename": name, "status": "error", "error": error})
+            continue
+
+        ex, fingerprint, duplicate = task.result()
+        if duplicate:
+            results.append({"filename": name, "status": "duplicate", **summary(duplicate.id, ex)})
+        else:
+            results.append({"filename": name, "status": "ok"})
+            to_save.append((ex, name, fingerprint, results[-1]))
+
+    def save_and_match(db: Session) -> int:
+        receipts = save_receipts(db, user.id, [(ex, name, fp) for ex, name, fp, _ in to_save], commit=False)
+
+        claimed = set()
+        for receipt, (ex, _, _, result) in zip(receipts, to_save):
+            tx = match_receipt(db, receipt, exclude=claimed)
+            if tx is not None:
+                claimed.add(tx.id)
+            result.update(summary(receipt.id, ex), transaction_id=receipt.transaction_id)
+
+        db.commit()
+        return len(receipts)
+
+    imported = await in_db(save_and_match)
+
+    return {
+        "imported": imported,
+        "duplicates": sum(r["status"] == "duplicate" for r in results),
+        "failed": sum(r["status"] == "error" for r in results),
+        "results": results,
+    }
+
+
+@router.post("/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def create_receipt_job(
+    file: UploadFile = File(...),
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+):
+    """
+    Queue a receipt for OCR and return straight away. Poll
+    GET /receipts/jobs/{job_id} for the result.
+    """
+    in_db = _session_runner(db)
+    user = await in_db(get_current_user, token)
 
     if file.content_type not in ["image/png", "image/jpeg"]:
         raise HTTPException(status_code=400, detail="Only JPG/PNG supported")
 
+    data = await file.read()
     try:
-        img = Image.open(file.file)
+        await run_in_threadpool(lambda: Image.open(io.BytesIO(data)).verify())
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid image")
 
-    extracted = extract_receipt(img)
+    # writes the image and commits the job row
+    job_id, job_status = await in_db(_enqueue, user.id, data, file.filename)
+
+    return {"job_id": job_id, "status": job_status}
+
+
+def _enqueue(db: Session, user_id: int, data: bytes, filename: Optional[str]):
+    job = enqueue_receipt_job(db, user_id, data, filename)
+    return job.id, job.status
+
+
+@router.get("/jobs/stats")
+def get_receipt_job_stats(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+):
+    """Queue depth and latencies across every user's jobs; admins only."""
+    user = get_current_user(db, token)
+    if not is_admin_email(user.email):
+        raise HTTPException(status_code=403, detail="Admins only")
+    return job_stats(db)
+
+
+@router.get("/jobs/{job_id}")
+def get_receipt_job(
+    job_id: int,
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+):
+    user = get_current_user(db, token)
 
-    receipt = Receipt(
-        user_id=user.id,
-        merchant=extracted.get("merchant"),
-        receipt_date=extracted.get("receipt_date"),
-        total=extracted.get("total"),
-        raw_text=extracted.get("raw_text"),
-        image_filename=file.filename,
+    job = (
+        db.query(ReceiptJob)
+        .filter(ReceiptJob.id == job_id, ReceiptJob.user_id == user.id)
+        .first()
     )
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
 
-    db.add(receipt)
+    result = {
+        "job_id": job.id,
+        "status": job.status,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "error": job.error,
+        "receipt": None,
+    }
+
+    if job.receipt is not None:
+        receipt = job.receipt
+        result["receipt"] = {
+            "id": receipt.id,
+            "merchant": receipt.merchant,
+            "receipt_date": receipt.receipt_date,
+            "total": receipt.total,
+            "raw_text": receipt.raw_text,
+            "items": [
+                schemas.ReceiptItemOut.model_validate(item).model_dump()
+                for item in receipt.items
+            ],
+        }
+
+    return result
+
+
+@router.post("/match")
+def match_receipts(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+):
+    """
+    Link every receipt that isn't linked yet to its bank transaction.
+    """
+    user = get_current_user(db, token)
+
+    result = match_unlinked_receipts(db, user.id)
     db.commit()
-    db.refresh(receipt)
-
-    for item in extracted.get("items", []):
-        db.add(ReceiptItem(
-            receipt_id=receipt.id,
-            name=item["name"],
-            qty=float(item.get("qty", 1.0)),
-            unit_price=item.get("unit_price"),
-            line_total=item.get("line_total"),
-        ))
 
+    return result
+
+
+@router.post("/{receipt_id}/reprocess")
+def reprocess_receipt(
+    receipt_id: int,
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+):
+    """
+    Re-run the text parser on a stored receipt (e.g. after parser fixes).
+    Uses the cached OCR text, so Tesseract doesn't run again.
+    """
+    user = get_current_user(db, token)
+
+    receipt = (
+        db.query(Receipt)
+        .filter(Receipt.id == receipt_id, Receipt.user_id == user.id)
+        .first()
+    )
+    if not receipt:
+        raise HTTPException(status_code=404, detail="Receipt not found")
+
+    raw = (get_cached_ocr_text(db, receipt.content_hash) if receipt.content_hash else None) \
+        or receipt.raw_text
+    if raw is None:
+        raise HTTPException(status_code=409, detail="No OCR text stored for this receipt")
+
+    extracted = parse_receipt_text(raw)
+
+    receipt.merchant = extracted["merchant"]
+    receipt.receipt_date = extracted["receipt_date"]
+    receipt.total = extracted["total"]
+    receipt.raw_text = raw
+    replace_receipt_items(db, receipt, extracted["items"])
     db.commit()
 
     return {
@@ -71,18 +426,80 @@ async def upload_receipt(
     }
 
 
-@router.get("/")
+def encode_cursor(created_at: datetime, receipt_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{receipt_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, receipt_id = raw.split("|")
+        return datetime.fromisoformat(created_at), int(receipt_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get("/", response_model=schemas.ReceiptPageOut)
 def list_receipts(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db),
 ):
+    """
+    Newest receipts first, one page at a time. Pass next_cursor back as
+    ?cursor= for the next page; it is null on the last one. Items and OCR
+    text come from GET /receipts/{receipt_id}.
+    """
     user = get_current_user(db, token)
 
-    receipts = (
+    query = (
         db.query(Receipt)
+        .options(load_only(
+            Receipt.id, Receipt.merchant, Receipt.receipt_date, Receipt.total, Receipt.created_at,
+        ))
         .filter(Receipt.user_id == user.id)
-        .order_by(Receipt.created_at.desc())
+    )
+
+    if cursor:
+        created_at, receipt_id = decode_cursor(cursor)
+        # keyset: strictly after the last row of the previous page
+        query = query.filter(or_(
+            Receipt.created_at < created_at,
+            and_(Receipt.created_at == created_at, Receipt.id < receipt_id),
+        ))
+
+    receipts = (
+        query
+        .order_by(Receipt.created_at.desc(), Receipt.id.desc())
+        .limit(limit + 1)
         .all()
     )
 
-    return receipts
\ No newline at end of file
+    next_cursor = None
+    if len(receipts) > limit:
+        receipts = receipts[:limit]
+        next_cursor = encode_cursor(receipts[-1].created_at, receipts[-1].id)
+
+    return {"receipts": receipts, "next_cursor": next_cursor}
+
+
+@router.get("/{receipt_id}", response_model=schemas.ReceiptDetailOut)
+def get_receipt(
+    receipt_id: int,
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+):
+    user = get_current_user(db, token)
+
+    receipt = (
+        db.query(Receipt)
+        .options(undefer(Receipt.raw_text), selectinload(Receipt.items))
+        .filter(Receipt.id == receipt_id, Receipt.user_id == user.id)
+        .first()
+    )
+    if not receipt:
+        raise HTTPException(status_code=404, detail="Receipt not found")
+
+    return receipt
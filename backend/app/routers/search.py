@@ -0,0 +1,70 @@
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from .. import models
+from ..security import decode_token
+from ..metrics import timed
+from ..services.search_index import query_terms, search_receipts, search_transactions
+
+router = APIRouter(prefix="/search", tags=["Search"])
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
+
+SEARCH_TYPES = {"all", "transactions", "receipts"}
+
+
+@timed("get_current_user")
+def get_current_user(db: Session, token: str):
+    email = decode_token(token)
+    if not email:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+
+    user = db.query(models.User).filter(models.User.email == email).first()
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+
+    return user
+
+
+@router.get("/")
+def search(
+    q: str = Query(..., min_length=1),
+    type: str = "all",
+    account_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+):
+    """
+    Ranked search over transaction descriptions and receipts (merchant,
+    OCR text, item names). Every word must match, as a prefix.
+    account_id / date_from / date_to narrow the transactions; limit and
+    offset page each list.
+    """
+    user = get_current_user(db, token)
+
+    if type not in SEARCH_TYPES:
+        raise HTTPException(status_code=400, detail=f"type must be one of {sorted(SEARCH_TYPES)}")
+
+    terms = query_terms(q)
+    if not terms:
+        raise HTTPException(status_code=400, detail="Search needs at least one word")
+
+    result = {"query": q, "limit": limit, "offset": offset}
+
+    if type in ("all", "transactions"):
+        result["transactions"] = search_transactions(
+            db, user.id, terms, limit, offset,
+            account_id=account_id, date_from=date_from, date_to=date_to,
+        )
+    if type in ("all", "receipts"):
+        result["receipts"] = search_receipts(db, user.id, terms, limit, offset)
+
+    return result
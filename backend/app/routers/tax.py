@@ -1,14 +1,137 @@
-from fastapi import APIRouter
-from pydantic import BaseModel
-from app.services.tax_calculator import calculate_uk_tax
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.security import OAuth2PasswordBearer
+from pydantic import BaseModel, Field
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app import models
+from app.security import decode_token
+from app.metrics import timed
+from app.services.tax_calculator import (
+    DEFAULT_REGION,
+    DEFAULT_TAX_YEAR,
+    TAX_YEARS,
+    calculate_uk_tax,
+    calculate_uk_tax_batch,
+    tax_year_bounds,
+    tax_year_for,
+)
 
 router = APIRouter(prefix="/tax", tags=["Tax"])
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
+
+MAX_BATCH_SALARIES = 100_000
 
 
 class TaxRequest(BaseModel):
     gross_annual: float
+    tax_year: str = DEFAULT_TAX_YEAR
+    region: str = DEFAULT_REGION
+
+
+class TaxBatchRequest(BaseModel):
+    gross_annual: List[float] = Field(..., max_length=MAX_BATCH_SALARIES)
+    tax_year: str = DEFAULT_TAX_YEAR
+    region: str = DEFAULT_REGION
+
+
+@timed("get_current_user")
+def get_current_user(db: Session, token: str):
+    email = decode_token(token)
+    if not email:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+
+    user = db.query(models.User).filter(models.User.email == email).first()
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+
+    return user
 
 
 @router.post("/calculate")
 def calculate_tax(payload: TaxRequest):
-    return calculate_uk_tax(payload.gross_annual)
\ No newline at end of file
+    try:
+        return calculate_uk_tax(payload.gross_annual, payload.tax_year, payload.region)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/calculate/batch")
+def calculate_tax_batch(payload: TaxBatchRequest):
+    """
+    Many salaries at once (salary comparisons, take-home curves). Returns
+    one list per field, in the order the salaries were given.
+    """
+    try:
+        result = calculate_uk_tax_batch(payload.gross_annual, payload.tax_year, payload.region)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "tax_year": payload.tax_year,
+        "region": payload.region,
+        **{key: values.tolist() for key, values in result.items()},
+    }
+
+
+@router.get("/projected")
+def projected_tax(
+    tax_year: Optional[str] = None,
+    region: str = DEFAULT_REGION,
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+):
+    """
+    Projected tax and NI for a tax year (default: the current one) from the
+    user's imported income so far. Reads the running income_totals row only.
+
+    Income is annualised over the days up to the last imported income
+    (clamped to the tax year), not up to today: statements arrive late, and
+    counting days nobody has imported yet would under-project. A finished
+    year is not projected. The date used is returned as "annualised_to";
+    no income gives a projection of 0.
+    """
+    user = get_current_user(db, token)
+
+    today = date.today()
+    tax_year = tax_year or tax_year_for(today)
+    try:
+        start, end = tax_year_bounds(tax_year)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if start > today:
+        raise HTTPException(status_code=400, detail="Tax year has not started")
+
+    totals = db.get(models.IncomeTotal, (user.id, tax_year))
+    ytd_income = totals.total if totals else 0.0
+    last_income_date = totals.last_income_date if totals else None
+
+    year_days = (end - start).days + 1
+    if last_income_date is None:
+        annualised_to, elapsed_days, projected_gross = None, 0, 0.0
+    else:
+        annualised_to = end if end < today else min(max(last_income_date, start), end)
+        elapsed_days = (annualised_to - start).days + 1
+        projected_gross = round(ytd_income * year_days / elapsed_days, 2)
+
+    # bands for years we have no table for yet fall back to the latest known
+    bands_tax_year = tax_year if tax_year in TAX_YEARS else max(TAX_YEARS)
+    try:
+        projection = calculate_uk_tax(projected_gross, bands_tax_year, region)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        **projection,
+        "tax_year": tax_year,
+        "bands_tax_year": bands_tax_year,
+        "ytd_income": ytd_income,
+        "income_transactions": totals.transactions if totals else 0,
+        "last_income_date": last_income_date,
+        "annualised_to": annualised_to,
+        "elapsed_days": elapsed_days,
+        "year_days": year_days,
+    }
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from typing import List
+from typing import List, Optional
 from datetime import date
 from dateutil import parser as dateparser
 from sqlalchemy import func
@@ -10,11 +11,24 @@ from sqlalchemy import func
 from ..database import get_db
 from .. import models, schemas
 from ..security import decode_token
+from ..metrics import span, timed
 from ..ml.categorizer import predict_category
+from ..services.receipt_matcher import match_unlinked_receipts
+from ..services.income_totals import INCOME_CATEGORY, record_income
+from ..services.etags import account_etag, not_modified
+from ..responses import orjson_response, rows_as_dicts
+from ..services.transaction_export import EXPORT_FORMATS, export_transactions, pyarrow_available
+from ..services.recurring_payments import recurring_summary, update_recurring_payments
 
 router = APIRouter(prefix="/transactions", tags=["Transactions"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+# TransactionOut's fields, selected as plain columns for the list endpoint
+TRANSACTION_COLUMNS = [
+    "id", "account_id", "date", "description", "amount",
+    "transaction_type", "category", "balance_after",
+]
+
 
 def parse_date_any(raw: str) -> date:
     dt = dateparser.parse(str(raw), dayfirst=True)
@@ -23,6 +37,7 @@ def parse_date_any(raw: str) -> date:
     return dt.date()
 
 
+@timed("get_current_user")
 def get_current_user(db: Session, token: str):
     email = decode_token(token)
     if not email:
@@ -98,6 +113,7 @@ def upload_transactions(
 
     imported = 0
     duplicates = 0
+    income = []
 
     for tx_date, description, amount in cleaned:
         tx_type = "CREDIT" if amount > 0 else "DEBIT"
@@ -117,15 +133,29 @@ def upload_transactions(
 
         db.add(row)
         try:
-            db.commit()
+            with span("upload_commit"):
+                db.commit()
             imported += 1
+            if predicted == INCOME_CATEGORY:
+                income.append((tx_date, amount))
         except IntegrityError:
             db.rollback()
             duplicates += 1
             running_balance = float(round(running_balance - amount, 2))
 
     account.current_balance = float(round(running_balance, 2))
-    db.commit()
+    if imported:
+        account.data_version = models.Account.data_version + 1
+    record_income(db, user.id, income)
+    with span("upload_commit"):
+        db.commit()
+
+    # receipts scanned before this statement arrived can be linked now,
+    # and recurring charges only need to look at the new rows
+    if imported:
+        match_unlinked_receipts(db, user.id)
+        update_recurring_payments(db, account.id)
+        db.commit()
 
     return {
         "imported": imported,
@@ -144,23 +174,32 @@ def get_transactions(
     user = get_current_user(db, token)
     account = get_account_owned(db, user.id, account_id)
 
-    return (
-        db.query(models.Transaction)
+    # read-only list: tuples straight to orjson, no ORM objects or
+    # per-row TransactionOut validation
+    rows = (
+        db.query(*(getattr(models.Transaction, c) for c in TRANSACTION_COLUMNS))
         .filter(models.Transaction.account_id == account.id)
         .order_by(models.Transaction.date.desc(), models.Transaction.id.desc())
         .all()
     )
+    return orjson_response(rows_as_dicts(TRANSACTION_COLUMNS, rows))
 
 
 @router.get("/summary")
 def get_account_summary(
     account_id: int,
+    request: Request,
+    response: Response,
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db),
 ):
     user = get_current_user(db, token)
     account = get_account_owned(db, user.id, account_id)
 
+    cached = not_modified(request, response, account_etag(account, "summary"))
+    if cached:
+        return cached
+
     total_income = (
         db.query(func.sum(models.Transaction.amount))
         .filter(models.Transaction.account_id == account.id)
@@ -212,46 +251,55 @@ def get_account_summary(
 @router.get("/balance-history")
 def get_balance_history(
     account_id: int,
+    request: Request,
+    response: Response,
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db),
 ):
     user = get_current_user(db, token)
     account = get_account_owned(db, user.id, account_id)
 
-    # Get transactions ordered oldest → newest
+    cached = not_modified(request, response, account_etag(account, "balance-history"))
+    if cached:
+        return cached
+
+    # Get (date, balance_after) ordered oldest → newest
     transactions = (
-        db.query(models.Transaction)
+        db.query(models.Transaction.date, models.Transaction.balance_after)
         .filter(models.Transaction.account_id == account.id)
         .order_by(models.Transaction.date.asc(), models.Transaction.id.asc())
         .all()
     )
 
-    if not transactions:
-        return []
-
     daily_balances = {}
-    
-    for tx in transactions:
+
+    for tx_date, balance_after in transactions:
         # overwrite per day so we keep the LAST transaction of that day
-        daily_balances[str(tx.date)] = float(tx.balance_after)
+        daily_balances[tx_date] = float(balance_after)
 
-    # Convert dict to sorted list
+    # rows are already in date order, so the dict is too
     result = [
-        {"date": date, "balance": balance}
-        for date, balance in sorted(daily_balances.items())
+        {"date": day, "balance": balance}
+        for day, balance in daily_balances.items()
     ]
 
-    return result
+    return orjson_response(result, response)
 
 @router.get("/by-category")
 def get_spending_by_category(
     account_id: int,
+    request: Request,
+    response: Response,
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db),
 ):
     user = get_current_user(db, token)
     account = get_account_owned(db, user.id, account_id)
 
+    cached = not_modified(request, response, account_etag(account, "by-category"))
+    if cached:
+        return cached
+
     results = (
         db.query(
             models.Transaction.category,
@@ -272,3 +320,77 @@ def get_spending_by_category(
     ]
 
 
+@router.get("/recurring")
+def get_recurring_payments(
+    account_id: int,
+    include_inactive: bool = False,
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+):
+    """
+    Subscriptions, bills and other charges that repeat weekly, fortnightly,
+    monthly, quarterly or yearly, with the expected next charge date and
+    what they cost per month in total. Read-only: uploads keep the groups
+    current, POST /transactions/recurring/refresh rescans.
+    """
+    user = get_current_user(db, token)
+    account = get_account_owned(db, user.id, account_id)
+    return recurring_summary(db, account, include_inactive)
+
+
+@router.post("/recurring/refresh")
+def refresh_recurring_payments(
+    account_id: int,
+    include_inactive: bool = False,
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+):
+    """
+    Scan transactions the recurring groups haven't seen yet, e.g. history
+    imported before recurring detection existed. Returns the same body as
+    GET /transactions/recurring.
+    """
+    user = get_current_user(db, token)
+    account = get_account_owned(db, user.id, account_id)
+
+    if update_recurring_payments(db, account.id):
+        db.commit()
+
+    return recurring_summary(db, account, include_inactive)
+
+
+@router.get("/export")
+def export_account_transactions(
+    account_id: int,
+    format: str = "csv",
+    gzip: bool = False,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+):
+    """
+    Download every transaction of an account, oldest first, as csv,
+    parquet or arrow (IPC stream). Streamed in batches, so any account
+    size is fine; gzip=true compresses on the fly.
+    """
+    user = get_current_user(db, token)
+    account = get_account_owned(db, user.id, account_id)
+
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {sorted(EXPORT_FORMATS)}")
+
+    media_type, extension, needs_pyarrow = EXPORT_FORMATS[format]
+    if needs_pyarrow and not pyarrow_available():
+        raise HTTPException(status_code=400, detail=f"{format} export needs pyarrow installed on the server")
+
+    filename = f"transactions_{account.id}.{extension}"
+    if gzip:
+        media_type = "application/gzip"
+        filename += ".gz"
+
+    return StreamingResponse(
+        export_transactions(account.id, format, gzip, date_from, date_to),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr
 from typing import Optional, List
-from datetime import date
+from datetime import date, datetime
 
 
 class UserCreate(BaseModel):
@@ -92,7 +92,20 @@ class ReceiptSummaryOut(BaseModel):
     merchant: Optional[str] = None
     receipt_date: Optional[str] = None
     total: Optional[float] = None
-    created_at: Optional[str] = None
+    created_at: Optional[datetime] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class ReceiptPageOut(BaseModel):
+    receipts: List[ReceiptSummaryOut]
+    next_cursor: Optional[str] = None
+
+
+class ReceiptDetailOut(ReceiptSummaryOut):
+    account_id: Optional[int] = None
+    transaction_id: Optional[int] = None
+    image_filename: Optional[str] = None
+    raw_text: Optional[str] = None
+    items: List[ReceiptItemOut] = []
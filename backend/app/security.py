@@ -1,3 +1,4 @@
+import os
 from datetime import datetime, timedelta
 from typing import Optional
 
@@ -53,6 +54,22 @@ def decode_token(token: str) -> Optional[str]:
         return None
 
 
+# =========================
+# ADMINS
+# =========================
+
+# comma separated, e.g. SMARTSPEND_ADMIN_EMAILS=ops@example.com,dev@example.com
+ADMIN_EMAILS = {
+    e.strip().lower()
+    for e in os.getenv("SMARTSPEND_ADMIN_EMAILS", "").split(",")
+    if e.strip()
+}
+
+
+def is_admin_email(email: Optional[str]) -> bool:
+    return bool(email) and email.lower() in ADMIN_EMAILS
+
+
 # =========================
 # CURRENT USER DEPENDENCY
 # =========================
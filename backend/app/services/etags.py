@@ -0,0 +1,36 @@
+from typing import Optional
+
+from fastapi import Request, Response
+
+from ..models import Account
+
+# Bump when a cached endpoint's output changes shape or meaning, so
+# clients holding old ETags recompute.
+ETAG_VERSION = "1"
+
+
+def account_etag(account: Account, *parts) -> str:
+    """
+    Weak ETag for a read of one account's data. parts are whatever else
+    the response depends on (endpoint name, query params).
+    """
+    suffix = "-".join(str(p) for p in parts)
+    return f'W/"{ETAG_VERSION}-a{account.id}-v{account.data_version or 0}-{suffix}"'
+
+
+def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    A 304 if the client's If-None-Match already has this ETag; otherwise
+    sets the ETag on the normal response and returns None.
+    """
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        # weak comparison: W/ prefixes don't matter
+        tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+        if "*" in tags or etag.removeprefix("W/") in tags:
+            return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,57 @@
+from collections import defaultdict
+from datetime import date
+from typing import Iterable, Tuple
+
+from sqlalchemy.orm import Session
+
+from ..models import Account, IncomeTotal, Transaction
+from .tax_calculator import tax_year_for
+
+INCOME_CATEGORY = "Income"
+
+
+def record_income(db: Session, user_id: int, rows: Iterable[Tuple[date, float]]):
+    """
+    Add newly imported (date, amount) income rows to the user's running
+    totals, one IncomeTotal per tax year. Does not commit.
+    """
+    by_year = defaultdict(lambda: [0.0, 0, None])
+    for day, amount in rows:
+        entry = by_year[tax_year_for(day)]
+        entry[0] += amount
+        entry[1] += 1
+        entry[2] = max(entry[2], day) if entry[2] else day
+
+    for tax_year, (amount, count, last_day) in by_year.items():
+        total = db.get(IncomeTotal, (user_id, tax_year))
+        if total is None:
+            total = IncomeTotal(user_id=user_id, tax_year=tax_year, total=0.0, transactions=0)
+            db.add(total)
+        total.total = round(total.total + amount, 2)
+        total.transactions += count
+        if total.last_income_date is None or last_day > total.last_income_date:
+            total.last_income_date = last_day
+
+
+def backfill_income_totals(db: Session):
+    """
+    One-off: build income_totals from transactions imported before the
+    table existed. Does nothing once the table has any rows.
+    """
+    if db.query(IncomeTotal).first() is not None:
+        return
+
+    rows = (
+        db.query(Account.user_id, Transaction.date, Transaction.amount)
+        .join(Transaction, Transaction.account_id == Account.id)
+        .filter(Transaction.category == INCOME_CATEGORY)
+        .yield_per(10_000)
+    )
+
+    by_user = defaultdict(list)
+    for user_id, day, amount in rows:
+        by_user[user_id].append((day, amount))
+
+    for user_id, income in by_user.items():
+        record_income(db, user_id, income)
+    db.commit()
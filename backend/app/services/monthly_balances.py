@@ -0,0 +1,68 @@
+import numpy as np
+from sqlalchemy import extract, func, select
+from sqlalchemy.orm import Session
+
+from ..models import Account, Transaction
+
+
+def month_index(column):
+    """
+    year * 12 + month - 1 as an SQL expression. EXTRACT compiles on SQLite
+    and Postgres alike, unlike strftime / to_char.
+    """
+    return extract("year", column) * 12 + extract("month", column) - 1
+
+
+def month_label(index) -> str:
+    """ 24310 -> "2025-11" """
+    index = int(index)
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def load_monthly_closing_balances(db: Session, *filters):
+    """
+    Month-end closing balance per account, computed in the database: the
+    last transaction of each (account, month) by date then id.
+
+    Returns {account_id: (months, balances)} where months is a list of
+    "YYYY-MM" strings and balances a float64 array, both oldest first.
+    """
+    T = Transaction
+    month = month_index(T.date)
+
+    ranked = (
+        select(
+            T.account_id,
+            month.label("month"),
+            T.balance_after,
+            func.row_number()
+            .over(partition_by=(T.account_id, month), order_by=(T.date.desc(), T.id.desc()))
+            .label("rn"),
+        )
+        .join(Account, Account.id == T.account_id)
+        .where(*filters)
+        .subquery()
+    )
+
+    rows = db.execute(
+        select(ranked.c.account_id, ranked.c.month, ranked.c.balance_after)
+        .where(ranked.c.rn == 1)
+        .order_by(ranked.c.account_id, ranked.c.month)
+    ).all()
+
+    result = {}
+    if not rows:
+        return result
+
+    account_ids, months, balances = zip(*rows)
+    account_ids = np.fromiter(account_ids, dtype=np.int64, count=len(rows))
+    balances = np.fromiter(balances, dtype=float, count=len(rows))
+    months = [month_label(m) for m in months]
+
+    # rows are sorted by account, so each account is one contiguous slice
+    starts = np.flatnonzero(np.r_[True, account_ids[1:] != account_ids[:-1]])
+    ends = np.r_[starts[1:], len(rows)]
+    for start, end in zip(starts, ends):
+        result[int(account_ids[start])] = (months[start:end], balances[start:end])
+
+    return result
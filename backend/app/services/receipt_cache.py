@@ -0,0 +1,176 @@
+import os
+import threading
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..models import OcrCache, Receipt
+from ..ml.receipt_engine import (
+    ocr_image_bytes,
+    ocr_image_bytes_async,
+    phash_distance,
+    phash_is_informative,
+)
+
+# Re-encoded / resized copies of the same photo land within a few bits of
+# 256. Receipts printed by the same till can be as close as one changed
+# line, so the hash alone never decides; see find_duplicate_receipt.
+PHASH_MAX_DISTANCE = 8
+
+OCR_CACHE_MAX_BYTES = int(os.getenv("SMARTSPEND_OCR_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+OCR_CACHE_RESYNC_EVERY = 256
+
+# this process's running view of sum(ocr_cache.size_bytes), see _cache_total
+_cached_bytes = None
+_inserts_since_sync = 0
+_cache_size_lock = threading.Lock()
+
+
+def find_duplicate_receipt(db: Session, user_id: int, content_hash: str, phash: str,
+                           extracted: Optional[dict] = None) -> Optional[Receipt]:
+    """
+    The user's earlier receipt for the same image. An exact pixel match
+    counts on its own. A perceptual match (phash within PHASH_MAX_DISTANCE)
+    is only considered once the new image has been OCR'd (`extracted`), and
+    only against receipts with the same total and date, so near-identical
+    slips from the same till are never merged.
+    """
+    exact = (
+        db.query(Receipt)
+        .filter(Receipt.user_id == user_id, Receipt.content_hash == content_hash)
+        .order_by(Receipt.id.asc())
+        .first()
+    )
+    if exact or extracted is None or not phash_is_informative(phash):
+        return exact
+
+    total, day = extracted.get("total"), extracted.get("receipt_date")
+    if total is None or not day:
+        return None
+
+    candidates = (
+        db.query(Receipt.id, Receipt.phash)
+        .filter(
+            Receipt.user_id == user_id,
+            Receipt.total == total,
+            Receipt.receipt_date == day,
+            Receipt.phash.isnot(None),
+        )
+        .all()
+    )
+    best = None
+    for receipt_id, other in candidates:
+        distance = phash_distance(phash, other)
+        if distance <= PHASH_MAX_DISTANCE and (best is None or distance < best[0]):
+            best = (distance, receipt_id)
+
+    return db.get(Receipt, best[1]) if best else None
+
+
+def get_cached_ocr_text(db: Session, content_hash: str) -> Optional[str]:
+    """
+    Cached OCR text for an image, marking the entry recently used. Only
+    flushes: the caller's transaction decides when the touch is committed.
+    """
+    entry = db.get(OcrCache, content_hash)
+    if entry is None:
+        return None
+
+    entry.last_used_at = datetime.utcnow()
+    db.flush()
+    return entry.raw_text
+
+
+def _cache_total(db: Session, added: int) -> int:
+    """
+    Bytes in the cache after adding `added`. Kept as a running total rather
+    than summing the table on every insert; re-read every
+    OCR_CACHE_RESYNC_EVERY inserts so other processes' writes and rolled
+    back inserts are picked up.
+    """
+    global _cached_bytes, _inserts_since_sync
+    with _cache_size_lock:
+        if _cached_bytes is None or _inserts_since_sync >= OCR_CACHE_RESYNC_EVERY:
+            _cached_bytes = db.query(func.coalesce(func.sum(OcrCache.size_bytes), 0)).scalar()
+            _inserts_since_sync = 0
+        else:
+            _cached_bytes += added
+            _inserts_since_sync += 1
+        return _cached_bytes
+
+
+def _evicted(removed: int):
+    global _cached_bytes
+    with _cache_size_lock:
+        if _cached_bytes is not None:
+            _cached_bytes -= removed
+
+
+def cache_ocr_text(db: Session, content_hash: str, raw_text: str):
+    """
+    Store OCR output for an image, then evict least recently used entries
+    until the cache is back under OCR_CACHE_MAX_BYTES. Flushes only; the
+    caller commits.
+    """
+    size = len(raw_text.encode("utf-8"))
+    if size > OCR_CACHE_MAX_BYTES:
+        return
+
+    previous = db.get(OcrCache, content_hash)
+    added = size - (previous.size_bytes if previous else 0)
+    db.merge(OcrCache(
+        content_hash=content_hash,
+        raw_text=raw_text,
+        size_bytes=size,
+        last_used_at=datetime.utcnow(),
+    ))
+    db.flush()
+
+    total = _cache_total(db, added)
+    if total > OCR_CACHE_MAX_BYTES:
+        oldest = (
+            db.query(OcrCache.content_hash, OcrCache.size_bytes)
+            .filter(OcrCache.content_hash != content_hash)
+            .order_by(OcrCache.last_used_at.asc())
+            .yield_per(500)
+        )
+        evict, removed = [], 0
+        for key, entry_size in oldest:
+            evict.append(key)
+            removed += entry_size
+            if total - removed <= OCR_CACHE_MAX_BYTES:
+                break
+        db.query(OcrCache).filter(OcrCache.content_hash.in_(evict)).delete(synchronize_session=False)
+        _evicted(removed)
+
+
+def ocr_text_cached(db: Session, image_bytes: bytes, content_hash: str) -> str:
+    """Flushes the cache update; commits with the caller's transaction."""
+    raw = get_cached_ocr_text(db, content_hash)
+    if raw is None:
+        raw = ocr_image_bytes(image_bytes)
+        cache_ocr_text(db, content_hash, raw)
+    return raw
+
+
+def _committed(fn):
+    def run(db: Session, *args):
+        result = fn(db, *args)
+        db.commit()
+        return result
+    return run
+
+
+async def ocr_text_cached_async(in_db, image_bytes: bytes, content_hash: str) -> str:
+    """
+    in_db(fn, *args) awaits fn(db, *args) off the event loop. The cache is
+    committed straight away: the upload may still end without a commit of
+    its own (a duplicate), and the OCR work shouldn't be lost with it.
+    """
+    raw = await in_db(_committed(get_cached_ocr_text), content_hash)
+    if raw is None:
+        raw = await ocr_image_bytes_async(image_bytes)
+        await in_db(_committed(cache_ocr_text), content_hash, raw)
+    return raw
@@ -0,0 +1,287 @@
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import func, or_, update
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from ..models import ReceiptJob
+from ..ml.receipt_engine import image_fingerprint, parse_receipt_text
+from .receipt_cache import find_duplicate_receipt, ocr_text_cached
+from .receipt_matcher import match_receipt
+from .receipt_store import save_receipt
+
+logger = logging.getLogger(__name__)
+
+RECEIPT_UPLOAD_DIR = os.getenv("SMARTSPEND_RECEIPT_DIR", "uploads/receipts")
+RECEIPT_JOB_WORKERS = int(os.getenv("SMARTSPEND_RECEIPT_WORKERS", "2"))
+
+# How long an idle worker sleeps before re-checking the table. New jobs
+# from this process wake workers straight away; this only matters for jobs
+# enqueued by another process sharing the database.
+POLL_SECONDS = 2.0
+
+# A claimed job is leased to the claiming process, which renews the lease
+# every LEASE_SECONDS / 3 while it runs. Once a lease lapses the owner is
+# taken to be dead and any process's workers may re-queue the job.
+LEASE_SECONDS = float(os.getenv("SMARTSPEND_RECEIPT_LEASE_SECONDS", "60"))
+
+
+def enqueue_receipt_job(db: Session, user_id: int, data: bytes, filename: Optional[str]) -> ReceiptJob:
+    """
+    Write the image to disk and queue it. The job row is the durable record;
+    a restart picks it back up.
+    """
+    os.makedirs(RECEIPT_UPLOAD_DIR, exist_ok=True)
+    ext = os.path.splitext(filename or "")[1].lower() or ".img"
+    path = os.path.join(RECEIPT_UPLOAD_DIR, f"{uuid.uuid4().hex}{ext}")
+
+    with open(path, "wb") as f:
+        f.write(data)
+
+    job = ReceiptJob(user_id=user_id, image_path=path, image_filename=filename)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    workers.notify()
+    return job
+
+
+class ReceiptJobWorkers:
+    """
+    Thread pool draining the receipt_jobs table. OCR itself happens in the
+    receipt engine's process pool; these threads only claim jobs, wait on
+    OCR and write results.
+    """
+
+    def __init__(self, count: int):
+        self.count = count
+        # unique per process start, so a restarted process never owns old leases
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._threads = []
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._busy = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        if self._threads:
+            return
+        db = SessionLocal()
+        try:
+            self._requeue_expired(db)
+        finally:
+            db.close()
+        self._stop.clear()
+        for i in range(self.count):
+            t = threading.Thread(target=self._run, name=f"receipt-job-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        t = threading.Thread(target=self._keep_leases, name="receipt-job-leases", daemon=True)
+        t.start()
+        self._threads.append(t)
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    def notify(self):
+        self._wake.set()
+
+    @property
+    def alive(self) -> int:
+        return sum(t.is_alive() for t in self._threads[:self.count])
+
+    @property
+    def busy(self) -> int:
+        return self._busy
+
+    def _lease_end(self) -> datetime:
+        return datetime.utcnow() + timedelta(seconds=LEASE_SECONDS)
+
+    def _requeue_expired(self, db: Session) -> int:
+        """
+        Put "processing" jobs whose lease lapsed (their process crashed or
+        was killed) back in the queue. Jobs held by live workers, in this
+        process or another one sharing the database, are left alone. Rows
+        from before leases existed have none and count as lapsed.
+        """
+        requeued = db.execute(
+            update(ReceiptJob)
+            .where(
+                ReceiptJob.status == "processing",
+                or_(ReceiptJob.lease_expires_at.is_(None), ReceiptJob.lease_expires_at < datetime.utcnow()),
+            )
+            .values(status="queued", started_at=None, worker_id=None, lease_expires_at=None)
+        ).rowcount
+        db.commit()
+        return requeued
+
+    def _keep_leases(self):
+        while not self._stop.wait(LEASE_SECONDS / 3):
+            db = SessionLocal()
+            try:
+                db.execute(
+                    update(ReceiptJob)
+                    .where(ReceiptJob.worker_id == self.worker_id, ReceiptJob.status == "processing")
+                    .values(lease_expires_at=self._lease_end())
+                )
+                db.commit()
+                if self._requeue_expired(db):
+                    self.notify()
+            except Exception:
+                logger.exception("Receipt job lease error")
+            finally:
+                db.close()
+
+    def _claim(self, db: Session) -> Optional[ReceiptJob]:
+        while True:
+            job_id = (
+                db.query(ReceiptJob.id)
+                .filter(ReceiptJob.status == "queued")
+                .order_by(ReceiptJob.id.asc())
+                .limit(1)
+                .scalar()
+            )
+            if job_id is None:
+                return None
+
+            # Compare-and-set so two workers never take the same job
+            claimed = db.execute(
+                update(ReceiptJob)
+                .where(ReceiptJob.id == job_id, ReceiptJob.status == "queued")
+                .values(status="processing", started_at=datetime.utcnow(),
+                        worker_id=self.worker_id, lease_expires_at=self._lease_end())
+            ).rowcount
+            db.commit()
+            if claimed:
+                return db.get(ReceiptJob, job_id)
+
+    def _run(self):
+        while not self._stop.is_set():
+            job = None
+            # clear before looking, so a notify() during the claim isn't lost
+            self._wake.clear()
+            db = SessionLocal()
+            try:
+                job = self._claim(db)
+                if job is not None:
+                    with self._lock:
+                        self._busy += 1
+                    try:
+                        self._process(db, job)
+                    finally:
+                        with self._lock:
+                            self._busy -= 1
+            except Exception:
+                logger.exception("Receipt job worker error")
+            finally:
+                db.close()
+
+            if job is None:
+                self._wake.wait(POLL_SECONDS)
+
+    def _process(self, db: Session, job: ReceiptJob):
+        job_id, image_path = job.id, job.image_path
+        receipt_id, error = None, None
+        try:
+            with open(image_path, "rb") as f:
+                data = f.read()
+
+            fingerprint = image_fingerprint(data)
+            receipt = find_duplicate_receipt(db, job.user_id, *fingerprint)
+            if receipt is None:
+                extracted = parse_receipt_text(ocr_text_cached(db, data, fingerprint[0]))
+                receipt = find_duplicate_receipt(db, job.user_id, *fingerprint, extracted)
+            if receipt is None:
+                # receipt, items and job status land in one commit
+                receipt = save_receipt(db, job.user_id, extracted, job.image_filename, fingerprint,
+                                       commit=False)
+                match_receipt(db, receipt)
+            receipt_id = receipt.id
+        except Exception as e:
+            db.rollback()
+            error = str(e) or e.__class__.__name__
+
+        # only while we still hold the lease: a job re-queued after our lease
+        # lapsed belongs to whichever worker claimed it since
+        finished = db.execute(
+            update(ReceiptJob)
+            .where(
+                ReceiptJob.id == job_id,
+                ReceiptJob.status == "processing",
+                ReceiptJob.worker_id == self.worker_id,
+                ReceiptJob.lease_expires_at >= datetime.utcnow(),
+            )
+            .values(
+                status="failed" if error else "done",
+                receipt_id=receipt_id,
+                error=error,
+                finished_at=datetime.utcnow(),
+                lease_expires_at=None,
+            )
+        ).rowcount
+        if not finished:
+            db.rollback()
+            logger.warning("Receipt job %s lost its lease; leaving it to its new owner", job_id)
+            return
+        db.commit()
+
+        # the image was only kept so an interrupted job could be retried
+        try:
+            os.remove(image_path)
+        except OSError:
+            pass
+
+
+workers = ReceiptJobWorkers(RECEIPT_JOB_WORKERS)
+
+
+def job_stats(db: Session, recent: int = 100) -> dict:
+    counts = dict(
+        db.query(ReceiptJob.status, func.count(ReceiptJob.id))
+        .group_by(ReceiptJob.status)
+        .all()
+    )
+
+    finished = (
+        db.query(ReceiptJob.created_at, ReceiptJob.started_at, ReceiptJob.finished_at)
+        .filter(ReceiptJob.status == "done")
+        .order_by(ReceiptJob.finished_at.desc())
+        .limit(recent)
+        .all()
+    )
+
+    def seconds(pairs):
+        values = np.array([(b - a).total_seconds() for a, b in pairs if a and b])
+        if not len(values):
+            return None
+        return {
+            "mean": round(float(values.mean()), 3),
+            "p50": round(float(np.percentile(values, 50)), 3),
+            "p95": round(float(np.percentile(values, 95)), 3),
+        }
+
+    return {
+        "workers": workers.count,
+        "workers_alive": workers.alive,
+        "workers_busy": workers.busy,
+        "queue_depth": counts.get("queued", 0),
+        "processing": counts.get("processing", 0),
+        "done": counts.get("done", 0),
+        "failed": counts.get("failed", 0),
+        # over the last `recent` completed jobs
+        "latency_seconds": seconds((r.created_at, r.finished_at) for r in finished),
+        "processing_seconds": seconds((r.started_at, r.finished_at) for r in finished),
+        "queue_wait_seconds": seconds((r.created_at, r.started_at) for r in finished),
+    }
@@ -0,0 +1,152 @@
+from datetime import date, timedelta
+from difflib import SequenceMatcher
+from typing import Iterable, Optional, Set
+
+from dateutil import parser as dateparser
+from sqlalchemy.orm import Session
+
+from ..models import Account, Receipt, Transaction
+from ..ml.rule_engine import clean_description
+
+# A card payment can differ from the printed total by a tip or rounding
+AMOUNT_TOLERANCE_PCT = 0.02
+AMOUNT_TOLERANCE_MIN = 0.01
+
+# Card payments usually clear a day or two after the shop
+DATE_WINDOW_DAYS = 5
+
+# exact amount and date alone (0.65) is not enough; the merchant has to agree too
+MIN_MATCH_SCORE = 0.75
+
+WEIGHTS = {"amount": 0.45, "date": 0.2, "merchant": 0.35}
+
+
+def receipt_day(receipt: Receipt) -> Optional[date]:
+    if receipt.receipt_date:
+        text = receipt.receipt_date.strip()
+        # "2025-12-03" is ISO year-month-day; anything else is UK day-first
+        year_first = text[:4].isdigit()
+        try:
+            return dateparser.parse(text, dayfirst=not year_first, yearfirst=year_first).date()
+        except (ValueError, OverflowError):
+            pass
+    # no readable date on the receipt: assume it was scanned soon after
+    return receipt.created_at.date() if receipt.created_at else None
+
+
+def merchant_similarity(merchant: Optional[str], description: str) -> float:
+    """
+    0..1. Bank descriptions pad the shop name with store numbers and
+    towns ("TESCO STORES 3297 LONDON"), so full-string similarity is
+    combined with how many of the receipt's merchant words appear.
+    """
+    a = clean_description(merchant or "")
+    b = clean_description(description or "")
+    if not a or not b:
+        return 0.0
+
+    words = a.split()
+    overlap = sum(w in b.split() for w in words) / len(words)
+    return max(overlap, SequenceMatcher(None, a, b).ratio())
+
+
+def score_match(receipt: Receipt, day: date, tx: Transaction) -> float:
+    tolerance = max(AMOUNT_TOLERANCE_MIN, receipt.total * AMOUNT_TOLERANCE_PCT)
+    amount = 1 - min(abs(-tx.amount - receipt.total) / tolerance, 1)
+    closeness = 1 - min(abs((tx.date - day).days) / (DATE_WINDOW_DAYS + 1), 1)
+    merchant = merchant_similarity(receipt.merchant, tx.description)
+
+    return (
+        WEIGHTS["amount"] * amount
+        + WEIGHTS["date"] * closeness
+        + WEIGHTS["merchant"] * merchant
+    )
+
+
+def find_matching_transaction(db: Session, receipt: Receipt, exclude: Iterable[int] = ()):
+    """
+    Best (transaction, score) for a receipt, or None. Candidates come from
+    the (account_id, amount) index: debits within tolerance of the total,
+    in the date window, not already linked to another receipt.
+    """
+    if receipt.total is None or receipt.total <= 0:
+        return None
+
+    day = receipt_day(receipt)
+    if day is None:
+        return None
+
+    tolerance = max(AMOUNT_TOLERANCE_MIN, receipt.total * AMOUNT_TOLERANCE_PCT)
+    window = timedelta(days=DATE_WINDOW_DAYS)
+
+    linked = (
+        db.query(Receipt.id)
+        .filter(Receipt.transaction_id == Transaction.id, Receipt.id != receipt.id)
+        .exists()
+    )
+    accounts = db.query(Account.id).filter(Account.user_id == receipt.user_id)
+
+    candidates = (
+        db.query(Transaction)
+        .filter(
+            Transaction.account_id.in_(accounts),
+            Transaction.amount.between(-(receipt.total + tolerance), -(receipt.total - tolerance)),
+            Transaction.date.between(day - window, day + window),
+            ~linked,
+        )
+        .all()
+    )
+
+    exclude = set(exclude)
+    best = None
+    for tx in candidates:
+        if tx.id in exclude:
+            continue
+        score = score_match(receipt, day, tx)
+        if score >= MIN_MATCH_SCORE and (best is None or score > best[1]):
+            best = (tx, score)
+
+    return best
+
+
+def match_receipt(db: Session, receipt: Receipt, exclude: Iterable[int] = ()) -> Optional[Transaction]:
+    """
+    Link a receipt to its bank transaction (and account) if one scores
+    well enough. Does not commit.
+    """
+    best = find_matching_transaction(db, receipt, exclude)
+    if best is None:
+        return None
+
+    tx, _ = best
+    receipt.transaction_id = tx.id
+    receipt.account_id = tx.account_id
+    return tx
+
+
+def match_unlinked_receipts(db: Session, user_id: int) -> dict:
+    """
+    Try every unlinked receipt of a user, e.g. after a statement import.
+    Each receipt is an indexed lookup, so the cost follows the number of
+    unlinked receipts rather than the number of transactions. Does not commit.
+    """
+    receipts = (
+        db.query(Receipt)
+        .filter(
+            Receipt.user_id == user_id,
+            Receipt.transaction_id.is_(None),
+            Receipt.total.isnot(None),
+        )
+        .order_by(Receipt.created_at.asc(), Receipt.id.asc())
+        .all()
+    )
+
+    claimed: Set[int] = set()
+    matched = 0
+    for receipt in receipts:
+        tx = match_receipt(db, receipt, exclude=claimed)
+        if tx is not None:
+            claimed.add(tx.id)
+            matched += 1
+
+    return {"checked": len(receipts), "matched": matched}
@@ -0,0 +1,106 @@
+from typing import Optional, Tuple
+
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+
+from ..models import Receipt, ReceiptItem
+from ..ml.receipt_engine import check_total
+
+
+def _new_receipt(user_id: int, extracted: dict, image_filename: Optional[str],
+                 fingerprint: Optional[Tuple[str, str]]) -> Receipt:
+    content_hash, phash = fingerprint or (None, None)
+    return Receipt(
+        user_id=user_id,
+        merchant=extracted.get("merchant"),
+        receipt_date=extracted.get("receipt_date"),
+        total=extracted.get("total"),
+        raw_text=extracted.get("raw_text"),
+        image_filename=image_filename,
+        content_hash=content_hash,
+        phash=phash,
+    )
+
+
+def _item_rows(receipt_id: int, items) -> list:
+    return [
+        {
+            "receipt_id": receipt_id,
+            "name": item["name"],
+            "qty": float(item.get("qty", 1.0)),
+            "unit_price": item.get("unit_price"),
+            "line_total": item.get("line_total"),
+        }
+        for item in items
+    ]
+
+
+def _insert_items(db: Session, rows: list):
+    # one executemany instead of an ORM object per line
+    if rows:
+        db.execute(insert(ReceiptItem), rows)
+
+
+def save_receipts(db: Session, user_id: int, entries, commit: bool = True) -> list:
+    """
+    Persist many (extracted, image_filename, fingerprint) entries in one
+    transaction. Returns the Receipt rows in input order.
+    With commit=False the caller owns the transaction.
+    """
+    receipts = [
+        _new_receipt(user_id, extracted, image_filename, fingerprint)
+        for extracted, image_filename, fingerprint in entries
+    ]
+    db.add_all(receipts)
+    db.flush()  # assigns ids
+
+    _insert_items(db, [
+        row
+        for receipt, (extracted, _, _) in zip(receipts, entries)
+        for row in _item_rows(receipt.id, extracted.get("items", []))
+    ])
+
+    if commit:
+        db.commit()
+    return receipts
+
+
+def save_receipt(db: Session, user_id: int, extracted: dict, image_filename: str = None,
+                 fingerprint: Optional[Tuple[str, str]] = None, commit: bool = True) -> Receipt:
+    """
+    Persist an extract_receipt() result as a Receipt with its items.
+    fingerprint is the (content_hash, phash) pair used for dedupe.
+    """
+    return save_receipts(db, user_id, [(extracted, image_filename, fingerprint)], commit=commit)[0]
+
+
+def replace_receipt_items(db: Session, receipt: Receipt, items):
+    """
+    Swap a stored receipt's items for new ones (reprocessing). Does not commit.
+    """
+    db.execute(delete(ReceiptItem).where(ReceiptItem.receipt_id == receipt.id))
+    _insert_items(db, _item_rows(receipt.id, items))
+    db.expire(receipt, ["items"])
+
+
+def receipt_to_extraction(receipt: Receipt) -> dict:
+    """
+    A stored receipt in the same shape extract_receipt() returns.
+    """
+    items = [
+        {
+            "name": item.name,
+            "qty": item.qty,
+            "unit_price": item.unit_price,
+            "line_total": item.line_total,
+        }
+        for item in receipt.items
+    ]
+    return {
+        "merchant": receipt.merchant,
+        "receipt_date": receipt.receipt_date,
+        "total": receipt.total,
+        **check_total(receipt.total, items),
+        "items": items,
+        "raw_text": receipt.raw_text,
+    }
@@ -0,0 +1,173 @@
+from collections import defaultdict
+from datetime import date
+from statistics import median
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..models import Account, RecurringPayment, RecurringScan, Transaction
+from ..ml.recurring_engine import (
+    CADENCE_PERIODS,
+    amount_bucket,
+    amounts_close,
+    detect_cadence,
+    merchant_key,
+    monthly_cost,
+    next_charge_date,
+)
+
+# charges kept per group: half a year of weekly, two years of monthly
+MAX_HISTORY = 24
+
+
+def _find_group(groups: dict, key: str, bucket: int, amount: float) -> Optional[RecurringPayment]:
+    group = groups.get((key, bucket))
+    if group is not None:
+        return group
+    # an amount near a bucket edge may belong to the group next door
+    for candidate in (bucket - 1, bucket + 1):
+        group = groups.get((key, candidate))
+        if group is not None and amounts_close(group.typical_amount, amount):
+            return group
+    return None
+
+
+def _add_charges(group: RecurringPayment, charges: list):
+    """charges: (date, amount, description, category), oldest first."""
+    days = [day.toordinal() for day, _, _, _ in charges]
+    amounts = [amount for _, amount, _, _ in charges]
+    # whole new lists, so the JSON columns are flagged dirty
+    group.recent_dates = (group.recent_dates + days)[-MAX_HISTORY:]
+    group.recent_amounts = (group.recent_amounts + amounts)[-MAX_HISTORY:]
+    group.typical_amount = round(median(group.recent_amounts), 2)
+    group.occurrences += len(charges)
+
+    last_day, group.last_amount, group.description, group.category = charges[-1]
+    group.last_date = max(group.last_date, last_day)
+    group.first_date = min(group.first_date, charges[0][0])
+
+
+def _detect(group: RecurringPayment):
+    found = detect_cadence(group.recent_dates)
+    if found is None:
+        group.cadence = group.regularity = group.next_date = None
+        return
+
+    group.cadence, regularity = found
+    group.regularity = round(regularity, 3)
+    anchor_day = int(median(date.fromordinal(d).day for d in group.recent_dates))
+    group.next_date = next_charge_date(group.last_date, group.cadence, anchor_day)
+
+
+def update_recurring_payments(db: Session, account_id: int) -> int:
+    """
+    Add the account's transactions imported since the last scan to its
+    merchant + amount groups. Cadence detection is re-run only on the
+    groups that got new charges. The first call reads the whole history;
+    later calls read only the new rows. Returns how many rows were read.
+    Does not commit.
+    """
+    scan = db.get(RecurringScan, account_id)
+    if scan is None:
+        scan = RecurringScan(account_id=account_id, last_transaction_id=0)
+        db.add(scan)
+
+    rows = (
+        db.query(Transaction.id, Transaction.date, Transaction.description, Transaction.amount, Transaction.category)
+        .filter(Transaction.account_id == account_id, Transaction.id > scan.last_transaction_id)
+        .order_by(Transaction.date.asc(), Transaction.id.asc())
+        .all()
+    )
+    if not rows:
+        return 0
+
+    groups = {
+        (g.merchant_key, g.amount_bucket): g
+        for g in db.query(RecurringPayment).filter(RecurringPayment.account_id == account_id)
+    }
+    keys = {}  # descriptions repeat a lot; clean each once
+    new_charges = defaultdict(list)  # group -> charges, applied once per group
+
+    for _, day, description, amount, category in rows:
+        if amount >= 0:
+            continue
+        key = keys.get(description)
+        if key is None:
+            key = keys[description] = merchant_key(description)
+        if not key:
+            continue
+
+        bucket = amount_bucket(amount)
+        group = _find_group(groups, key, bucket, amount)
+        if group is None:
+            group = RecurringPayment(
+                account_id=account_id, merchant_key=key, amount_bucket=bucket,
+                description=description, typical_amount=amount, last_amount=amount,
+                occurrences=0, first_date=day, last_date=day,
+                recent_dates=[], recent_amounts=[],
+            )
+            db.add(group)
+            groups[(key, bucket)] = group
+
+        new_charges[group].append((day, amount, description, category))
+
+    for group, charges in new_charges.items():
+        _add_charges(group, charges)
+        _detect(group)
+
+    scan.last_transaction_id = max(row[0] for row in rows)
+    return len(rows)
+
+
+def recurring_summary(db: Session, account: Account, include_inactive: bool = False) -> dict:
+    """
+    Detected recurring charges, soonest next charge first. A charge is
+    inactive once two periods have passed, counted back from the account's
+    latest transaction rather than today, since statements arrive late.
+    """
+    as_of = (
+        db.query(func.max(Transaction.date))
+        .filter(Transaction.account_id == account.id)
+        .scalar()
+    )
+
+    payments = (
+        db.query(RecurringPayment)
+        .filter(RecurringPayment.account_id == account.id, RecurringPayment.cadence.isnot(None))
+        .order_by(RecurringPayment.next_date.asc(), RecurringPayment.id.asc())
+        .all()
+    )
+
+    recurring = []
+    monthly_total = 0.0
+    for p in payments:
+        active = as_of is None or (as_of - p.last_date).days <= 2 * CADENCE_PERIODS[p.cadence]
+        if not active and not include_inactive:
+            continue
+        cost = monthly_cost(p.typical_amount, p.cadence)
+        if active:
+            monthly_total += cost
+        recurring.append({
+            "id": p.id,
+            "merchant": p.description,
+            "merchant_key": p.merchant_key,
+            "category": p.category,
+            "cadence": p.cadence,
+            "amount": float(abs(p.typical_amount)),
+            "last_amount": float(abs(p.last_amount)),
+            "monthly_cost": cost,
+            "occurrences": p.occurrences,
+            "first_date": str(p.first_date),
+            "last_date": str(p.last_date),
+            "next_date": str(p.next_date),
+            "regularity": p.regularity,
+            "active": active,
+        })
+
+    return {
+        "account_id": account.id,
+        "as_of": str(as_of) if as_of else None,
+        "monthly_total": round(monthly_total, 2),
+        "recurring": recurring,
+    }
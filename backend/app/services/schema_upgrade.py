@@ -0,0 +1,33 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from ..database import Base
+
+
+def _missing_columns(inspector, table):
+    existing = {c["name"] for c in inspector.get_columns(table.name)}
+    return [column for column in table.columns if column.name not in existing]
+
+
+def upgrade_schema(engine: Engine):
+    """
+    Bring a database made by an older version up to the models.
+    create_all only creates missing tables, so columns and indexes added to
+    existing tables since are added here. Idempotent; run on every start,
+    after create_all.
+    """
+    inspector = inspect(engine)
+    ddl = engine.dialect.ddl_compiler(engine.dialect, None)
+
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+
+            for column in _missing_columns(inspector, table):
+                # new columns are nullable or carry a server default, so
+                # existing rows are valid as soon as the column exists
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl.get_column_specification(column)}"))
+
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
@@ -0,0 +1,230 @@
+import re
+from datetime import date
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+# (index name, source table, indexed columns, SQL for the owning user's id
+# where {row} is the source row)
+FTS_TABLES = [
+    ("transactions_fts", "transactions", ["description"],
+     "(SELECT user_id FROM accounts WHERE id = {row}.account_id)"),
+    ("receipts_fts", "receipts", ["merchant", "raw_text"], "{row}.user_id"),
+    ("receipt_items_fts", "receipt_items", ["name"],
+     "(SELECT user_id FROM receipts WHERE id = {row}.receipt_id)"),
+]
+
+MAX_QUERY_TERMS = 8
+
+
+# ===============================
+# INDEX SETUP
+# ===============================
+
+def _owner_token(user_id) -> str:
+    return f"u{user_id}"
+
+
+def _sqlite_fts_ddl(name: str, table: str, columns: List[str], owner_sql: str) -> List[str]:
+    """
+    Besides the text columns, every row indexes an "owner" token ("u42")
+    for its user, and searches MATCH on it. FTS5 then only walks the
+    searching user's postings instead of every user's before the join.
+    """
+    cols = ", ".join(columns)
+    new = ", ".join(f"new.{c}" for c in columns)
+    old = ", ".join(f"old.{c}" for c in columns)
+    new_owner = "'u' || " + owner_sql.format(row="new")
+    old_owner = "'u' || " + owner_sql.format(row="old")
+    return [
+        # the rows as the index sees them, owner token included
+        f"CREATE VIEW {name}_content AS SELECT id, {cols}, 'u' || {owner_sql.format(row=table)} AS owner "
+        f"FROM {table}",
+        # external content: the index stores tokens only, text stays in `table`
+        f"CREATE VIRTUAL TABLE {name} USING fts5({cols}, owner, content='{name}_content', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER {name}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {name}(rowid, {cols}, owner) VALUES (new.id, {new}, {new_owner}); END",
+        f"CREATE TRIGGER {name}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {name}({name}, rowid, {cols}, owner) VALUES ('delete', old.id, {old}, {old_owner}); END",
+        f"CREATE TRIGGER {name}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+        f"INSERT INTO {name}({name}, rowid, {cols}, owner) VALUES ('delete', old.id, {old}, {old_owner}); "
+        f"INSERT INTO {name}(rowid, {cols}, owner) VALUES (new.id, {new}, {new_owner}); END",
+        # index whatever was already in the table
+        f"INSERT INTO {name}({name}) VALUES ('rebuild')",
+    ]
+
+
+def _sqlite_drop_fts_ddl(name: str) -> List[str]:
+    return [
+        f"DROP TRIGGER IF EXISTS {name}_ai",
+        f"DROP TRIGGER IF EXISTS {name}_ad",
+        f"DROP TRIGGER IF EXISTS {name}_au",
+        f"DROP TABLE IF EXISTS {name}",
+        f"DROP VIEW IF EXISTS {name}_content",
+    ]
+
+
+def _postgres_fts_ddl(name: str, table: str, columns: List[str]) -> List[str]:
+    # a generated column keeps itself in sync, no trigger needed
+    doc = " || ' ' || ".join(f"coalesce({c}, '')" for c in columns)
+    return [
+        f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_tsv tsvector "
+        f"GENERATED ALWAYS AS (to_tsvector('simple', {doc})) STORED",
+        f"CREATE INDEX IF NOT EXISTS ix_{name} ON {table} USING GIN (search_tsv)",
+    ]
+
+
+def install_search_index(engine: Engine):
+    """
+    Create the full-text indexes if they don't exist yet. Safe to call on
+    every start; existing rows are indexed the first time. An SQLite index
+    from before the owner column is dropped and rebuilt.
+    """
+    dialect = engine.dialect.name
+
+    with engine.begin() as conn:
+        for name, table, columns, owner_sql in FTS_TABLES:
+            if dialect == "sqlite":
+                indexed = {
+                    row[0] for row in
+                    conn.execute(text("SELECT name FROM pragma_table_info(:name)"), {"name": name})
+                }
+                if "owner" in indexed:
+                    statements = []
+                else:
+                    statements = _sqlite_drop_fts_ddl(name) + _sqlite_fts_ddl(name, table, columns, owner_sql)
+            elif dialect == "postgresql":
+                statements = _postgres_fts_ddl(name, table, columns)
+            else:
+                raise RuntimeError(f"Full-text search not supported on {dialect}")
+
+            for statement in statements:
+                conn.execute(text(statement))
+
+
+# ===============================
+# QUERIES
+# ===============================
+
+def query_terms(q: str) -> List[str]:
+    # words only: FTS5 / tsquery syntax in user input is never interpreted
+    return re.findall(r"\w+", q.lower())[:MAX_QUERY_TERMS]
+
+
+def _match_expression(dialect: str, terms: List[str], user_id: int, columns: List[str]) -> str:
+    # every term must appear, each as a prefix ("amaz" finds "amazon")
+    if dialect == "postgresql":
+        return " & ".join(f"{t}:*" for t in terms)
+    # only the user's own rows, and the terms only against the text columns
+    words = " ".join(f'"{t}"*' for t in terms)
+    return f'owner : "{_owner_token(user_id)}" AND {{{" ".join(columns)}}} : ({words})'
+
+
+def search_transactions(db: Session, user_id: int, terms: List[str], limit: int, offset: int,
+                        account_id: Optional[int] = None, date_from: Optional[date] = None,
+                        date_to: Optional[date] = None) -> List[dict]:
+    dialect = db.get_bind().dialect.name
+    params = {
+        "q": _match_expression(dialect, terms, user_id, ["description"]),
+        "user_id": user_id,
+        "account_id": account_id,
+        "date_from": date_from,
+        "date_to": date_to,
+        "limit": limit,
+        "offset": offset,
+    }
+
+    filters = """
+        AND a.user_id = :user_id
+        AND (:account_id IS NULL OR t.account_id = :account_id)
+        AND (:date_from IS NULL OR t.date >= :date_from)
+        AND (:date_to IS NULL OR t.date <= :date_to)
+    """
+
+    if dialect == "postgresql":
+        sql = f"""
+            SELECT t.id, t.account_id, t.date, t.description, t.amount, t.category,
+                   ts_rank(t.search_tsv, to_tsquery('simple', :q)) AS score
+            FROM transactions t
+            JOIN accounts a ON a.id = t.account_id
+            WHERE t.search_tsv @@ to_tsquery('simple', :q) {filters}
+            ORDER BY score DESC, t.date DESC, t.id DESC
+            LIMIT :limit OFFSET :offset
+        """
+    else:
+        # bm25() is lower-is-better; negate so score is higher-is-better everywhere
+        sql = f"""
+            SELECT t.id, t.account_id, t.date, t.description, t.amount, t.category,
+                   -bm25(transactions_fts, 1.0, 0.0) AS score
+            FROM transactions_fts
+            JOIN transactions t ON t.id = transactions_fts.rowid
+            JOIN accounts a ON a.id = t.account_id
+            WHERE transactions_fts MATCH :q {filters}
+            ORDER BY score DESC, t.date DESC, t.id DESC
+            LIMIT :limit OFFSET :offset
+        """
+
+    return [dict(row._mapping) for row in db.execute(text(sql), params)]
+
+
+def search_receipts(db: Session, user_id: int, terms: List[str], limit: int, offset: int) -> List[dict]:
+    """
+    Receipts whose merchant, OCR text or any item name matches. "match" is
+    the matching item name or a snippet of the receipt text.
+    """
+    dialect = db.get_bind().dialect.name
+    params = {"q": _match_expression(dialect, terms, user_id, ["merchant", "raw_text"]),
+              "items_q": _match_expression(dialect, terms, user_id, ["name"]),
+              "user_id": user_id, "limit": limit, "offset": offset}
+
+    if dialect == "postgresql":
+        sql = """
+            WITH hits AS (
+                SELECT r.id AS receipt_id,
+                       ts_rank(r.search_tsv, to_tsquery('simple', :q)) AS score,
+                       r.merchant AS match
+                FROM receipts r
+                WHERE r.user_id = :user_id AND r.search_tsv @@ to_tsquery('simple', :q)
+                UNION ALL
+                SELECT ri.receipt_id, ts_rank(ri.search_tsv, to_tsquery('simple', :q)), ri.name
+                FROM receipt_items ri
+                JOIN receipts r ON r.id = ri.receipt_id
+                WHERE r.user_id = :user_id AND ri.search_tsv @@ to_tsquery('simple', :q)
+            ),
+            best AS (
+                SELECT DISTINCT ON (receipt_id) receipt_id, score, match
+                FROM hits ORDER BY receipt_id, score DESC
+            )
+            SELECT r.id, r.merchant, r.receipt_date, r.total, r.created_at, best.score, best.match
+            FROM best JOIN receipts r ON r.id = best.receipt_id
+            ORDER BY best.score DESC, r.created_at DESC, r.id DESC
+            LIMIT :limit OFFSET :offset
+        """
+    else:
+        # merchant hits weigh more than a word somewhere in the OCR text
+        sql = """
+            WITH hits AS (
+                SELECT receipts_fts.rowid AS receipt_id,
+                       -bm25(receipts_fts, 10.0, 1.0, 0.0) AS score,
+                       snippet(receipts_fts, -1, '[', ']', '...', 8) AS match
+                FROM receipts_fts
+                WHERE receipts_fts MATCH :q
+                UNION ALL
+                SELECT ri.receipt_id, -bm25(receipt_items_fts, 1.0, 0.0), ri.name
+                FROM receipt_items_fts
+                JOIN receipt_items ri ON ri.id = receipt_items_fts.rowid
+                WHERE receipt_items_fts MATCH :items_q
+            )
+            SELECT r.id, r.merchant, r.receipt_date, r.total, r.created_at,
+                   MAX(hits.score) AS score, hits.match
+            FROM hits JOIN receipts r ON r.id = hits.receipt_id
+            WHERE r.user_id = :user_id
+            GROUP BY r.id
+            ORDER BY score DESC, r.created_at DESC, r.id DESC
+            LIMIT :limit OFFSET :offset
+        """
+
+    return [dict(row._mapping) for row in db.execute(text(sql), params)]
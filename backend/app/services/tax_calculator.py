@@ -1,52 +1,163 @@
-def calculate_uk_tax(gross_annual: float):
-    PERSONAL_ALLOWANCE = 12570
-    BASIC_RATE_LIMIT = 50270
-    HIGHER_RATE_LIMIT = 125140
-
-    taxable_income = max(0, gross_annual - PERSONAL_ALLOWANCE)
-
-    income_tax = 0
-
-    # Basic rate 20%
-    if gross_annual > PERSONAL_ALLOWANCE:
-        basic_taxable = min(taxable_income, BASIC_RATE_LIMIT - PERSONAL_ALLOWANCE)
-        income_tax += basic_taxable * 0.20
-
-    # Higher rate 40%
-    if gross_annual > BASIC_RATE_LIMIT:
-        higher_taxable = min(
-            gross_annual - BASIC_RATE_LIMIT,
-            HIGHER_RATE_LIMIT - BASIC_RATE_LIMIT
-        )
-        income_tax += higher_taxable * 0.40
-
-    # Additional rate 45%
-    if gross_annual > HIGHER_RATE_LIMIT:
-        additional_taxable = gross_annual - HIGHER_RATE_LIMIT
-        income_tax += additional_taxable * 0.45
-
-    # National Insurance (Class 1 simplified)
-    ni = 0
-    if gross_annual > PERSONAL_ALLOWANCE:
-        ni_basic = min(
-            gross_annual - PERSONAL_ALLOWANCE,
-            BASIC_RATE_LIMIT - PERSONAL_ALLOWANCE
-        )
-        ni += ni_basic * 0.08
-
-    if gross_annual > BASIC_RATE_LIMIT:
-        ni_higher = gross_annual - BASIC_RATE_LIMIT
-        ni += ni_higher * 0.02
+import math
+import re
+from datetime import date
+
+import numpy as np
+
+# ===============================
+# BAND TABLES
+# ===============================
+
+# Income tax bands are (upper limit of taxable income, rate); taxable
+# income is gross minus the (tapered) personal allowance. NI bands are
+# (upper limit of gross pay, rate) for employee Class 1, annualised.
+TAX_YEARS = {
+    "2024/25": {
+        "personal_allowance": 12570,
+        "taper_threshold": 100000,
+        "income_tax": {
+            "ruk": [(37700, 0.20), (125140, 0.40), (math.inf, 0.45)],
+            "scotland": [(2306, 0.19), (13991, 0.20), (31092, 0.21), (62430, 0.42),
+                         (125140, 0.45), (math.inf, 0.48)],
+        },
+        "ni": [(12570, 0.0), (50270, 0.08), (math.inf, 0.02)],
+    },
+    "2025/26": {
+        "personal_allowance": 12570,
+        "taper_threshold": 100000,
+        "income_tax": {
+            "ruk": [(37700, 0.20), (125140, 0.40), (math.inf, 0.45)],
+            "scotland": [(2827, 0.19), (14921, 0.20), (31092, 0.21), (62430, 0.42),
+                         (125140, 0.45), (math.inf, 0.48)],
+        },
+        "ni": [(12570, 0.0), (50270, 0.08), (math.inf, 0.02)],
+    },
+}
+
+DEFAULT_TAX_YEAR = "2025/26"
+TAX_YEAR_PATTERN = re.compile(r"(\d{4})/(\d{2})")
+DEFAULT_REGION = "ruk"
+
+
+def get_tax_table(tax_year: str, region: str):
+    """
+    (table, income tax bands) for a tax year and region. Raises ValueError
+    for anything not in TAX_YEARS.
+    """
+    table = TAX_YEARS.get(tax_year)
+    if table is None:
+        raise ValueError(f"Unsupported tax year {tax_year!r}; expected one of {sorted(TAX_YEARS)}")
+    bands = table["income_tax"].get(region)
+    if bands is None:
+        raise ValueError(f"Unsupported region {region!r}; expected one of {sorted(table['income_tax'])}")
+    return table, bands
+
+
+def tax_year_for(day: date) -> str:
+    """UK tax years run 6 April to 5 April: 2025-04-06 -> "2025/26"."""
+    start = day.year if (day.month, day.day) >= (4, 6) else day.year - 1
+    return f"{start}/{(start + 1) % 100:02d}"
+
+
+def tax_year_bounds(tax_year: str):
+    """
+    (first day, last day) of a "2025/26" style tax year. Raises ValueError
+    unless it is YYYY/YY with the second year following the first.
+    """
+    match = TAX_YEAR_PATTERN.fullmatch(tax_year)
+    if match is None:
+        raise ValueError(f"tax_year must look like 2025/26, got {tax_year!r}")
+    start, end = int(match[1]), int(match[2])
+    if end != (start + 1) % 100:
+        raise ValueError(f"tax_year {tax_year!r} does not span consecutive years")
+    return date(start, 4, 6), date(start + 1, 4, 5)
+
+
+def _round2(x):
+    # half-even on pennies, same as np.round(x, 2), so both paths agree
+    return round(x * 100) / 100
+
+
+# ===============================
+# SCALAR
+# ===============================
+
+def calculate_uk_tax(gross_annual: float, tax_year: str = DEFAULT_TAX_YEAR, region: str = DEFAULT_REGION):
+    table, bands = get_tax_table(tax_year, region)
+
+    # £1 of allowance lost for every £2 over the taper threshold
+    excess = max(0, gross_annual - table["taper_threshold"])
+    personal_allowance = max(0, table["personal_allowance"] - math.floor(excess / 2))
+
+    taxable_income = max(0, gross_annual - personal_allowance)
+
+    income_tax = 0.0
+    lower = 0
+    for upper, rate in bands:
+        income_tax += min(max(taxable_income - lower, 0), upper - lower) * rate
+        lower = upper
+
+    ni = 0.0
+    lower = 0
+    for upper, rate in table["ni"]:
+        ni += min(max(gross_annual - lower, 0), upper - lower) * rate
+        lower = upper
 
     net_annual = gross_annual - income_tax - ni
     net_monthly = net_annual / 12
 
     return {
+        "tax_year": tax_year,
+        "region": region,
         "gross_annual": gross_annual,
-        "personal_allowance": PERSONAL_ALLOWANCE,
+        "personal_allowance": personal_allowance,
+        "taxable_income": taxable_income,
+        "income_tax": _round2(income_tax),
+        "national_insurance": _round2(ni),
+        "net_annual": _round2(net_annual),
+        "net_monthly": _round2(net_monthly),
+    }
+
+
+# ===============================
+# BATCH
+# ===============================
+
+def calculate_uk_tax_batch(gross_annual, tax_year: str = DEFAULT_TAX_YEAR, region: str = DEFAULT_REGION):
+    """
+    calculate_uk_tax over an array of salaries. Same band arithmetic in the
+    same order, one NumPy op per band instead of one Python call per
+    salary; returns a dict of arrays keyed like the scalar result.
+    """
+    table, bands = get_tax_table(tax_year, region)
+    gross = np.asarray(gross_annual, dtype=float)
+
+    excess = np.maximum(0, gross - table["taper_threshold"])
+    personal_allowance = np.maximum(0, table["personal_allowance"] - np.floor(excess / 2))
+
+    taxable_income = np.maximum(0, gross - personal_allowance)
+
+    income_tax = np.zeros_like(gross)
+    lower = 0
+    for upper, rate in bands:
+        income_tax += np.minimum(np.maximum(taxable_income - lower, 0), upper - lower) * rate
+        lower = upper
+
+    ni = np.zeros_like(gross)
+    lower = 0
+    for upper, rate in table["ni"]:
+        ni += np.minimum(np.maximum(gross - lower, 0), upper - lower) * rate
+        lower = upper
+
+    net_annual = gross - income_tax - ni
+    net_monthly = net_annual / 12
+
+    return {
+        "gross_annual": gross,
+        "personal_allowance": personal_allowance,
         "taxable_income": taxable_income,
-        "income_tax": round(income_tax, 2),
-        "national_insurance": round(ni, 2),
-        "net_annual": round(net_annual, 2),
-        "net_monthly": round(net_monthly, 2),
-    }
\ No newline at end of file
+        "income_tax": np.round(income_tax, 2),
+        "national_insurance": np.round(ni, 2),
+        "net_annual": np.round(net_annual, 2),
+        "net_monthly": np.round(net_monthly, 2),
+    }
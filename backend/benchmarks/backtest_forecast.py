@@ -0,0 +1,231 @@
+"""
+Rolling-origin backtest and timing suite for app/ml/forecast_engine.py.
+
+Every engine in FORECAST_ENGINES is fitted at each origin of every series
+and scored on the months that follow. Series are synthetic (several shapes
+and lengths) plus, optionally, anonymized monthly closes from a SmartSpend
+database. Results are written as JSON so runs can be diffed across releases.
+
+    cd backend
+    python -m benchmarks.backtest_forecast --output backtest.json
+    python -m benchmarks.backtest_forecast --db smartspend.db --engines holt,linear
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import warnings
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.ml.forecast_engine import FORECAST_ENGINES  # noqa: E402
+
+SHAPES = ("trend", "seasonal", "random_walk", "step", "flat_noisy")
+LENGTHS = (12, 24, 36, 60)
+
+
+# ===============================
+# SERIES
+# ===============================
+
+def synthetic_series(shape: str, length: int, rng: np.random.Generator) -> np.ndarray:
+    t = np.arange(length, dtype=float)
+    base = rng.uniform(500, 5000)
+    noise = rng.normal(0, base * 0.03, length)
+
+    if shape == "trend":
+        y = base + t * rng.uniform(-0.03, 0.08) * base
+    elif shape == "seasonal":
+        # e.g. Christmas spend and a summer holiday every year
+        y = base + t * 0.01 * base + 0.2 * base * np.sin(2 * np.pi * t / 12)
+    elif shape == "random_walk":
+        y = base + np.cumsum(rng.normal(0, base * 0.05, length))
+    elif shape == "step":
+        # new job / moved house part way through
+        y = base + np.where(t >= length // 2, 0.5 * base, 0.0)
+    elif shape == "flat_noisy":
+        y = np.full(length, base)
+        noise *= 3
+    else:
+        raise ValueError(f"Unknown shape: {shape}")
+
+    return y + noise
+
+
+def synthetic_corpus(seed: int):
+    rng = np.random.default_rng(seed)
+    for shape in SHAPES:
+        for length in LENGTHS:
+            yield {"source": "synthetic", "shape": shape, "length": length,
+                   "values": synthetic_series(shape, length, rng)}
+
+
+def database_corpus(db_path: str, seed: int):
+    """
+    Monthly closes from a SmartSpend SQLite file. Only the values leave the
+    database, rescaled by a random per-series factor, so nothing in the
+    output ties back to a user or account.
+    """
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app import models
+    from app.services.monthly_balances import load_monthly_closing_balances
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    db = sessionmaker(bind=engine)()
+    try:
+        monthly = load_monthly_closing_balances(db, models.Account.id.isnot(None))
+    finally:
+        db.close()
+        engine.dispose()
+
+    rng = np.random.default_rng(seed)
+    for _, balances in monthly.values():
+        yield {"source": "anonymized", "shape": "real", "length": len(balances),
+               "values": balances * rng.uniform(0.5, 2.0)}
+
+
+# ===============================
+# EVALUATION
+# ===============================
+
+def rolling_origin(engine, values, horizon, min_train, step):
+    errors, covered, seconds = [], [], []
+
+    for origin in range(min_train, len(values) - horizon + 1, step):
+        train, actual = values[:origin], values[origin:origin + horizon]
+
+        start = time.perf_counter()
+        forecast, lower, upper = engine(train, periods=horizon)
+        seconds.append(time.perf_counter() - start)
+
+        nonzero = actual != 0
+        errors.extend(np.abs((actual[nonzero] - forecast[nonzero]) / actual[nonzero]))
+        covered.extend((actual >= lower) & (actual <= upper))
+
+    return errors, covered, seconds
+
+
+def peak_memory_kb(engine, values, horizon):
+    tracemalloc.start()
+    try:
+        engine(values[:-horizon], periods=horizon)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def summarise(errors, covered, seconds, peaks, failures):
+    seconds = np.asarray(seconds)
+    return {
+        "mape": round(float(np.mean(errors)) * 100, 3) if errors else None,
+        # a few exploding fits dominate the mean; the median shows the typical miss
+        "mdape": round(float(np.median(errors)) * 100, 3) if errors else None,
+        "interval_coverage": round(float(np.mean(covered)), 4) if covered else None,
+        "fits": int(len(seconds)),
+        "failures": failures,
+        "fit_predict_seconds_mean": round(float(seconds.mean()), 6) if len(seconds) else None,
+        "fit_predict_seconds_p95": round(float(np.percentile(seconds, 95)), 6) if len(seconds) else None,
+        "peak_memory_kb_max": round(max(peaks), 1) if peaks else None,
+    }
+
+
+def run(engines, corpus, horizon, min_train, step):
+    results = {}
+
+    for name in engines:
+        engine = FORECAST_ENGINES[name]
+        overall = {"errors": [], "covered": [], "seconds": [], "peaks": [], "failures": 0}
+        by_shape = {}
+
+        for series in corpus:
+            values = np.asarray(series["values"], dtype=float)
+            if len(values) < min_train + horizon:
+                continue
+
+            bucket = by_shape.setdefault(
+                series["shape"], {"errors": [], "covered": [], "seconds": [], "peaks": [], "failures": 0}
+            )
+            try:
+                errors, covered, seconds = rolling_origin(engine, values, horizon, min_train, step)
+                peak = peak_memory_kb(engine, values, horizon)
+            except Exception:
+                overall["failures"] += 1
+                bucket["failures"] += 1
+                continue
+
+            for target in (overall, bucket):
+                target["errors"].extend(errors)
+                target["covered"].extend(covered)
+                target["seconds"].extend(seconds)
+                target["peaks"].append(peak)
+
+        results[name] = {
+            **summarise(overall["errors"], overall["covered"], overall["seconds"],
+                        overall["peaks"], overall["failures"]),
+            "by_shape": {
+                shape: summarise(b["errors"], b["covered"], b["seconds"], b["peaks"], b["failures"])
+                for shape, b in by_shape.items()
+            },
+        }
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--engines", default=",".join(FORECAST_ENGINES),
+                        help="comma separated subset of: " + ", ".join(FORECAST_ENGINES))
+    parser.add_argument("--horizon", type=int, default=3)
+    parser.add_argument("--min-train", type=int, default=6)
+    parser.add_argument("--step", type=int, default=3, help="months between origins")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--db", help="SmartSpend SQLite file to add anonymized real series from")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    engines = [e.strip() for e in args.engines.split(",") if e.strip()]
+    unknown = set(engines) - set(FORECAST_ENGINES)
+    if unknown:
+        parser.error(f"unknown engine(s): {', '.join(sorted(unknown))}")
+
+    corpus = list(synthetic_corpus(args.seed))
+    if args.db:
+        corpus.extend(database_corpus(args.db, args.seed))
+
+    # statsmodels is noisy about short series and convergence
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        results = run(engines, corpus, args.horizon, args.min_train, args.step)
+
+    report = {
+        "benchmark": "forecast_backtest",
+        "generated_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "python": platform.python_version(),
+        "config": {
+            "horizon": args.horizon,
+            "min_train": args.min_train,
+            "step": args.step,
+            "seed": args.seed,
+            "series": len(corpus),
+        },
+        "engines": results,
+    }
+
+    out = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(out + "\n")
+    else:
+        print(out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Forecast input preparation: in-memory pandas resampling vs SQL month-end.
+
+Builds a throwaway SQLite database with one account of N transactions and
+times query + preparation of the monthly closing balance series both ways.
+
+    cd backend
+    python -m benchmarks.bench_forecast_inputs --rows 1000000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.database import Base  # noqa: E402
+from app import models  # noqa: E402
+from app.ml.forecast_engine import prepare_monthly_series  # noqa: E402
+from app.services.monthly_balances import load_monthly_closing_balances  # noqa: E402
+
+
+def build_db(path: str, rows: int, seed: int = 42):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+
+    rnd = random.Random(seed)
+    start = date(2000, 1, 1)
+    # ~40 transactions a day keeps 1M rows inside a realistic date span
+    per_day = 40
+
+    with engine.begin() as conn:
+        user_id = conn.execute(
+            insert(models.User).values(email="bench@example.com", hashed_password="x")
+        ).inserted_primary_key[0]
+        account_id = conn.execute(
+            insert(models.Account).values(user_id=user_id, name="Bench", opening_balance=0, current_balance=0)
+        ).inserted_primary_key[0]
+
+        balance = 0.0
+        batch = []
+        for i in range(rows):
+            amount = round(rnd.uniform(-80, 60), 2)
+            balance = round(balance + amount, 2)
+            batch.append({
+                "account_id": account_id,
+                "date": start + timedelta(days=i // per_day),
+                "description": f"TX {i}",
+                "amount": amount,
+                "transaction_type": "CREDIT" if amount > 0 else "DEBIT",
+                "category": "Uncategorised",
+                "balance_after": balance,
+            })
+            if len(batch) == 50_000:
+                conn.execute(insert(models.Transaction), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(models.Transaction), batch)
+
+    return engine, account_id
+
+
+def legacy_path(db, account_id):
+    # What /forecast/balance did before month-end moved into SQL
+    import pandas as pd
+
+    transactions = (
+        db.query(models.Transaction.date, models.Transaction.balance_after.label("balance"))
+        .filter(models.Transaction.account_id == account_id)
+        .order_by(models.Transaction.date.asc(), models.Transaction.id.asc())
+        .all()
+    )
+    data = [{"date": t.date, "balance": float(t.balance)} for t in transactions]
+    monthly = prepare_monthly_series(data)
+    monthly["date"] = pd.to_datetime(monthly["date"])
+    monthly["balance"] = monthly["balance"].astype(float)
+    monthly = monthly.sort_values("date").reset_index(drop=True)
+    return monthly["balance"].to_numpy()
+
+
+def sql_path(db, account_id):
+    monthly = load_monthly_closing_balances(db, models.Transaction.account_id == account_id)
+    return monthly[account_id][1]
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, account_id = build_db(os.path.join(tmp, "bench.db"), args.rows)
+        db = sessionmaker(bind=engine)()
+        try:
+            legacy_s, legacy = timed(lambda: legacy_path(db, account_id), args.repeat)
+            sql_s, fast = timed(lambda: sql_path(db, account_id), args.repeat)
+        finally:
+            db.close()
+            engine.dispose()
+
+    # Values can differ when a month ends with several same-day rows: the
+    # legacy sort_values("date") is not stable, so it picked an arbitrary one
+    # of them instead of the highest id.
+    if len(legacy) != len(fast):
+        raise SystemExit("legacy and SQL paths returned different month counts")
+
+    print(json.dumps({
+        "benchmark": "forecast_inputs",
+        "rows": args.rows,
+        "months": len(fast),
+        "legacy_seconds": round(legacy_s, 4),
+        "sql_seconds": round(sql_s, 4),
+        "speedup": round(legacy_s / sql_s, 2) if sql_s else None,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
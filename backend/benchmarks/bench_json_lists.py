@@ -0,0 +1,138 @@
+"""
+Large list responses: ORM + Pydantic + json.dumps vs row tuples + orjson.
+
+Generates one synthetic account per --sizes entry and requests
+/transactions/ and /transactions/balance-history through TestClient. The
+"before" handlers are the original ones (ORM objects, response_model
+validation, FastAPI's default JSON encoding) mounted on spare routes, so
+both paths share auth, the query plan and the HTTP stack. Responses are
+checked to decode to the same JSON.
+
+    cd backend
+    python -m benchmarks.bench_json_lists --sizes 10000,100000
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import List
+
+from sqlalchemy import create_engine
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+def mount_legacy_routes(app):
+    from fastapi import Depends
+    from sqlalchemy.orm import Session
+
+    from app import models, schemas
+    from app.database import get_db
+    from app.routers.transactions import get_account_owned, get_current_user, oauth2_scheme
+
+    @app.get("/bench/legacy/transactions", response_model=List[schemas.TransactionOut])
+    def legacy_transactions(account_id: int, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+        user = get_current_user(db, token)
+        account = get_account_owned(db, user.id, account_id)
+        return (
+            db.query(models.Transaction)
+            .filter(models.Transaction.account_id == account.id)
+            .order_by(models.Transaction.date.desc(), models.Transaction.id.desc())
+            .all()
+        )
+
+    @app.get("/bench/legacy/balance-history")
+    def legacy_balance_history(account_id: int, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+        user = get_current_user(db, token)
+        account = get_account_owned(db, user.id, account_id)
+        transactions = (
+            db.query(models.Transaction)
+            .filter(models.Transaction.account_id == account.id)
+            .order_by(models.Transaction.date.asc(), models.Transaction.id.asc())
+            .all()
+        )
+        daily_balances = {}
+        for tx in transactions:
+            daily_balances[str(tx.date)] = float(tx.balance_after)
+        return [{"date": d, "balance": b} for d, b in sorted(daily_balances.items())]
+
+
+def time_requests(client, path, params, headers, repeat):
+    times = []
+    body = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        r = client.get(path, params=params, headers=headers)
+        times.append(time.perf_counter() - start)
+        r.raise_for_status()
+        body = r.content
+    return statistics.median(times), body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="10000,100000", help="transactions per account, comma separated")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        # must be set before anything imports app.database
+        os.environ["SMARTSPEND_DATABASE_URL"] = url
+
+        from app.database import Base
+        from benchmarks.synthetic_data import populate
+
+        engine = create_engine(url)
+        Base.metadata.create_all(bind=engine)
+        users = {size: populate(engine, 1, 1, size, 0, args.seed + size, f"json{size}_")[0] for size in sizes}
+        engine.dispose()
+
+        from fastapi.testclient import TestClient
+        from app.main import app
+        from benchmarks.load_test import login
+
+        mount_legacy_routes(app)
+        results = []
+
+        with TestClient(app) as client:
+            for size in sizes:
+                user = users[size]
+                headers = login(client, user["email"], user["password"])
+                params = {"account_id": user["account_ids"][0]}
+
+                for name, before_path, after_path in [
+                    ("transactions", "/bench/legacy/transactions", "/transactions/"),
+                    ("balance_history", "/bench/legacy/balance-history", "/transactions/balance-history"),
+                ]:
+                    before_s, before_body = time_requests(client, before_path, params, headers, args.repeat)
+                    after_s, after_body = time_requests(client, after_path, params, headers, args.repeat)
+                    if json.loads(before_body) != json.loads(after_body):
+                        raise SystemExit(f"{name} at {size} rows: responses differ")
+
+                    results.append({
+                        "endpoint": name,
+                        "rows": size,
+                        "items": len(json.loads(after_body)),
+                        "bytes": len(after_body),
+                        "before_ms": round(before_s * 1000, 2),
+                        "after_ms": round(after_s * 1000, 2),
+                        "speedup": round(before_s / after_s, 2) if after_s else None,
+                    })
+
+    out = json.dumps({"benchmark": "json_lists", "repeat": args.repeat, "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(out + "\n")
+    print(out)
+
+
+if __name__ == "__main__":
+    main()
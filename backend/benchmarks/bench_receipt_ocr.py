@@ -0,0 +1,230 @@
+"""
+Receipt OCR latency and extraction accuracy, before vs after normalization.
+
+"before" is the original pipeline: full-resolution greyscale + autocontrast,
+a per-pixel lambda threshold, and both Tesseract passes every time.
+"after" is the current receipt_engine: normalize_for_ocr (draft decode,
+auto-crop, downsample to OCR_TARGET_WIDTH), LUT threshold and the
+confident-TOTAL short cut.
+
+The corpus is a directory of JPG/PNG files plus an expected.json of
+{"file.jpg": {"merchant": ..., "receipt_date": ..., "total": ...}}. Without
+--corpus a synthetic set of 12 MP receipt photos is generated. Without a
+tesseract binary only preprocessing is timed.
+
+    cd backend
+    python -m benchmarks.bench_receipt_ocr --output ocr.json
+    python -m benchmarks.bench_receipt_ocr --corpus ~/receipts
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont, ImageOps
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytesseract  # noqa: E402
+
+from app.ml.receipt_engine import (  # noqa: E402
+    _preprocess_basic,
+    _preprocess_threshold,
+    choose_ocr_text,
+    has_confident_total,
+    parse_receipt_text,
+)
+
+MERCHANTS = ["TESCO STORES", "SAINSBURYS", "ALDI STORES", "CO-OP FOOD", "LIDL GB"]
+PRODUCTS = ["MILK 2L", "BREAD", "EGGS 6PK", "BANANAS", "CHEDDAR", "PASTA", "RICE 1KG",
+            "APPLES", "TEA BAGS", "COFFEE", "BUTTER", "YOGHURT", "CRISPS", "WATER"]
+
+
+# ===============================
+# PIPELINES
+# ===============================
+
+def legacy_basic(img):
+    img = img.convert("L")
+    return ImageOps.autocontrast(img)
+
+
+def legacy_threshold(img):
+    img = img.convert("L")
+    img = ImageOps.autocontrast(img)
+    return img.point(lambda x: 255 if x > 140 else 0)
+
+
+PIPELINES = {
+    "before": (legacy_basic, legacy_threshold, False),
+    "after": (_preprocess_basic, _preprocess_threshold, True),
+}
+
+
+def run_pipeline(data: bytes, basic, threshold, short_cut: bool, with_ocr: bool):
+    timings = {"preprocess_s": 0.0, "ocr_s": 0.0}
+
+    start = time.perf_counter()
+    img_basic = basic(Image.open(io.BytesIO(data)))
+    timings["preprocess_s"] += time.perf_counter() - start
+    pixels = img_basic.width * img_basic.height
+
+    if not with_ocr:
+        start = time.perf_counter()
+        threshold(Image.open(io.BytesIO(data)))
+        timings["preprocess_s"] += time.perf_counter() - start
+        return None, timings, pixels
+
+    start = time.perf_counter()
+    text_basic = pytesseract.image_to_string(img_basic)
+    timings["ocr_s"] += time.perf_counter() - start
+
+    if short_cut and has_confident_total(text_basic):
+        return text_basic, timings, pixels
+
+    start = time.perf_counter()
+    img_thresh = threshold(Image.open(io.BytesIO(data)))
+    timings["preprocess_s"] += time.perf_counter() - start
+
+    start = time.perf_counter()
+    text_thresh = pytesseract.image_to_string(img_thresh)
+    timings["ocr_s"] += time.perf_counter() - start
+
+    return choose_ocr_text(text_basic, text_thresh), timings, pixels
+
+
+# ===============================
+# CORPUS
+# ===============================
+
+def synthetic_receipt(rnd: random.Random):
+    merchant = rnd.choice(MERCHANTS)
+    day, month = rnd.randint(1, 28), rnd.randint(1, 12)
+    receipt_date = f"{day:02d}/{month:02d}/2025"
+    items = [(rnd.choice(PRODUCTS), round(rnd.uniform(0.4, 9.99), 2)) for _ in range(rnd.randint(4, 14))]
+    total = round(sum(p for _, p in items), 2)
+
+    font = ImageFont.load_default(size=44)
+    paper = Image.new("L", (1100, 260 + 70 * (len(items) + 4)), 242)
+    draw = ImageDraw.Draw(paper)
+    y = 40
+    for line in [merchant, receipt_date, ""] + [f"{n:<22}{p:>8.2f}" for n, p in items] + ["", f"TOTAL {total:.2f}"]:
+        draw.text((60, y), line, fill=20, font=font)
+        y += 70
+
+    # photograph it: rotate a touch and drop it on a table, 12 MP
+    paper = paper.rotate(rnd.uniform(-2, 2), expand=True, fillcolor=70)
+    photo = Image.new("L", (3000, 4000), 70)
+    scale = 3600 / paper.height
+    paper = paper.resize((int(paper.width * scale), 3600))
+    photo.paste(paper, ((3000 - paper.width) // 2, 200))
+
+    noise = np.random.default_rng(rnd.randint(0, 2**31)).normal(0, 6, (4000, 3000))
+    photo = Image.fromarray(np.clip(np.asarray(photo, dtype=float) + noise, 0, 255).astype(np.uint8))
+
+    buf = io.BytesIO()
+    photo.convert("RGB").save(buf, "JPEG", quality=88)
+    return buf.getvalue(), {"merchant": merchant.title(), "receipt_date": receipt_date, "total": total}
+
+
+def load_corpus(path: str):
+    with open(os.path.join(path, "expected.json")) as f:
+        expected = json.load(f)
+    for name, fields in sorted(expected.items()):
+        with open(os.path.join(path, name), "rb") as img:
+            yield name, img.read(), fields
+
+
+def synthetic_corpus(count: int, seed: int):
+    rnd = random.Random(seed)
+    for i in range(count):
+        data, fields = synthetic_receipt(rnd)
+        yield f"synthetic_{i:03d}.jpg", data, fields
+
+
+# ===============================
+# MAIN
+# ===============================
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--corpus", help="directory with images and expected.json")
+    parser.add_argument("--count", type=int, default=10, help="synthetic receipts when no corpus")
+    parser.add_argument("--seed", type=int, default=3)
+    parser.add_argument("--save-corpus", help="write the synthetic corpus here for reuse")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    try:
+        pytesseract.get_tesseract_version()
+        with_ocr = True
+    except Exception:
+        with_ocr = False
+
+    corpus = list(load_corpus(args.corpus) if args.corpus else synthetic_corpus(args.count, args.seed))
+
+    if args.save_corpus and not args.corpus:
+        os.makedirs(args.save_corpus, exist_ok=True)
+        for name, data, _ in corpus:
+            with open(os.path.join(args.save_corpus, name), "wb") as f:
+                f.write(data)
+        with open(os.path.join(args.save_corpus, "expected.json"), "w") as f:
+            json.dump({name: fields for name, _, fields in corpus}, f, indent=2)
+
+    report = {
+        "benchmark": "receipt_ocr",
+        "corpus": args.corpus or f"synthetic:{args.count}:{args.seed}",
+        "receipts": len(corpus),
+        "ocr": with_ocr,
+        "pipelines": {},
+    }
+
+    for label, (basic, threshold, short_cut) in PIPELINES.items():
+        pre, ocr, pixels = [], [], []
+        correct = {"merchant": 0, "receipt_date": 0, "total": 0}
+
+        for _, data, expected in corpus:
+            text, timings, px = run_pipeline(data, basic, threshold, short_cut, with_ocr)
+            pre.append(timings["preprocess_s"])
+            ocr.append(timings["ocr_s"])
+            pixels.append(px)
+
+            if text is not None:
+                got = parse_receipt_text(text)
+                for field in correct:
+                    want = expected.get(field)
+                    if field == "total":
+                        correct[field] += got[field] is not None and want is not None and abs(got[field] - want) < 0.005
+                    else:
+                        correct[field] += (got[field] or "").lower() == (want or "").lower()
+
+        entry = {
+            "ocr_megapixels_mean": round(float(np.mean(pixels)) / 1e6, 2),
+            "preprocess_ms_mean": round(float(np.mean(pre)) * 1000, 1),
+            "preprocess_ms_p95": round(float(np.percentile(pre, 95)) * 1000, 1),
+        }
+        if with_ocr:
+            total_s = np.asarray(pre) + np.asarray(ocr)
+            entry.update({
+                "ocr_ms_mean": round(float(np.mean(ocr)) * 1000, 1),
+                "end_to_end_ms_mean": round(float(total_s.mean()) * 1000, 1),
+                "end_to_end_ms_p95": round(float(np.percentile(total_s, 95)) * 1000, 1),
+                "accuracy": {field: round(n / len(corpus), 3) for field, n in correct.items()},
+            })
+        report["pipelines"][label] = entry
+
+    out = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(out + "\n")
+    else:
+        print(out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Receipt text parser: regression corpus and throughput benchmark.
+
+benchmarks/receipt_corpus/ holds raw OCR texts (*.txt) and expected.json,
+the parse_receipt_text() output for each. tests/test_receipt_parser.py
+fails on any difference, so parser changes that move results must update
+expected.json on purpose (--update) and show up in review.
+
+    cd backend
+    python -m benchmarks.bench_receipt_parser --update
+    python -m benchmarks.bench_receipt_parser --seconds 5
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.ml.receipt_engine import parse_receipt_text  # noqa: E402
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "receipt_corpus")
+EXPECTED_PATH = os.path.join(CORPUS_DIR, "expected.json")
+
+
+def load_texts():
+    texts = {}
+    for name in sorted(os.listdir(CORPUS_DIR)):
+        if name.endswith(".txt"):
+            with open(os.path.join(CORPUS_DIR, name), encoding="utf-8") as f:
+                texts[name] = f.read()
+    return texts
+
+
+def parsed(raw: str) -> dict:
+    # raw_text is the input itself; no point storing it twice
+    result = parse_receipt_text(raw)
+    result.pop("raw_text")
+    return result
+
+
+def benchmark(texts, seconds: float) -> dict:
+    corpus = list(texts.values())
+    chars = sum(len(t) for t in corpus)
+
+    parsed_count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        for raw in corpus:
+            parse_receipt_text(raw)
+        parsed_count += len(corpus)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "benchmark": "receipt_parser",
+        "receipts": len(corpus),
+        "parsed": parsed_count,
+        "receipts_per_second": round(parsed_count / elapsed, 1),
+        "mb_per_second": round(chars * (parsed_count / len(corpus)) / elapsed / 1e6, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--update", action="store_true", help="rewrite expected.json from the current parser")
+    parser.add_argument("--seconds", type=float, default=2.0, help="benchmark duration")
+    args = parser.parse_args()
+
+    texts = load_texts()
+
+    if args.update:
+        with open(EXPECTED_PATH, "w", encoding="utf-8") as f:
+            json.dump({name: parsed(raw) for name, raw in texts.items()}, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        print(f"wrote {len(texts)} expected results")
+        return
+
+    print(json.dumps(benchmark(texts, args.seconds), indent=2))
+
+
+if __name__ == "__main__":
+    main()
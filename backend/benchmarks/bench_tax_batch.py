@@ -0,0 +1,86 @@
+"""
+Batch tax calculator speed against the scalar function.
+
+Salaries are random plus every band edge (and a penny either side), the
+taper range and zero. tests/test_tax_batch.py checks on the same
+salaries that both give the same result to the penny.
+
+    cd backend
+    python -m benchmarks.bench_tax_batch
+    python -m benchmarks.bench_tax_batch --count 1000000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.tax_calculator import (  # noqa: E402
+    TAX_YEARS,
+    calculate_uk_tax,
+    calculate_uk_tax_batch,
+)
+
+
+def edge_salaries(table) -> np.ndarray:
+    edges = {0.0, table["taper_threshold"], table["taper_threshold"] + 2 * table["personal_allowance"]}
+    for upper, _ in table["ni"]:
+        edges.add(upper)
+    for bands in table["income_tax"].values():
+        for upper, _ in bands:
+            # bands are in taxable income; with a full allowance that's gross - PA
+            edges.add(upper + table["personal_allowance"])
+            edges.add(upper)
+    edges = {e for e in edges if np.isfinite(e)}
+    return np.array(sorted(e + d for e in edges for d in (-0.01, 0.0, 0.01, 1.0) if e + d >= 0))
+
+
+def salaries(table, count: int, rng: np.random.Generator) -> np.ndarray:
+    return np.concatenate([
+        edge_salaries(table),
+        np.round(rng.uniform(0, 300_000, count), 2),
+        np.round(rng.uniform(99_000, 126_000, count // 4), 2),  # taper
+    ])
+
+
+def timing(gross, tax_year, region) -> dict:
+    start = time.perf_counter()
+    for g in gross.tolist():
+        calculate_uk_tax(g, tax_year, region)
+    scalar_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    calculate_uk_tax_batch(gross, tax_year, region)
+    batch_s = time.perf_counter() - start
+
+    return {
+        "salaries": int(len(gross)),
+        "scalar_ms": round(scalar_s * 1000, 2),
+        "batch_ms": round(batch_s * 1000, 2),
+        "speedup": round(scalar_s / batch_s, 1) if batch_s else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=20_000, help="random salaries per year/region")
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    report = {"benchmark": "tax_batch", "results": {}}
+
+    for tax_year, table in TAX_YEARS.items():
+        for region in table["income_tax"]:
+            gross = salaries(table, args.count, rng)
+            report["results"][f"{tax_year} {region}"] = timing(gross, tax_year, region)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
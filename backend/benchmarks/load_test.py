@@ -0,0 +1,272 @@
+"""
+End-to-end load test: API throughput and p50/p95/p99 latency at several data sizes.
+
+For every --sizes entry --users synthetic users are generated, each with
+one account of that many transactions (see synthetic_data), all in a
+throwaway SQLite database. Requests rotate across the users, so the
+per-user admission caps don't turn extra concurrency into 429s. The app
+is then driven in-process through TestClient, so the numbers cover
+routing, auth, SQL, serialization and the forecast / OCR pools, but not
+the network or uvicorn.
+
+Endpoints: transaction listing, summary, dashboard, balance forecast,
+receipt listing, receipt upload (only with a tesseract binary) and
+transaction upload. Uploads add rows, so they run last and always one at
+a time: the endpoint rejects anything not newer than the last import.
+
+Failed requests never stop the run. Each endpoint reports "errors" (5xx,
+other 4xx and client exceptions) and "error_rate", with 429s from
+admission control counted separately under "rejected_429".
+
+    cd backend
+    python -m benchmarks.load_test --sizes 1000,10000,100000 --output load.json
+    python -m benchmarks.load_test --baseline load.json --output load-new.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import numpy as np
+from sqlalchemy import create_engine
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+def latency_stats(latencies, wall_seconds: float, statuses) -> dict:
+    """statuses: HTTP status per request, None where the call raised."""
+    ms = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    # admission control sheds load with 429s by design; count them apart
+    # from real failures
+    rejected = sum(1 for status in statuses if status == 429)
+    exceptions = sum(1 for status in statuses if status is None)
+    errors = sum(1 for status in statuses if status is None or (status >= 400 and status != 429))
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "exceptions": exceptions,
+        "rejected_429": rejected,
+        "error_rate": round(errors / len(latencies), 4),
+        "throughput_rps": round(len(latencies) / wall_seconds, 2) if wall_seconds else None,
+        "mean_ms": round(float(ms.mean()), 2),
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+    }
+
+
+def run_endpoint(call, requests: int, concurrency: int, warmup: int) -> dict:
+    """
+    call(i) -> response; timed per request, `concurrency` at a time. A
+    request that raises is counted as an error rather than ending the run.
+    """
+    def one(i):
+        start = time.perf_counter()
+        try:
+            status = call(i).status_code
+        except Exception as exc:
+            print(f"request {i} failed: {exc!r}", file=sys.stderr)
+            status = None
+        return time.perf_counter() - start, status
+
+    for i in range(warmup):
+        one(-1 - i)
+
+    start = time.perf_counter()
+    if concurrency <= 1:
+        results = [one(i) for i in range(requests)]
+    else:
+        with ThreadPoolExecutor(concurrency) as pool:
+            results = list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - start
+
+    return latency_stats([seconds for seconds, _ in results], wall, [status for _, status in results])
+
+
+# ===============================
+# SCENARIOS
+# ===============================
+
+def login(client, email: str, password: str) -> dict:
+    r = client.post("/auth/login", data={"username": email, "password": password})
+    r.raise_for_status()
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def upload_batches(last_day: date, batch: int, seed: int):
+    """Endless upload payloads, each dated after the previous one."""
+    from benchmarks.synthetic_data import DISCRETIONARY
+
+    rnd = random.Random(seed)
+    day = last_day
+    while True:
+        day += timedelta(days=1)
+        payload = []
+        for _ in range(batch):
+            description, _, _, low, high = rnd.choice(DISCRETIONARY)
+            payload.append({
+                # the importer reads dates day-first
+                "date": day.strftime("%d/%m/%Y"),
+                "description": description,
+                "amount": -round(rnd.uniform(low, high), 2),
+            })
+        yield payload
+
+
+def run_size(client, users: list, args, receipt_images) -> dict:
+    # request i goes to user i % len(users)
+    headers = [login(client, u["email"], u["password"]) for u in users]
+    params = [{"account_id": u["account_ids"][0]} for u in users]
+    n = len(users)
+
+    def get(path, **extra):
+        return lambda i: client.get(path, params={**params[i % n], **extra}, headers=headers[i % n])
+
+    endpoints = {
+        "transactions_list": get("/transactions/"),
+        "transactions_summary": get("/transactions/summary"),
+        "dashboard": get("/dashboard/"),
+        "forecast_balance": get("/forecast/balance"),
+        "receipts_list": lambda i: client.get("/receipts/", params={"limit": 50}, headers=headers[i % n]),
+    }
+
+    results = {}
+    for name, call in endpoints.items():
+        # the forecast fits a model per request, so it gets fewer of them
+        requests = max(args.requests // 5, 5) if name == "forecast_balance" else args.requests
+        results[name] = run_endpoint(call, requests, args.concurrency, args.warmup)
+
+    if receipt_images is None:
+        results["receipts_upload"] = {"skipped": "tesseract not installed"}
+    else:
+        # distinct images, or the duplicate check answers without OCR;
+        # warmup calls (negative i) take the spare ones from the end
+        def upload_receipt(i):
+            image = receipt_images[i % len(receipt_images)]
+            return client.post("/receipts/upload", headers=headers[i % n],
+                               files={"file": (f"receipt_{i}.png", image, "image/png")})
+
+        results["receipts_upload"] = run_endpoint(upload_receipt, args.requests, args.concurrency, args.warmup)
+
+    # one user: each upload has to be newer than the one before
+    summary = client.get("/transactions/summary", params=params[0], headers=headers[0]).json()
+    batches = upload_batches(date.fromisoformat(summary["date_to"]), args.upload_batch, args.seed)
+    results["transactions_upload"] = run_endpoint(
+        lambda i: client.post("/transactions/upload", headers=headers[0],
+                              json={**params[0], "transactions": next(batches)}),
+        max(args.requests // 5, 5), 1, args.warmup,
+    )
+    results["transactions_upload"]["rows_per_request"] = args.upload_batch
+    return results
+
+
+def compare(current: dict, baseline: dict) -> dict:
+    """p50/p95 ratios against an earlier run, > 1 means slower now."""
+    ratios = {}
+    old_sizes = {s["rows"]: s["endpoints"] for s in baseline.get("sizes", [])}
+    for size in current["sizes"]:
+        old = old_sizes.get(size["rows"], {})
+        for name, stats in size["endpoints"].items():
+            before = old.get(name, {})
+            if "p50_ms" in stats and before.get("p50_ms"):
+                ratios[f"{size['rows']}/{name}"] = {
+                    "p50": round(stats["p50_ms"] / before["p50_ms"], 2),
+                    "p95": round(stats["p95_ms"] / before["p95_ms"], 2),
+                }
+    return ratios
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="1000,10000,100000", help="transactions per account, comma separated")
+    parser.add_argument("--requests", type=int, default=50, help="requests per endpoint and size")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--users", type=int, help="synthetic users per size (default: --concurrency)")
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--receipts", type=int, default=200, help="stored receipts per user")
+    parser.add_argument("--upload-batch", type=int, default=10, help="transactions per upload request")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", help="earlier --output to compare against")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    n_users = max(args.users or args.concurrency, 1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'load.db')}"
+        # must be set before anything imports app.database
+        os.environ["SMARTSPEND_DATABASE_URL"] = url
+        os.environ.setdefault("SMARTSPEND_PROFILE_DIR", os.path.join(tmp, "profiles"))
+
+        from app.database import Base
+        from benchmarks.synthetic_data import populate, receipt_fields, receipt_image
+
+        engine = create_engine(url)
+        Base.metadata.create_all(bind=engine)
+        users = {}
+        generate_seconds = {}
+        for size in sizes:
+            start = time.perf_counter()
+            users[size] = populate(engine, n_users, 1, size, args.receipts, args.seed + size, f"load{size}_")
+            generate_seconds[size] = round(time.perf_counter() - start, 2)
+        engine.dispose()
+
+        # fresh images per size: the OCR cache is shared across sizes, so
+        # reused images would skip Tesseract after the first size
+        receipt_images = dict.fromkeys(sizes)
+        if shutil.which("tesseract"):
+            for size in sizes:
+                rnd = random.Random(args.seed + size)
+                receipt_images[size] = [receipt_image(receipt_fields(rnd))
+                                        for _ in range(args.requests + args.warmup)]
+
+        # imported after the data exists so startup builds the search index in one go
+        from fastapi.testclient import TestClient
+        from app.main import app
+
+        report = {
+            "benchmark": "load_test",
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "seed": args.seed,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "users": n_users,
+            "sizes": [],
+        }
+
+        # a server error comes back as a 500 to count, not an exception
+        with TestClient(app, raise_server_exceptions=False) as client, warnings.catch_warnings():
+            # statsmodels complains about short series on the small sizes
+            warnings.simplefilter("ignore")
+            for size in sizes:
+                report["sizes"].append({
+                    "rows": size,
+                    "generate_seconds": generate_seconds[size],
+                    "endpoints": run_size(client, users[size], args, receipt_images[size]),
+                })
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["vs_baseline"] = compare(report, json.load(f))
+
+    out = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(out + "\n")
+    print(out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+"""
+Reproducible synthetic SmartSpend data: users, accounts, UK bank transactions, receipts.
+
+Each account gets a monthly salary, rent, bills and subscriptions on fixed
+days, plus day-to-day spending at a pool of repeating merchants (Tesco,
+Greggs, TfL, Amazon...) that rises in December and over the summer and
+shifts towards food and shopping at weekends. Categories are the ones the
+categorizer's rules would pick, so imports and generated rows look alike.
+The same seed always gives the same rows.
+
+Rows go in with executemany, not through /transactions/upload: about
+a million rows a minute on SQLite, where the upload endpoint manages a
+few hundred a second. Receipt images are
+written with an expected.json, the corpus format bench_receipt_ocr reads.
+
+    cd backend
+    python -m benchmarks.synthetic_data --database sqlite:///synthetic.db \\
+        --users 20 --accounts 2 --rows 50000
+    python -m benchmarks.synthetic_data --receipt-images receipts/ --receipts 50
+"""
+import argparse
+import io
+import json
+import math
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+from PIL import Image, ImageDraw, ImageFont
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.database import Base  # noqa: E402
+from app import models  # noqa: E402
+from app.security import hash_password  # noqa: E402
+from app.services.income_totals import INCOME_CATEGORY, record_income  # noqa: E402
+from app.services.receipt_store import save_receipts  # noqa: E402
+from app.services.search_index import install_search_index  # noqa: E402
+
+PASSWORD = "synthetic-password"
+END_DATE = date(2025, 9, 30)
+
+# a realistic account sees ~4 transactions a day; bigger accounts are
+# packed more densely rather than stretched back past MAX_SPAN_DAYS
+DAILY_RATE = 4
+MAX_SPAN_DAYS = 15 * 365
+
+INSERT_BATCH = 50_000
+
+# (description, category, day of month, low, high)
+MONTHLY = [
+    ("RENT PAYMENT HOMELET", "Uncategorised", 1, 650.0, 1400.0),
+    ("PUREGYM LTD", "Fitness", 3, 19.99, 29.99),
+    ("BRITISH GAS", "Utilities", 5, 45.0, 140.0),
+    ("NETFLIX.COM", "Subscription", 9, 10.99, 10.99),
+    ("THAMES WATER", "Utilities", 12, 28.0, 42.0),
+    ("SPOTIFY P1F2C3", "Subscription", 15, 11.99, 11.99),
+    ("EE LIMITED", "Utilities", 18, 20.0, 35.0),
+]
+
+# (description, category, weight, low, high)
+DISCRETIONARY = [
+    ("TESCO STORES 2841", "Groceries", 9, 3.0, 85.0),
+    ("SAINSBURYS S/MKT", "Groceries", 6, 4.0, 70.0),
+    ("ALDI STORES 112", "Groceries", 5, 5.0, 60.0),
+    ("LIDL GB LONDON", "Groceries", 4, 3.0, 45.0),
+    ("CO-OP GROUP FOOD", "Groceries", 3, 2.0, 18.0),
+    ("GREGGS PLC", "Food", 5, 1.5, 8.0),
+    ("PRET A MANGER", "Food", 3, 3.0, 12.0),
+    ("COSTA COFFEE", "Food", 4, 2.5, 7.5),
+    ("MCDONALDS 1204", "Food", 2, 3.0, 14.0),
+    ("DELIVEROO", "Food", 2, 12.0, 38.0),
+    ("TFL TRAVEL CH", "Transport", 8, 1.75, 8.9),
+    ("TRAINLINE", "Transport", 1, 9.0, 95.0),
+    ("UBER TRIP", "Transport", 2, 6.0, 28.0),
+    ("AMAZON MKTPLACE", "Shopping", 4, 4.0, 120.0),
+    ("PRIMARK", "Shopping", 1, 6.0, 60.0),
+    ("BOOTS 0452", "Shopping", 2, 2.0, 35.0),
+    ("EBAY O*12-0981", "Shopping", 1, 5.0, 80.0),
+]
+
+WEEKEND_BOOST = {"Food": 1.8, "Shopping": 1.6, "Transport": 0.6}
+
+# spend multiplier by month: Christmas, January thrift, summer holidays
+SEASONALITY = {1: 0.8, 2: 0.85, 3: 0.95, 4: 1.0, 5: 1.0, 6: 1.05,
+               7: 1.2, 8: 1.25, 9: 0.95, 10: 1.0, 11: 1.15, 12: 1.5}
+
+EMPLOYERS = ["ACME LTD", "NORTHWIND PLC", "GLOBEX UK", "INITECH LTD", "HOOLI EUROPE"]
+
+RECEIPT_PRODUCTS = ["MILK 2L", "BREAD", "EGGS 6PK", "BANANAS", "CHEDDAR", "PASTA", "RICE 1KG",
+                    "APPLES", "TEA BAGS", "COFFEE", "BUTTER", "YOGHURT", "CRISPS", "WATER"]
+
+
+# ===============================
+# TRANSACTIONS
+# ===============================
+
+def _salary_day(year: int, month: int) -> date:
+    # paid on the 28th, or the Friday before if that's a weekend
+    day = date(year, month, 28)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+def _poisson(rnd: random.Random, lam: float) -> int:
+    if lam > 30:
+        return max(0, round(rnd.gauss(lam, math.sqrt(lam))))
+    limit, k, p = math.exp(-lam), 0, rnd.random()
+    while p > limit:
+        k += 1
+        p *= rnd.random()
+    return k
+
+
+def generate_transactions(rows: int, seed: int, end: date = END_DATE):
+    """
+    Yield (date, description, amount, category) for one account, oldest
+    first, exactly `rows` of them and none violating uq_tx_dedupe.
+    """
+    rnd = random.Random(seed)
+    days = min(max(rows // DAILY_RATE, 60), MAX_SPAN_DAYS)
+    start = end - timedelta(days=days - 1)
+
+    salary = round(rnd.uniform(1800, 4200), 2)
+    employer = rnd.choice(EMPLOYERS)
+    monthly = [(d, c, dom, round(rnd.uniform(lo, hi), 2)) for d, c, dom, lo, hi in MONTHLY]
+    # each person has their own shops: a subset of the pool, re-weighted
+    shops = rnd.sample(DISCRETIONARY, k=rnd.randint(10, len(DISCRETIONARY)))
+    weights = [w * rnd.uniform(0.5, 1.5) for _, _, w, _, _ in shops]
+    weekend_weights = [w * WEEKEND_BOOST.get(s[1], 1.0) for w, s in zip(weights, shops)]
+
+    fixed_per_month = len(monthly) + 1
+    mean_season = sum(SEASONALITY.values()) / 12
+    per_day = max((rows - fixed_per_month * days / 30.4) / days / mean_season, 0.5)
+
+    emitted = 0
+    day = start
+    while emitted < rows:
+        todays = []
+        if day == _salary_day(day.year, day.month):
+            todays.append((f"SALARY {employer}", round(salary * rnd.uniform(0.98, 1.05), 2), INCOME_CATEGORY))
+        for description, category, dom, amount in monthly:
+            if day.day == dom:
+                todays.append((description, -amount, category))
+
+        season = SEASONALITY[day.month]
+        today_weights = weekend_weights if day.weekday() >= 5 else weights
+        for _ in range(_poisson(rnd, per_day * season)):
+            description, category, _, low, high = rnd.choices(shops, today_weights)[0]
+            # skewed towards small baskets
+            amount = round(low + (high - low) * rnd.random() ** 2, 2)
+            todays.append((description, -amount, category))
+
+        seen = set()
+        for description, amount, category in todays:
+            while (description, amount) in seen:
+                amount = round(amount - 0.01, 2)
+            seen.add((description, amount))
+            yield day, description, amount, category
+            emitted += 1
+            if emitted == rows:
+                return
+
+        day += timedelta(days=1)
+
+
+def insert_account_transactions(db: Session, account: models.Account, rows: int, seed: int) -> list:
+    """
+    Bulk insert one account's transactions with running balances, update
+    its current_balance and return the (date, amount) income rows.
+    """
+    balance = float(account.opening_balance)
+    income = []
+    batch = []
+    for day, description, amount, category in generate_transactions(rows, seed):
+        balance = round(balance + amount, 2)
+        batch.append({
+            "account_id": account.id,
+            "date": day,
+            "description": description,
+            "amount": amount,
+            "transaction_type": "CREDIT" if amount > 0 else "DEBIT",
+            "category": category,
+            "balance_after": balance,
+        })
+        if category == INCOME_CATEGORY:
+            income.append((day, amount))
+        if len(batch) == INSERT_BATCH:
+            db.execute(insert(models.Transaction), batch)
+            batch = []
+    if batch:
+        db.execute(insert(models.Transaction), batch)
+
+    account.current_balance = balance
+    account.data_version = (account.data_version or 0) + 1
+    return income
+
+
+def populate(engine, users: int, accounts_per_user: int, rows_per_account: int,
+             receipts_per_user: int = 0, seed: int = 42, email_prefix: str = "synthetic") -> list:
+    """
+    Create users, accounts, transactions, income totals and receipts.
+    Returns [{"email", "password", "user_id", "account_ids"}] for logging in.
+    """
+    rnd = random.Random(seed)
+    password_hash = hash_password(PASSWORD)
+    created = []
+
+    with Session(engine) as db:
+        for u in range(users):
+            email = f"{email_prefix}{u}@example.com"
+            user = models.User(email=email, full_name=f"Synthetic User {u}", hashed_password=password_hash)
+            db.add(user)
+            db.flush()
+
+            income = []
+            account_ids = []
+            for a in range(accounts_per_user):
+                account = models.Account(
+                    user_id=user.id,
+                    name="Current Account" if a == 0 else f"Account {a + 1}",
+                    opening_balance=round(rnd.uniform(0, 3000), 2),
+                    current_balance=0.0,
+                    data_version=0,
+                )
+                db.add(account)
+                db.flush()
+                income.extend(insert_account_transactions(db, account, rows_per_account, rnd.randrange(2**31)))
+                account_ids.append(account.id)
+
+            record_income(db, user.id, income)
+            if receipts_per_user:
+                save_receipts(db, user.id, [
+                    (receipt_fields(rnd), f"synthetic_{u}_{i}.png", None)
+                    for i in range(receipts_per_user)
+                ], commit=False)
+            db.commit()
+
+            created.append({"email": email, "password": PASSWORD, "user_id": user.id, "account_ids": account_ids})
+
+    return created
+
+
+# ===============================
+# RECEIPTS
+# ===============================
+
+def receipt_fields(rnd: random.Random) -> dict:
+    """A receipt as extract_receipt() would return it."""
+    merchant = rnd.choice(["TESCO STORES", "SAINSBURYS", "ALDI STORES", "CO-OP FOOD", "LIDL GB"])
+    day = END_DATE - timedelta(days=rnd.randrange(365))
+    items = []
+    for _ in range(rnd.randint(3, 12)):
+        qty = rnd.choice([1, 1, 1, 2, 3])
+        unit_price = round(rnd.uniform(0.4, 6.5), 2)
+        items.append({"name": rnd.choice(RECEIPT_PRODUCTS), "qty": float(qty),
+                      "unit_price": unit_price, "line_total": round(qty * unit_price, 2)})
+    total = round(sum(i["line_total"] for i in items), 2)
+
+    lines = [merchant, day.strftime("%d/%m/%Y"), ""]
+    for item in items:
+        name = item["name"] if item["qty"] == 1 else f"{int(item['qty'])} x {item['name']}"
+        lines.append(f"{name:<22}{item['line_total']:>8.2f}")
+    lines += ["", f"TOTAL {total:.2f}", "CARD PAYMENT"]
+
+    return {
+        "merchant": merchant.title(),
+        "receipt_date": day.strftime("%d/%m/%Y"),
+        "total": total,
+        "items": items,
+        "raw_text": "\n".join(lines),
+    }
+
+
+def receipt_image(fields: dict, width: int = 900) -> bytes:
+    """Render a receipt's raw_text as a clean PNG scan."""
+    lines = fields["raw_text"].splitlines()
+    font = ImageFont.load_default(size=width // 25)
+    step = width // 18
+    paper = Image.new("L", (width, step * (len(lines) + 2)), 245)
+    draw = ImageDraw.Draw(paper)
+    for i, line in enumerate(lines):
+        draw.text((width // 20, step * (i + 1)), line, fill=15, font=font)
+
+    buf = io.BytesIO()
+    paper.save(buf, "PNG")
+    return buf.getvalue()
+
+
+def write_receipt_images(directory: str, count: int, seed: int = 42) -> dict:
+    """Write count receipt PNGs plus expected.json; returns the expected fields."""
+    rnd = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    expected = {}
+    for i in range(count):
+        fields = receipt_fields(rnd)
+        name = f"receipt_{i:04d}.png"
+        with open(os.path.join(directory, name), "wb") as f:
+            f.write(receipt_image(fields))
+        expected[name] = {k: fields[k] for k in ("merchant", "receipt_date", "total")}
+
+    with open(os.path.join(directory, "expected.json"), "w") as f:
+        json.dump(expected, f, indent=2)
+    return expected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database", help="SQLAlchemy URL to fill, e.g. sqlite:///synthetic.db")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--accounts", type=int, default=1, help="accounts per user")
+    parser.add_argument("--rows", type=int, default=10_000, help="transactions per account")
+    parser.add_argument("--receipts", type=int, default=20, help="receipts per user (and images written)")
+    parser.add_argument("--receipt-images", help="directory to write receipt PNGs + expected.json to")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if not args.database and not args.receipt_images:
+        parser.error("nothing to do: pass --database and/or --receipt-images")
+
+    report = {"seed": args.seed}
+
+    if args.database:
+        engine = create_engine(args.database)
+        Base.metadata.create_all(bind=engine)
+
+        start = time.perf_counter()
+        users = populate(engine, args.users, args.accounts, args.rows, args.receipts, args.seed)
+        # on a fresh database the search index is built in one pass here
+        # rather than row by row through its triggers
+        install_search_index(engine)
+        seconds = time.perf_counter() - start
+        engine.dispose()
+
+        total = args.users * args.accounts * args.rows
+        report.update({
+            "database": args.database,
+            "users": len(users),
+            "accounts": args.users * args.accounts,
+            "transactions": total,
+            "receipts": args.users * args.receipts,
+            "seconds": round(seconds, 2),
+            "rows_per_second": round(total / seconds) if seconds else None,
+            "login": {"email": users[0]["email"], "password": PASSWORD} if users else None,
+        })
+
+    if args.receipt_images:
+        write_receipt_images(args.receipt_images, args.receipts, args.seed)
+        report["receipt_images"] = args.receipt_images
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
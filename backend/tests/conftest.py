@@ -0,0 +1,60 @@
+import os
+import sys
+import tempfile
+import uuid
+from datetime import date, timedelta
+
+import pytest
+
+_tmp = tempfile.TemporaryDirectory()
+# must be set before anything imports app.database
+os.environ["SMARTSPEND_DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp.name, 'test.db')}"
+os.environ["SMARTSPEND_RECEIPT_DIR"] = os.path.join(_tmp.name, "receipts")
+os.environ["SMARTSPEND_PROFILE_DIR"] = os.path.join(_tmp.name, "profiles")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.main import app  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def user(client):
+    """A fresh user with one account; returns (auth headers, account id)."""
+    return new_user(client)
+
+
+def new_user(client):
+    email = f"{uuid.uuid4().hex[:12]}@example.com"
+    client.post("/auth/register", json={"email": email, "password": "pw"})
+    token = client.post("/auth/login", data={"username": email, "password": "pw"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    account_id = client.get("/accounts/", headers=headers).json()[0]["id"]
+    return headers, account_id
+
+
+def upload(client, headers, account_id, rows):
+    """rows: (date, description, amount); dates sent as dd/mm/yyyy."""
+    transactions = [
+        {"date": day.strftime("%d/%m/%Y"), "description": description, "amount": amount}
+        for day, description, amount in rows
+    ]
+    r = client.post("/transactions/upload", json={"account_id": account_id, "transactions": transactions},
+                    headers=headers)
+    assert r.status_code == 200, r.text
+
+
+def monthly_history(months: int, start: date = date(2024, 1, 1)):
+    rows = []
+    day = start
+    for m in range(months):
+        rows.append((day, "SALARY ACME", 2000.0))
+        rows.append((day + timedelta(days=3), "TESCO STORES", -150.0 - 10 * (m % 3)))
+        day = (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+    return rows
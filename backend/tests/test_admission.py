@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from app.admission import ENDPOINT_CLASSES, EndpointClass, Rejected, classify
+
+
+def endpoint_class(**limits):
+    return EndpointClass("test", **{"concurrency": 1, "queue_size": 4, "per_user": 2, "max_wait": 1.0, **limits})
+
+
+def test_classify():
+    assert classify("POST", "/receipts/upload") is ENDPOINT_CLASSES["ocr"]
+    assert classify("POST", "/receipts/12/reprocess") is ENDPOINT_CLASSES["ocr"]
+    assert classify("GET", "/forecast/balance") is ENDPOINT_CLASSES["forecast"]
+    assert classify("GET", "/transactions/export") is ENDPOINT_CLASSES["export"]
+    assert classify("GET", "/transactions/") is None
+    assert classify("POST", "/forecast/balance") is None
+
+
+def test_per_user_cap_is_a_429():
+    async def scenario():
+        limits = endpoint_class(concurrency=2, per_user=1)
+        await limits.acquire("a")
+        with pytest.raises(Rejected) as rejected:
+            await limits.acquire("a")
+        await limits.acquire("b")  # other users still get in
+        return rejected.value
+
+    rejected = asyncio.run(scenario())
+    assert (rejected.status_code, rejected.reason) == (429, "per_user_limit")
+    assert rejected.retry_after >= 1
+
+
+def test_full_queue_and_long_wait_are_503s():
+    async def scenario():
+        limits = endpoint_class(queue_size=1, max_wait=0.05)
+        await limits.acquire("a")
+        waiter = asyncio.create_task(limits.acquire("b"))
+        await asyncio.sleep(0)
+        with pytest.raises(Rejected) as full:
+            await limits.acquire("c")
+        with pytest.raises(Rejected) as timed_out:
+            await waiter
+        return limits, full.value, timed_out.value
+
+    limits, full, timed_out = asyncio.run(scenario())
+    assert (full.status_code, full.reason) == (503, "queue_full")
+    assert (timed_out.status_code, timed_out.reason) == (503, "wait_timeout")
+    assert limits.queued == 0 and limits.by_user == {"a": 1}
+
+
+def test_freed_slots_go_round_robin_across_users():
+    async def scenario():
+        limits = endpoint_class(per_user=3)
+        await limits.acquire("x")
+        order = []
+
+        async def request(user):
+            await limits.acquire(user)
+            order.append(user)
+            limits.release(user)
+
+        # a burst from "a" arrives before "b" asks once
+        tasks = [asyncio.create_task(request(u)) for u in ("a", "a", "b")]
+        await asyncio.sleep(0)
+        limits.release("x")
+        await asyncio.gather(*tasks)
+        return limits, order
+
+    limits, order = asyncio.run(scenario())
+    assert order == ["a", "b", "a"]
+    assert limits.active == 0 and limits.queued == 0 and limits.by_user == {}
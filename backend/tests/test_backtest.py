@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from app.ml.forecast_engine import FORECAST_ENGINES
+from benchmarks.backtest_forecast import rolling_origin, run, synthetic_corpus
+
+
+@pytest.mark.parametrize("name", sorted(FORECAST_ENGINES))
+def test_engines_share_one_contract(name):
+    balances = np.linspace(1000, 1500, 24) + np.random.default_rng(0).normal(0, 20, 24)
+    forecast, lower, upper = FORECAST_ENGINES[name](balances, periods=3)
+    assert len(forecast) == len(lower) == len(upper) == 3
+    assert np.all(lower <= forecast) and np.all(forecast <= upper)
+
+
+def test_rolling_origin_scores_every_origin():
+    values = np.linspace(100, 200, 20)
+    errors, covered, seconds = rolling_origin(FORECAST_ENGINES["linear"], values, horizon=3, min_train=12, step=2)
+    # origins 12, 14, 16
+    assert len(seconds) == 3
+    assert len(errors) == len(covered) == 9
+    assert max(errors) < 1e-9  # a straight line is forecast exactly
+
+
+def test_run_summarises_per_engine_and_shape():
+    corpus = [s for s in synthetic_corpus(seed=1) if s["length"] == 24]
+    results = run(["holt", "linear"], corpus, horizon=3, min_train=12, step=6)
+    for name in ("holt", "linear"):
+        assert results[name]["failures"] == 0
+        assert results[name]["fits"] == len(corpus) * 2
+        assert set(results[name]["by_shape"]) == {s["shape"] for s in corpus}
@@ -0,0 +1,51 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from app.ml.forecast_engine import run_panel_smoothing_forecast
+
+from .conftest import upload
+
+
+def test_panel_matches_one_series_at_a_time():
+    rng = np.random.default_rng(0)
+    matrix = rng.uniform(50, 300, size=(18, 5))
+
+    forecast, lower, upper = run_panel_smoothing_forecast(matrix, periods=4)
+    assert forecast.shape == lower.shape == upper.shape == (4, 5)
+    for j in range(matrix.shape[1]):
+        single = run_panel_smoothing_forecast(matrix[:, [j]], periods=4)
+        assert all(np.allclose(panel[:, j], alone[:, 0]) for panel, alone in zip((forecast, lower, upper), single))
+
+
+def test_straight_line_is_forecast_exactly():
+    matrix = np.arange(10, dtype=float)[:, None] * 5 + 100
+    forecast, lower, upper = run_panel_smoothing_forecast(matrix, periods=3)
+    assert np.allclose(forecast[:, 0], [150, 155, 160])
+    assert np.allclose(lower, upper)
+
+
+def test_empty_matrix_is_rejected():
+    with pytest.raises(ValueError):
+        run_panel_smoothing_forecast(np.zeros((0, 3)))
+
+
+def test_category_forecast_never_goes_negative(client, user):
+    headers, account_id = user
+    # steeply falling spend would extrapolate below zero
+    upload(client, headers, account_id, [(date(2024, m, 10), "TESCO STORES", -(600.0 - 100 * m))
+                                         for m in range(1, 6)])
+
+    r = client.get("/forecast/categories", params={"account_id": account_id, "horizon_months": 6},
+                   headers=headers)
+    assert r.status_code == 200, r.text
+    [category] = r.json()["categories"]
+    assert all(p["forecast"] >= 0 and p["lower"] >= 0 for p in category["forecast"])
+
+
+def test_category_forecast_rejects_other_horizons(client, user):
+    headers, account_id = user
+    r = client.get("/forecast/categories", params={"account_id": account_id, "horizon_months": 4},
+                   headers=headers)
+    assert r.status_code == 400
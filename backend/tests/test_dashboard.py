@@ -0,0 +1,32 @@
+from datetime import date
+
+from .conftest import monthly_history, new_user, upload
+
+
+def test_dashboard_matches_the_separate_endpoints(client, user):
+    headers, account_id = user
+    upload(client, headers, account_id, monthly_history(5) + [
+        (date(2024, 2, 20), "UNKNOWN THING 123", -5.0),
+        (date(2024, 2, 20), "ANOTHER THING 456", -7.5),
+    ])
+    params = {"account_id": account_id}
+
+    body = client.get("/dashboard/", params=params, headers=headers).json()
+    assert body["accounts"] == client.get("/accounts/", headers=headers).json()
+    for key, path in [("summary", "summary"), ("by_category", "by-category"),
+                      ("balance_history", "balance-history")]:
+        assert body[key] == client.get(f"/transactions/{path}", params=params, headers=headers).json(), key
+
+
+def test_empty_account(client, user):
+    headers, account_id = user
+    body = client.get("/dashboard/", params={"account_id": account_id}, headers=headers).json()
+    assert body["summary"]["transaction_count"] == 0
+    assert body["summary"]["date_from"] is None
+    assert body["by_category"] == [] and body["balance_history"] == []
+
+
+def test_other_users_account_is_404(client, user):
+    _, account_id = user
+    other_headers, _ = new_user(client)
+    assert client.get("/dashboard/", params={"account_id": account_id}, headers=other_headers).status_code == 404
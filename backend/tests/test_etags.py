@@ -0,0 +1,53 @@
+from datetime import date
+
+import pytest
+
+from .conftest import monthly_history, upload
+
+ENDPOINTS = [
+    ("/transactions/summary", {}),
+    ("/transactions/balance-history", {}),
+    ("/transactions/by-category", {}),
+    ("/forecast/balance", {"horizon_months": 3}),
+    ("/dashboard/", {}),
+]
+
+
+@pytest.mark.parametrize("path,extra", ENDPOINTS)
+def test_unchanged_account_answers_304_until_an_upload(client, user, path, extra):
+    headers, account_id = user
+    upload(client, headers, account_id, monthly_history(6))
+    params = {"account_id": account_id, **extra}
+
+    first = client.get(path, params=params, headers=headers)
+    assert first.status_code == 200, first.text
+    etag = first.headers["etag"]
+
+    again = client.get(path, params=params, headers={**headers, "If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+
+    upload(client, headers, account_id, [(date(2024, 7, 2), "TESCO STORES", -20.0)])
+    changed = client.get(path, params=params, headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+def test_etag_depends_on_parameters(client, user):
+    headers, account_id = user
+    upload(client, headers, account_id, monthly_history(6))
+    three = client.get("/forecast/balance", params={"account_id": account_id, "horizon_months": 3}, headers=headers)
+    six = client.get("/forecast/balance", params={"account_id": account_id, "horizon_months": 6},
+                     headers={**headers, "If-None-Match": three.headers["etag"]})
+    assert six.status_code == 200
+
+
+def test_if_none_match_list_and_strong_form(client, user):
+    headers, account_id = user
+    upload(client, headers, account_id, monthly_history(2))
+    params = {"account_id": account_id}
+    etag = client.get("/transactions/summary", params=params, headers=headers).headers["etag"]
+
+    listed = f'"other", {etag.removeprefix("W/")}'
+    r = client.get("/transactions/summary", params=params, headers={**headers, "If-None-Match": listed})
+    assert r.status_code == 304
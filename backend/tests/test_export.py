@@ -0,0 +1,84 @@
+import csv
+import gzip
+import io
+from datetime import date
+
+import pytest
+
+from app.services import transaction_export
+from app.services.transaction_export import EXPORT_COLUMNS, pyarrow_available
+
+from .conftest import monthly_history, upload
+
+
+def export(client, headers, account_id, **params):
+    r = client.get("/transactions/export", params={"account_id": account_id, **params}, headers=headers)
+    assert r.status_code == 200, r.text
+    return r
+
+
+def csv_rows(data: bytes):
+    return list(csv.reader(io.StringIO(data.decode("utf-8"))))
+
+
+def test_csv_export_across_batches(client, user, monkeypatch):
+    monkeypatch.setattr(transaction_export, "EXPORT_BATCH_ROWS", 3)
+    headers, account_id = user
+    upload(client, headers, account_id, monthly_history(6))
+
+    r = export(client, headers, account_id)
+    assert r.headers["content-disposition"] == f'attachment; filename="transactions_{account_id}.csv"'
+    header, *rows = csv_rows(r.content)
+    assert header == EXPORT_COLUMNS
+    assert len(rows) == 12
+    assert [row[1] for row in rows] == sorted(row[1] for row in rows)
+    assert rows[-1][-1] == str(client.get("/accounts/", headers=headers).json()[0]["current_balance"])
+
+
+def test_gzip_and_date_range(client, user):
+    headers, account_id = user
+    upload(client, headers, account_id, monthly_history(6))
+
+    plain = export(client, headers, account_id, date_from="2024-03-01", date_to="2024-04-30").content
+    zipped = export(client, headers, account_id, date_from="2024-03-01", date_to="2024-04-30", gzip=True)
+    assert zipped.headers["content-type"] == "application/gzip"
+    assert gzip.decompress(zipped.content) == plain
+    assert {row[1][:7] for row in csv_rows(plain)[1:]} == {"2024-03", "2024-04"}
+
+
+def test_empty_account_exports_the_header(client, user):
+    headers, account_id = user
+    assert csv_rows(export(client, headers, account_id).content) == [EXPORT_COLUMNS]
+
+
+def test_unknown_format_is_a_400(client, user):
+    headers, account_id = user
+    r = client.get("/transactions/export", params={"account_id": account_id, "format": "xlsx"}, headers=headers)
+    assert r.status_code == 400
+
+
+@pytest.mark.skipif(pyarrow_available(), reason="pyarrow is installed")
+def test_parquet_needs_pyarrow(client, user):
+    headers, account_id = user
+    r = client.get("/transactions/export", params={"account_id": account_id, "format": "parquet"}, headers=headers)
+    assert r.status_code == 400
+
+
+@pytest.mark.skipif(not pyarrow_available(), reason="pyarrow not installed")
+@pytest.mark.parametrize("file_format", ["parquet", "arrow"])
+def test_arrow_formats_round_trip(client, user, monkeypatch, file_format):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    monkeypatch.setattr(transaction_export, "EXPORT_BATCH_ROWS", 5)
+    headers, account_id = user
+    upload(client, headers, account_id, monthly_history(6))
+
+    data = export(client, headers, account_id, format=file_format).content
+    if file_format == "parquet":
+        table = pq.read_table(io.BytesIO(data))
+    else:
+        table = pa.ipc.open_stream(data).read_all()
+    assert table.column_names == EXPORT_COLUMNS
+    assert table.num_rows == 12
+    assert table.column("date")[0].as_py() == date(2024, 1, 1)
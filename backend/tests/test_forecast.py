@@ -0,0 +1,91 @@
+from datetime import date
+
+import numpy as np
+
+from app.database import SessionLocal
+from app.ml.forecast_engine import forecast_monthly_series, run_holt_forecast
+from app.services.monthly_balances import load_monthly_closing_balances, month_label
+
+from .conftest import monthly_history, upload
+
+
+def test_legacy_forecast_route_matches_balance(client, user):
+    headers, account_id = user
+    upload(client, headers, account_id, monthly_history(8))
+
+    legacy = client.get("/forecast/", params={"account_id": account_id, "period": 3}, headers=headers)
+    assert legacy.status_code == 200, legacy.text
+    body = legacy.json()
+    assert body["horizon_months"] == 3
+    assert sum("forecast" in p for p in body["points"]) == 3
+
+    current = client.get("/forecast/balance", params={"account_id": account_id, "horizon_months": 3},
+                         headers=headers)
+    assert current.json() == body
+
+
+def test_degenerate_series_still_gives_finite_forecast():
+    # SARIMAX can't fit a flat year of balances
+    forecast = forecast_monthly_series(np.full(14, 250.0), periods=6)
+    assert all(np.isfinite(values).all() and len(values) == 6 for values in forecast)
+
+
+def test_month_label():
+    assert month_label(2025 * 12 + 10) == "2025-11"
+    assert month_label(2025 * 12 + 12) == "2026-01"
+
+
+def test_monthly_closing_balances_bucket_across_year_end(client, user):
+    headers, account_id = user
+    upload(client, headers, account_id, monthly_history(4, start=date(2024, 11, 1)))
+
+    with SessionLocal() as db:
+        months, balances = load_monthly_closing_balances(db)[account_id]
+    assert months == ["2024-11", "2024-12", "2025-01", "2025-02"]
+    # each month closes after the salary and the Tesco spend
+    assert balances[0] == 2000.0 - 150.0
+    assert balances[-1] == 4 * 2000.0 - (150 + 160 + 170 + 150)
+
+
+def test_category_forecast_fills_gaps_and_months(client, user):
+    headers, account_id = user
+    upload(client, headers, account_id, [
+        (date(2024, 11, 5), "TESCO STORES", -100.0),
+        (date(2025, 1, 5), "TESCO STORES", -120.0),
+    ])
+
+    r = client.get("/forecast/categories", params={"account_id": account_id, "horizon_months": 3},
+                   headers=headers)
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["months"] == ["2024-11", "2024-12", "2025-01"]
+    [category] = body["categories"]
+    assert category["history"] == [100.0, 0.0, 120.0]
+    assert [p["date"] for p in category["forecast"]] == ["2025-02", "2025-03", "2025-04"]
+
+
+def test_holt_fallback_is_the_holt_engine(monkeypatch):
+    import app.ml.forecast_engine as engine
+
+    def fail(*args, **kwargs):
+        raise ValueError
+
+    monkeypatch.setattr(engine, "run_sarimax_forecast", fail)
+    balances = np.linspace(100, 200, 12)
+    forecast = forecast_monthly_series(balances, periods=3)
+    expected = run_holt_forecast(balances, periods=3)
+    assert all(np.allclose(a, b) for a, b in zip(forecast, expected))
+
+
+def test_net_worth_counts_accounts_without_transactions(client, user):
+    headers, account_id = user
+    upload(client, headers, account_id, monthly_history(6))
+    savings = client.post("/accounts/", json={"name": "Savings", "opening_balance": 5000.0}, headers=headers).json()
+
+    body = client.get("/forecast/balance/batch", params={"horizon_months": 3, "include_net_worth": True},
+                      headers=headers).json()
+    assert body["skipped_accounts"] == [savings["id"]]
+    current = body["accounts"][str(account_id)]["points"]
+    net_worth = body["net_worth"]["points"]
+    assert [p["actual"] - 5000.0 for p in net_worth if "actual" in p] == \
+        [p["actual"] for p in current if "actual" in p]
@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import Base
+from benchmarks.load_test import run_endpoint
+from benchmarks.synthetic_data import generate_transactions, populate
+
+
+def test_generated_transactions_are_exact_sorted_and_unique():
+    rows = list(generate_transactions(2_000, seed=3))
+    assert len(rows) == 2_000
+    assert [r[0] for r in rows] == sorted(r[0] for r in rows)
+    assert len({(day, description, amount) for day, description, amount, _ in rows}) == len(rows)
+    assert rows == list(generate_transactions(2_000, seed=3))
+
+
+def test_populate_keeps_balances_consistent(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'synthetic.db'}")
+    Base.metadata.create_all(bind=engine)
+    [created] = populate(engine, users=1, accounts_per_user=2, rows_per_account=300, receipts_per_user=3, seed=5)
+
+    with Session(engine) as db:
+        for account_id in created["account_ids"]:
+            account = db.get(models.Account, account_id)
+            total = db.query(func.sum(models.Transaction.amount)) \
+                .filter(models.Transaction.account_id == account_id).scalar()
+            assert db.query(models.Transaction).filter_by(account_id=account_id).count() == 300
+            assert round(account.opening_balance + total, 2) == account.current_balance
+        assert db.query(models.Receipt).filter_by(user_id=created["user_id"]).count() == 3
+        assert db.query(models.IncomeTotal).filter_by(user_id=created["user_id"]).count() >= 1
+    engine.dispose()
+
+
+def test_run_endpoint_counts_429s_apart_from_errors():
+    statuses = [200, 429, 500, 404]
+
+    def call(i):
+        if i < 0:
+            return SimpleNamespace(status_code=200)
+        if i == 4:
+            raise ConnectionError
+        return SimpleNamespace(status_code=statuses[i])
+
+    stats = run_endpoint(call, requests=5, concurrency=2, warmup=1)
+    assert stats["requests"] == 5
+    assert stats["rejected_429"] == 1
+    assert stats["exceptions"] == 1
+    assert stats["errors"] == 3  # 500, 404 and the exception
+    assert stats["error_rate"] == 0.6
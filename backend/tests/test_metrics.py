@@ -0,0 +1,53 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.metrics import REQUEST_LATENCY, MetricsMiddleware
+
+
+def latency_series(method, route, status):
+    series = REQUEST_LATENCY._series.get((method, route, status))
+    return (sum(series[:-1]), series[-1]) if series else (0, 0.0)
+
+
+def test_streamed_response_is_timed_to_the_last_chunk():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics-test/stream/{n}")
+    def stream(n: int):
+        async def chunks():
+            for _ in range(n):
+                await asyncio.sleep(0.05)
+                yield b"x"
+        return StreamingResponse(chunks())
+
+    before_count, before_sum = latency_series("GET", "/metrics-test/stream/{n}", "200")
+    with TestClient(app) as client:
+        assert client.get("/metrics-test/stream/4").content == b"xxxx"
+    count, total = latency_series("GET", "/metrics-test/stream/{n}", "200")
+
+    assert count == before_count + 1
+    assert total - before_sum >= 0.2
+
+
+def test_failed_request_is_counted_as_500():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics-test/boom")
+    def boom():
+        raise RuntimeError("boom")
+
+    before, _ = latency_series("GET", "/metrics-test/boom", "500")
+    with TestClient(app, raise_server_exceptions=False) as client:
+        assert client.get("/metrics-test/boom").status_code == 500
+    assert latency_series("GET", "/metrics-test/boom", "500")[0] == before + 1
+
+
+def test_app_requests_are_labelled_by_route(client):
+    client.get("/")
+    assert 'smartspend_request_duration_seconds_count{method="GET",route="/",status="200"}' \
+        in client.get("/metrics").text
@@ -0,0 +1,44 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app import security
+from app.profiling import RequestProfile
+
+
+@pytest.fixture
+def admin(client, monkeypatch):
+    email = f"{uuid.uuid4().hex[:12]}@example.com"
+    client.post("/auth/register", json={"email": email, "password": "pw"})
+    token = client.post("/auth/login", data={"username": email, "password": "pw"}).json()["access_token"]
+    monkeypatch.setattr(security, "ADMIN_EMAILS", {email})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_profile_is_saved_off_the_event_loop(client, admin, monkeypatch):
+    save = RequestProfile.save
+    loops = []
+
+    def recording_save(self, status, seconds):
+        try:
+            loops.append(asyncio.get_running_loop())
+        except RuntimeError:
+            loops.append(None)
+        save(self, status, seconds)
+
+    monkeypatch.setattr(RequestProfile, "save", recording_save)
+    r = client.get("/accounts/", headers={**admin, "X-Profile": "1"})
+    profile_id = r.headers["x-profile-id"]
+
+    assert loops == [None]
+    summary = client.get(f"/admin/profiles/{profile_id}.json", headers=admin)
+    assert summary.status_code == 200
+    assert summary.json()["status"] == 200
+
+
+def test_non_admin_is_not_profiled(client, user):
+    headers, _ = user
+    r = client.get("/accounts/", headers={**headers, "X-Profile": "1"})
+    assert r.status_code == 200
+    assert "x-profile-id" not in r.headers
@@ -0,0 +1,32 @@
+import io
+import zipfile
+
+
+def zip_of(members: dict) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return buf.getvalue()
+
+
+def test_batch_reports_bad_entries_individually(client, user):
+    headers, _ = user
+    archive = zip_of({"notes.txt": b"hello", "bad.jpg": b"not a jpeg", ".hidden.png": b"x", "dir/": b""})
+
+    r = client.post("/receipts/upload/batch", headers=headers, files=[
+        ("files", ("scans.zip", archive, "application/zip")),
+        ("files", ("x.gif", b"GIF89a", "image/gif")),
+        ("files", ("broken.zip", b"PK not really", "application/zip")),
+    ])
+
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert (body["imported"], body["duplicates"], body["failed"]) == (0, 0, 4)
+    errors = {result["filename"]: result["error"] for result in body["results"]}
+    assert errors == {
+        "scans.zip/notes.txt": "Only JPG/PNG supported",
+        "scans.zip/bad.jpg": "Invalid image",
+        "x.gif": "Only JPG/PNG supported",
+        "broken.zip": "Invalid ZIP archive",
+    }
@@ -0,0 +1,98 @@
+import copy
+import io
+import random
+
+import pytest
+from PIL import Image
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.ml.receipt_engine import image_fingerprint, phash_distance
+from app.models import OcrCache, Receipt, User
+from app.services import receipt_cache
+from app.services.receipt_cache import (
+    PHASH_MAX_DISTANCE,
+    cache_ocr_text,
+    find_duplicate_receipt,
+    get_cached_ocr_text,
+)
+from benchmarks.synthetic_data import receipt_fields, receipt_image
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'receipts.db'}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add(User(id=1, email="dupes@example.com", hashed_password="x"))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def store(db, fields) -> Receipt:
+    content_hash, phash = image_fingerprint(receipt_image(fields))
+    receipt = Receipt(user_id=1, merchant=fields["merchant"], receipt_date=fields["receipt_date"],
+                      total=fields["total"], content_hash=content_hash, phash=phash)
+    db.add(receipt)
+    db.commit()
+    return receipt
+
+
+def test_same_store_different_receipt_is_not_a_duplicate(db):
+    first = receipt_fields(random.Random(3))
+    # same till, same day, one line and the total differ
+    second = copy.deepcopy(first)
+    lines = second["raw_text"].splitlines()
+    lines[3] = lines[3][:-4] + "9.99"
+    lines[-2] = "TOTAL 99.99"
+    second.update(raw_text="\n".join(lines), total=99.99)
+    earlier = store(db, first)
+
+    fingerprint = image_fingerprint(receipt_image(second))
+    assert phash_distance(fingerprint[1], earlier.phash) <= PHASH_MAX_DISTANCE  # the hash alone can't tell
+    assert find_duplicate_receipt(db, 1, *fingerprint) is None
+    assert find_duplicate_receipt(db, 1, *fingerprint, second) is None
+
+
+def test_reencoded_copy_is_a_duplicate_once_total_and_date_agree(db):
+    fields = receipt_fields(random.Random(4))
+    original = store(db, fields)
+
+    image = Image.open(io.BytesIO(receipt_image(fields))).convert("RGB")
+    buf = io.BytesIO()
+    image.resize((700, image.height * 700 // image.width)).save(buf, "JPEG", quality=70)
+    fingerprint = image_fingerprint(buf.getvalue())
+
+    # before OCR only exact pixels count
+    assert find_duplicate_receipt(db, 1, *fingerprint) is None
+    assert find_duplicate_receipt(db, 1, *fingerprint, fields).id == original.id
+
+
+def test_cache_lookup_and_store_leave_the_commit_to_the_caller(db):
+    cache_ocr_text(db, "a" * 64, "TESCO\nTOTAL 1.00")
+    assert get_cached_ocr_text(db, "a" * 64) == "TESCO\nTOTAL 1.00"
+    db.rollback()
+    assert get_cached_ocr_text(db, "a" * 64) is None
+
+
+def test_cache_evicts_least_recently_used_without_resumming(db, monkeypatch):
+    monkeypatch.setattr(receipt_cache, "OCR_CACHE_MAX_BYTES", 25)
+    monkeypatch.setattr(receipt_cache, "_cached_bytes", None)
+    monkeypatch.setattr(receipt_cache, "_inserts_since_sync", 0)
+
+    for key in "abc":
+        cache_ocr_text(db, key, "x" * 10)
+        db.commit()
+
+    assert {e.content_hash for e in db.query(OcrCache)} == {"b", "c"}
+    # the first insert read the table; later ones only added to the total
+    assert receipt_cache._cached_bytes == 20
+    assert receipt_cache._inserts_since_sync == 2
+
+
+def test_fingerprint_phash_is_256_bits():
+    _, phash = image_fingerprint(receipt_image(receipt_fields(random.Random(5))))
+    assert len(phash) == 64 and int(phash, 16) > 0
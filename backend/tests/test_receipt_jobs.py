@@ -0,0 +1,92 @@
+import io
+from datetime import datetime, timedelta
+
+import pytest
+from PIL import Image
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import ReceiptJob, User
+from app.services.receipt_jobs import ReceiptJobWorkers
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add(User(id=1, email="jobs@example.com", hashed_password="x"))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def add_job(db, path, **fields) -> ReceiptJob:
+    job = ReceiptJob(user_id=1, image_path=str(path), **fields)
+    db.add(job)
+    db.commit()
+    return job
+
+
+def test_only_lapsed_leases_are_requeued(db, tmp_path):
+    now = datetime.utcnow()
+    live = add_job(db, tmp_path / "a.png", status="processing", worker_id="other-process",
+                   lease_expires_at=now + timedelta(seconds=30))
+    lapsed = add_job(db, tmp_path / "b.png", status="processing", worker_id="dead-process",
+                     lease_expires_at=now - timedelta(seconds=1))
+    legacy = add_job(db, tmp_path / "c.png", status="processing")
+
+    assert ReceiptJobWorkers(1)._requeue_expired(db) == 2
+    db.expire_all()
+    assert live.status == "processing" and live.worker_id == "other-process"
+    assert lapsed.status == "queued" and lapsed.worker_id is None
+    assert legacy.status == "queued"
+
+
+def test_image_removed_once_job_finishes(db, tmp_path):
+    workers = ReceiptJobWorkers(1)
+    image = tmp_path / "receipt.png"
+    image.write_bytes(b"not an image")
+    job = add_job(db, image, status="processing", worker_id=workers.worker_id,
+                  lease_expires_at=datetime.utcnow() + timedelta(seconds=30))
+
+    workers._process(db, job)
+
+    db.expire_all()
+    assert job.status == "failed"
+    assert job.lease_expires_at is None
+    assert not image.exists()
+
+
+@pytest.mark.parametrize("owner, lease_seconds", [("other-process", 30), (None, 30), ("self", -1)])
+def test_job_without_our_lease_is_left_alone(db, tmp_path, owner, lease_seconds):
+    workers = ReceiptJobWorkers(1)
+    image = tmp_path / "receipt.png"
+    image.write_bytes(b"not an image")
+    job = add_job(db, image, status="processing",
+                  worker_id=workers.worker_id if owner == "self" else owner,
+                  lease_expires_at=datetime.utcnow() + timedelta(seconds=lease_seconds))
+
+    workers._process(db, job)
+
+    db.expire_all()
+    assert job.status == "processing"
+    assert image.exists()
+
+
+def test_job_stats_are_admin_only(client, user):
+    headers, _ = user
+    assert client.get("/receipts/jobs/stats", headers=headers).status_code == 403
+
+
+def test_create_job_queues_the_image(client, user, tmp_path):
+    headers, _ = user
+    buf = io.BytesIO()
+    Image.new("RGB", (64, 64), "white").save(buf, "PNG")
+
+    r = client.post("/receipts/jobs", headers=headers, files={"file": ("r.png", buf.getvalue(), "image/png")})
+    assert r.status_code == 202, r.text
+    job = client.get(f"/receipts/jobs/{r.json()['job_id']}", headers=headers)
+    assert job.status_code == 200
@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import models
+from app.database import SessionLocal
+from app.services.receipt_store import save_receipts
+
+from .conftest import new_user
+
+
+@pytest.fixture
+def receipts(user):
+    """Five receipts for the user, two sharing a created_at; returns (headers, ids newest first)."""
+    headers, account_id = user
+    with SessionLocal() as db:
+        user_id = db.get(models.Account, account_id).user_id
+        saved = save_receipts(db, user_id, [
+            ({"merchant": f"Shop {i}", "total": float(i), "raw_text": f"SHOP {i}\nTOTAL {i}.00",
+              "items": [{"name": "Thing", "line_total": float(i)}]}, None, None)
+            for i in range(5)
+        ], commit=False)
+        base = datetime(2025, 6, 1)
+        for i, receipt in enumerate(saved):
+            receipt.created_at = base + timedelta(minutes=min(i, 3))
+        db.commit()
+        ids = [r.id for r in saved]
+    return headers, ids[::-1]
+
+
+def test_pages_walk_every_receipt_once(client, receipts):
+    headers, newest_first = receipts
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/receipts/", params=params, headers=headers).json()
+        seen += [r["id"] for r in page["receipts"]]
+        assert all("raw_text" not in r and "items" not in r for r in page["receipts"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == newest_first
+
+
+def test_detail_has_items_and_text(client, receipts):
+    headers, newest_first = receipts
+    body = client.get(f"/receipts/{newest_first[0]}", headers=headers).json()
+    assert body["raw_text"] == "SHOP 4\nTOTAL 4.00"
+    assert [i["name"] for i in body["items"]] == ["Thing"]
+
+
+def test_other_users_receipts_are_hidden(client, receipts):
+    _, newest_first = receipts
+    other_headers, _ = new_user(client)
+    assert client.get(f"/receipts/{newest_first[0]}", headers=other_headers).status_code == 404
+
+
+def test_bad_cursor_and_limit(client, user):
+    headers, _ = user
+    assert client.get("/receipts/", params={"cursor": "nope"}, headers=headers).status_code == 400
+    assert client.get("/receipts/", params={"limit": 0}, headers=headers).status_code == 422
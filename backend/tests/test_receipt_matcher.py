@@ -0,0 +1,17 @@
+from datetime import date
+
+import pytest
+
+from app.models import Receipt
+from app.services.receipt_matcher import receipt_day
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("2025-12-03", date(2025, 12, 3)),
+    ("2025/12/03", date(2025, 12, 3)),
+    ("03/12/2025", date(2025, 12, 3)),
+    ("03-12-25", date(2025, 12, 3)),
+    ("3 Dec 2025", date(2025, 12, 3)),
+])
+def test_receipt_day_reads_iso_and_uk_dates(raw, expected):
+    assert receipt_day(Receipt(receipt_date=raw)) == expected
@@ -0,0 +1,42 @@
+import io
+
+from PIL import Image
+
+from app.ml.receipt_engine import OCR_TARGET_WIDTH, normalize_for_ocr
+
+
+def photo(width, height, paper=None):
+    """Dark background with a white sheet over `paper` (left, top, right, bottom)."""
+    img = Image.new("RGB", (width, height), (40, 40, 40))
+    if paper:
+        img.paste((250, 250, 250), paper)
+    return img
+
+
+def test_receipt_is_cropped_from_the_background():
+    out = normalize_for_ocr(photo(1000, 1400, paper=(300, 200, 700, 1200)))
+    assert out.mode == "L"
+    # the sheet plus a little padding, not the whole frame
+    assert 400 <= out.width < 500 and 1000 <= out.height < 1100
+
+
+def test_paper_filling_the_frame_is_not_cropped():
+    out = normalize_for_ocr(photo(800, 1200, paper=(0, 0, 800, 1200)))
+    assert out.size == (800, 1200)
+
+
+def test_wide_jpeg_is_scaled_to_target_width():
+    buf = io.BytesIO()
+    photo(4000, 6000, paper=(0, 0, 4000, 6000)).save(buf, "JPEG")
+    out = normalize_for_ocr(Image.open(io.BytesIO(buf.getvalue())))
+    assert out.width == OCR_TARGET_WIDTH
+    assert abs(out.height - 6000 * OCR_TARGET_WIDTH / 4000) <= 2
+
+
+def test_exif_rotation_is_applied():
+    buf = io.BytesIO()
+    exif = Image.Exif()
+    exif[0x0112] = 6  # rotate 90 degrees clockwise to display
+    photo(600, 400, paper=(0, 0, 600, 400)).save(buf, "JPEG", exif=exif)
+    out = normalize_for_ocr(Image.open(io.BytesIO(buf.getvalue())))
+    assert out.size == (400, 600)
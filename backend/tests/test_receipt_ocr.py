@@ -0,0 +1,45 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.ml import receipt_engine
+
+CONFIDENT = "TESCO\nMILK 1.20\nTOTAL 1.20\n"
+UNSURE = "TESCO\nMILK 1.20\n"
+
+
+@pytest.fixture
+def passes(monkeypatch):
+    """Runs OCR passes on threads with canned text; returns the variants run."""
+    ran = []
+    texts = {}
+
+    def fake_pass(image_bytes, variant):
+        ran.append(variant)
+        return texts[variant], 0.0
+
+    pool = ThreadPoolExecutor(2)
+    monkeypatch.setattr(receipt_engine, "_pool", pool)
+    monkeypatch.setattr(receipt_engine, "_ocr_pass_timed", fake_pass)
+    yield ran, texts
+    pool.shutdown()
+
+
+def test_busy_pool_skips_threshold_pass_after_confident_basic(passes, monkeypatch):
+    ran, texts = passes
+    texts.update(basic=CONFIDENT, threshold=UNSURE)
+    monkeypatch.setattr(receipt_engine, "_in_flight", receipt_engine.OCR_WORKERS)
+
+    assert asyncio.run(receipt_engine.ocr_image_bytes_async(b"img")) == CONFIDENT
+    assert receipt_engine.ocr_image_bytes(b"img") == CONFIDENT
+    assert ran == ["basic", "basic"]
+
+
+def test_threshold_pass_runs_when_basic_misses(passes, monkeypatch):
+    ran, texts = passes
+    texts.update(basic=UNSURE, threshold="TESCO\nMILK 1.20\nBREAD 0.90\n")
+    monkeypatch.setattr(receipt_engine, "_in_flight", receipt_engine.OCR_WORKERS)
+
+    assert asyncio.run(receipt_engine.ocr_image_bytes_async(b"img")) == texts["threshold"]
+    assert ran == ["basic", "threshold"]
@@ -0,0 +1,22 @@
+import json
+
+import pytest
+
+from benchmarks.bench_receipt_parser import EXPECTED_PATH, load_texts, parsed
+
+TEXTS = load_texts()
+
+with open(EXPECTED_PATH, encoding="utf-8") as f:
+    EXPECTED = json.load(f)
+
+
+@pytest.mark.parametrize("name", sorted(TEXTS))
+def test_corpus_receipt_parses_as_expected(name):
+    # on purpose changes: python -m benchmarks.bench_receipt_parser --update
+    assert name in EXPECTED, "no expected output"
+    assert parsed(TEXTS[name]) == EXPECTED[name]
+
+
+def test_expected_has_no_stale_entries():
+    assert sorted(set(EXPECTED) - set(TEXTS)) == []
+
@@ -0,0 +1,72 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Receipt, ReceiptItem, User
+from app.services.receipt_store import (
+    receipt_to_extraction,
+    replace_receipt_items,
+    save_receipt,
+    save_receipts,
+)
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'receipts.db'}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add(User(id=1, email="store@example.com", hashed_password="x"))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def extraction(merchant, *items):
+    return {
+        "merchant": merchant,
+        "receipt_date": "03/12/2025",
+        "total": round(sum(price for _, price in items), 2),
+        "raw_text": f"{merchant}\n",
+        "items": [{"name": name, "qty": 1.0, "unit_price": None, "line_total": price} for name, price in items],
+    }
+
+
+def test_receipts_and_items_are_saved_together_in_order(db):
+    saved = save_receipts(db, 1, [
+        (extraction("Tesco", ("Milk", 1.2), ("Bread", 1.5)), "a.png", ("hash-a", "0" * 64)),
+        (extraction("Aldi", ("Eggs", 2.1)), "b.png", None),
+    ])
+
+    assert [r.merchant for r in saved] == ["Tesco", "Aldi"]
+    assert saved[0].content_hash == "hash-a" and saved[1].content_hash is None
+    assert [i.name for i in saved[0].items] == ["Milk", "Bread"]
+    assert receipt_to_extraction(saved[1])["items"] == extraction("Aldi", ("Eggs", 2.1))["items"]
+
+
+def test_a_bad_item_saves_nothing(db):
+    bad = extraction("Tesco", ("Milk", 1.2))
+    bad["items"].append({"name": None, "line_total": 9.99})
+
+    with pytest.raises(IntegrityError):
+        save_receipts(db, 1, [(extraction("Aldi", ("Eggs", 2.1)), None, None), (bad, None, None)])
+    db.rollback()
+    assert db.query(Receipt).count() == 0
+    assert db.query(ReceiptItem).count() == 0
+
+
+def test_commit_false_leaves_the_transaction_to_the_caller(db):
+    save_receipt(db, 1, extraction("Tesco", ("Milk", 1.2)), commit=False)
+    db.rollback()
+    assert db.query(Receipt).count() == 0
+
+
+def test_replace_items(db):
+    receipt = save_receipt(db, 1, extraction("Tesco", ("Milk", 1.2), ("Bread", 1.5)))
+    replace_receipt_items(db, receipt, [{"name": "Cheese", "line_total": 3.0}])
+    db.commit()
+    assert [(i.name, i.qty) for i in receipt.items] == [("Cheese", 1.0)]
+    assert db.query(ReceiptItem).count() == 1
@@ -0,0 +1,52 @@
+from datetime import date
+
+from app import models
+from app.database import SessionLocal
+from app.ml.recurring_engine import detect_cadence, merchant_key, monthly_cost
+
+from .conftest import upload
+
+
+def monthly_charges(start: date, months: int, description="NETFLIX.COM", amount=-10.99):
+    return [(date(start.year + (start.month - 1 + m) // 12, (start.month - 1 + m) % 12 + 1, start.day),
+             description, amount) for m in range(months)]
+
+
+def test_cadence_detection():
+    days = [d.toordinal() for d, _, _ in monthly_charges(date(2024, 1, 15), 6)]
+    cadence, regularity = detect_cadence(days)
+    assert cadence == "monthly" and regularity >= 0.8
+    assert detect_cadence(days[:1]) is None
+    assert monthly_cost(-120.0, "annual") == 10.0
+    assert merchant_key("NETFLIX.COM 1234") == merchant_key("NETFLIX.COM 5678")
+
+
+def test_upload_finds_recurring_charges(client, user):
+    headers, account_id = user
+    upload(client, headers, account_id, monthly_charges(date(2024, 1, 15), 6))
+
+    body = client.get("/transactions/recurring", params={"account_id": account_id}, headers=headers).json()
+    [netflix] = body["recurring"]
+    assert netflix["cadence"] == "monthly"
+    assert netflix["occurrences"] == 6
+    assert netflix["next_date"] == "2024-07-15"
+
+
+def test_get_is_read_only_and_refresh_scans(client, user):
+    headers, account_id = user
+    # history that never went through the upload path
+    with SessionLocal() as db:
+        for day, description, amount in monthly_charges(date(2024, 1, 3), 5, "SPOTIFY", -9.99):
+            db.add(models.Transaction(account_id=account_id, date=day, description=description, amount=amount,
+                                      transaction_type="DEBIT", balance_after=0.0))
+        db.commit()
+
+    params = {"account_id": account_id}
+    assert client.get("/transactions/recurring", params=params, headers=headers).json()["recurring"] == []
+    with SessionLocal() as db:
+        assert db.get(models.RecurringScan, account_id) is None
+
+    refreshed = client.post("/transactions/recurring/refresh", params=params, headers=headers)
+    assert refreshed.status_code == 200, refreshed.text
+    assert [p["merchant"] for p in refreshed.json()["recurring"]] == ["SPOTIFY"]
+    assert client.get("/transactions/recurring", params=params, headers=headers).json() == refreshed.json()
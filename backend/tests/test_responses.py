@@ -0,0 +1,30 @@
+from datetime import date, datetime
+
+from fastapi import Response
+
+from app.responses import orjson_response, rows_as_dicts
+
+from .conftest import upload
+
+
+def test_orjson_response_encodes_dates_and_keeps_headers():
+    endpoint_response = Response()
+    endpoint_response.headers["ETag"] = '"v1"'
+    rows = rows_as_dicts(("id", "date", "created_at", "category"),
+                         [(1, date(2025, 4, 6), datetime(2025, 4, 6, 9, 30), None)])
+
+    response = orjson_response(rows, endpoint_response)
+    assert response.body == b'[{"id":1,"date":"2025-04-06","created_at":"2025-04-06T09:30:00","category":null}]'
+    assert response.headers["etag"] == '"v1"'
+    assert response.media_type == "application/json"
+
+
+def test_transaction_list_matches_response_model(client, user):
+    headers, account_id = user
+    upload(client, headers, account_id, [(date(2025, 1, 2), "TESCO STORES", -12.5)])
+
+    [row] = client.get("/transactions/", params={"account_id": account_id}, headers=headers).json()
+    assert row["date"] == "2025-01-02"
+    assert row["amount"] == -12.5
+    assert row["description"] == "TESCO STORES"
+    assert row["balance_after"] == -12.5
@@ -0,0 +1,24 @@
+from sqlalchemy import create_engine, inspect, text
+
+from app.database import Base
+from app.services.schema_upgrade import upgrade_schema
+
+
+def test_upgrade_adds_missing_columns_and_indexes(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        # what a database from before data_version / the receipt indexes looks like
+        conn.execute(text("ALTER TABLE accounts DROP COLUMN data_version"))
+        conn.execute(text("DROP INDEX ix_receipts_user_created"))
+        conn.execute(text("INSERT INTO users (id, email, hashed_password) VALUES (1, 'a@example.com', 'x')"))
+        conn.execute(text("INSERT INTO accounts (id, user_id, name) VALUES (1, 1, 'Main')"))
+
+    upgrade_schema(engine)
+    upgrade_schema(engine)  # second start is a no-op
+
+    inspector = inspect(engine)
+    assert "data_version" in {c["name"] for c in inspector.get_columns("accounts")}
+    assert "ix_receipts_user_created" in {i["name"] for i in inspector.get_indexes("receipts")}
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT data_version FROM accounts WHERE id = 1")).scalar() == 0
@@ -0,0 +1,46 @@
+from datetime import date
+
+from sqlalchemy import create_engine, text
+
+from app.database import Base
+from app.services.search_index import install_search_index
+
+from .conftest import upload
+
+
+def test_search_only_sees_own_transactions(client, user):
+    mine_headers, mine = user
+    upload(client, mine_headers, mine, [(date(2025, 3, 1), "NETFLIX.COM SUBSCRIPTION", -10.99)])
+
+    other = client.post("/auth/register", json={"email": "other-searcher@example.com", "password": "pw"})
+    assert other.status_code == 200, other.text
+    token = client.post("/auth/login", data={"username": "other-searcher@example.com", "password": "pw"}).json()
+    other_headers = {"Authorization": f"Bearer {token['access_token']}"}
+    other_account = client.get("/accounts/", headers=other_headers).json()[0]["id"]
+    upload(client, other_headers, other_account, [(date(2025, 3, 2), "NETFLIX.COM SUBSCRIPTION", -15.99)])
+
+    found = client.get("/search/", params={"q": "netflix", "type": "transactions"}, headers=mine_headers).json()
+    assert [t["amount"] for t in found["transactions"]] == [-10.99]
+
+
+def test_index_without_owner_column_is_rebuilt(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fts.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (id, email, hashed_password) VALUES (1, 'a@example.com', 'x')"))
+        conn.execute(text("INSERT INTO accounts (id, user_id, name) VALUES (1, 1, 'Main')"))
+        conn.execute(text("INSERT INTO transactions "
+                          "(id, account_id, date, description, amount, transaction_type, balance_after) "
+                          "VALUES (1, 1, '2025-03-01', 'TESCO STORES', -4.5, 'DEBIT', -4.5)"))
+        # the index as it was before owner tokens
+        conn.execute(text("CREATE VIRTUAL TABLE transactions_fts USING fts5(description, "
+                          "content='transactions', content_rowid='id')"))
+
+    install_search_index(engine)
+
+    with engine.connect() as conn:
+        columns = [r[0] for r in conn.execute(text("SELECT name FROM pragma_table_info('transactions_fts')"))]
+        hits = conn.execute(text("SELECT rowid FROM transactions_fts WHERE transactions_fts MATCH "
+                                 "'owner : \"u1\" AND description : tesco'")).all()
+    assert columns == ["description", "owner"]
+    assert hits == [(1,)]
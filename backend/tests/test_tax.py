@@ -0,0 +1,50 @@
+from datetime import date, timedelta
+
+import pytest
+
+from app.services.tax_calculator import tax_year_bounds, tax_year_for
+
+from .conftest import upload
+
+
+def test_projection_annualises_to_last_income_not_today(client, user):
+    headers, account_id = user
+    start, _ = tax_year_bounds(tax_year_for(date.today()))
+    paydays = [start + timedelta(days=29), start + timedelta(days=59)]
+    upload(client, headers, account_id, [(day, "SALARY ACME LTD", 2500.0) for day in paydays])
+
+    body = client.get("/tax/projected", headers=headers).json()
+    assert body["ytd_income"] == 5000.0
+    assert body["annualised_to"] == paydays[-1].isoformat()
+    assert body["elapsed_days"] == 60
+    assert body["gross_annual"] == round(5000.0 * body["year_days"] / 60, 2)
+
+
+def test_finished_year_is_not_projected(client, user):
+    headers, account_id = user
+    upload(client, headers, account_id, [(date(2024, 5, 28), "SALARY ACME LTD", 3000.0),
+                                         (date(2024, 6, 28), "SALARY ACME LTD", 3000.0)])
+
+    body = client.get("/tax/projected", params={"tax_year": "2024/25"}, headers=headers).json()
+    assert body["annualised_to"] == "2025-04-05"
+    assert body["gross_annual"] == 6000.0
+
+
+def test_no_income_projects_nothing(client, user):
+    headers, _ = user
+    body = client.get("/tax/projected", headers=headers).json()
+    assert body["annualised_to"] is None
+    assert body["gross_annual"] == 0.0
+
+
+@pytest.mark.parametrize("tax_year", ["2025", "2025/27", "25/26", "2025-26", "2025/26x"])
+def test_malformed_tax_year_is_rejected(client, user, tax_year):
+    headers, _ = user
+    r = client.get("/tax/projected", params={"tax_year": tax_year}, headers=headers)
+    assert r.status_code == 422, r.text
+
+
+def test_tax_year_bounds_across_the_century():
+    assert tax_year_bounds("2099/00") == (date(2099, 4, 6), date(2100, 4, 5))
+    with pytest.raises(ValueError):
+        tax_year_bounds("2099/100")
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from app.services.tax_calculator import TAX_YEARS, calculate_uk_tax, calculate_uk_tax_batch
+from benchmarks.bench_tax_batch import salaries
+
+FIELDS = ["personal_allowance", "taxable_income", "income_tax", "national_insurance",
+          "net_annual", "net_monthly"]
+
+
+@pytest.mark.parametrize("tax_year,region", [
+    (tax_year, region) for tax_year, table in TAX_YEARS.items() for region in table["income_tax"]
+])
+def test_batch_matches_scalar_to_the_penny(tax_year, region):
+    # every band edge, a penny either side, the taper range and zero
+    gross = salaries(TAX_YEARS[tax_year], 2_000, np.random.default_rng(11))
+    batch = calculate_uk_tax_batch(gross, tax_year, region)
+
+    mismatches = [
+        (g, field, scalar[field], batch[field][i])
+        for i, g in enumerate(gross.tolist())
+        for scalar in [calculate_uk_tax(g, tax_year, region)]
+        for field in FIELDS
+        if scalar[field] != batch[field][i]
+    ]
+    assert mismatches[:5] == []
+
+
+def test_batch_endpoint_keeps_salary_order(client):
+    r = client.post("/tax/calculate/batch", json={"gross_annual": [50000, 0, 20000]})
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["net_annual"] == [calculate_uk_tax(g)["net_annual"] for g in (50000, 0, 20000)]
+
+
+def test_unknown_year_or_region_is_a_400(client):
+    assert client.post("/tax/calculate/batch", json={"gross_annual": [1], "tax_year": "1999/00"}).status_code == 400
+    assert client.post("/tax/calculate/batch", json={"gross_annual": [1], "region": "wales"}).status_code == 400